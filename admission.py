@@ -0,0 +1,198 @@
+"""
+Fraud Detection Admission Control
+Per-client token-bucket rate limiting and global load shedding
+
+Every scoring request is checked here before any JSON is parsed or any
+model work is queued, so a rejected request costs a dict lookup and a few
+float operations.
+"""
+
+import math
+import time
+import threading
+from collections import OrderedDict
+
+
+class TokenBucket:
+    """Lazily refilled token bucket (no background timers)"""
+
+    __slots__ = ('tokens', 'updated')
+
+    def __init__(self, tokens, now):
+        self.tokens = tokens
+        self.updated = now
+
+
+class AdmissionDecision:
+    """Result of AdmissionController.admit"""
+
+    __slots__ = ('allowed', 'status', 'retry_after', 'reason')
+
+    def __init__(self, allowed, status=200, retry_after=0, reason=None):
+        self.allowed = allowed
+        self.status = status
+        self.retry_after = retry_after
+        self.reason = reason
+
+    def to_response(self):
+        """JSON body and headers for a rejected request"""
+        return {
+            'success': False,
+            'error': self.reason,
+            'retry_after_seconds': self.retry_after
+        }, {'Retry-After': str(self.retry_after)}
+
+
+ADMITTED = AdmissionDecision(True)
+
+
+class AdmissionController:
+    """
+    Admission layer in front of the scoring endpoints
+
+    - Per-client token buckets keyed by API key or client IP, refilled at
+      rate_per_minute up to burst tokens. Buckets live in an LRU capped at
+      max_clients, so lookups, refills and evictions are all O(1).
+    - Requests cost tokens: one for a single prediction, more for batches
+      (row_cost per transaction), so one batch client cannot use up the
+      budget of many single-transaction clients.
+    - Global load shedding: once max_in_flight requests are being served,
+      new requests get an immediate 503 instead of queueing.
+    """
+
+    def __init__(self, rate_per_minute=100, burst=None, max_in_flight=64,
+                 max_clients=100000, row_cost=0.1, enabled=True):
+        self.rate_per_second = rate_per_minute / 60.0
+        self.burst = float(burst or rate_per_minute)
+        self.max_in_flight = max_in_flight
+        self.max_clients = max_clients
+        self.row_cost = row_cost
+        self.enabled = enabled
+
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.counters = {
+            'admitted': 0,
+            'rejected_rate_limited': 0,
+            'rejected_overloaded': 0,
+        }
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            rate_per_minute=config.MAX_REQUESTS_PER_MINUTE,
+            burst=config.RATE_LIMIT_BURST,
+            max_in_flight=config.MAX_IN_FLIGHT_REQUESTS,
+            max_clients=config.RATE_LIMIT_MAX_CLIENTS,
+            row_cost=config.BATCH_ROW_TOKEN_COST,
+            enabled=config.RATE_LIMIT_ENABLED
+        )
+
+    def split_across(self, workers):
+        """
+        Divide the limits between independent worker processes
+
+        Pre-forked workers each hold their own buckets and in-flight count,
+        so without this the configured rate, burst and concurrency would be
+        multiplied by the number of workers. With the kernel spreading
+        connections across workers, each client's traffic reaches roughly
+        1 / workers of its budget in every worker, which adds up to the
+        configured limits. Call in each worker before it serves requests.
+        """
+        workers = max(1, int(workers))
+        with self._lock:
+            self.rate_per_second /= workers
+            self.burst = max(1.0, self.burst / workers)
+            self.max_in_flight = max(1, math.ceil(self.max_in_flight / workers))
+            self._buckets.clear()
+
+    def batch_cost(self, n_transactions):
+        """Token cost of a batch of n transactions"""
+        return max(1.0, n_transactions * self.row_cost)
+
+    def _take(self, client_key, cost, now):
+        """Refill the client's bucket and try to take cost tokens (caller holds the lock)"""
+        bucket = self._buckets.get(client_key)
+        if bucket is None:
+            bucket = TokenBucket(self.burst, now)
+            self._buckets[client_key] = bucket
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client_key)
+            bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated) * self.rate_per_second)
+            bucket.updated = now
+
+        if bucket.tokens >= cost:
+            bucket.tokens -= cost
+            return 0
+        missing = min(cost, self.burst) - bucket.tokens
+        return max(1, math.ceil(missing / self.rate_per_second))
+
+    def admit(self, client_key, cost=1.0):
+        """
+        Decide whether to serve a request
+
+        Admitted requests must be paired with a call to release().
+
+        Returns:
+            AdmissionDecision
+        """
+        if not self.enabled:
+            return ADMITTED
+        now = time.monotonic()
+        with self._lock:
+            if self.in_flight >= self.max_in_flight:
+                self.counters['rejected_overloaded'] += 1
+                return AdmissionDecision(False, 503, 1, 'Server overloaded, please retry shortly')
+
+            # Costs above the burst size are capped so an oversized batch can
+            # still run once the bucket is full instead of never
+            retry_after = self._take(client_key, min(cost, self.burst), now)
+            if retry_after:
+                self.counters['rejected_rate_limited'] += 1
+                return AdmissionDecision(False, 429, retry_after, 'Rate limit exceeded')
+
+            self.in_flight += 1
+            self.counters['admitted'] += 1
+            return ADMITTED
+
+    def should_precheck_reject(self, client_key, cost=1.0):
+        """
+        Cheap check made before parsing a batch body to learn its real cost
+
+        True when admit() would reject even a minimal request, so the caller
+        can call admit(client_key) and reject without reading the body.
+        """
+        return self.enabled and (self.in_flight >= self.max_in_flight or not self.has_tokens(client_key, cost))
+
+    def has_tokens(self, client_key, cost=1.0):
+        """True if the client's bucket currently holds at least cost tokens"""
+        if not self.enabled:
+            return True
+        with self._lock:
+            bucket = self._buckets.get(client_key)
+            if bucket is None:
+                return True
+            tokens = min(self.burst, bucket.tokens + (time.monotonic() - bucket.updated) * self.rate_per_second)
+            return tokens >= cost
+
+    def release(self):
+        """Mark an admitted request as finished"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.in_flight -= 1
+
+    def stats(self):
+        with self._lock:
+            return dict(
+                self.counters,
+                enabled=self.enabled,
+                in_flight=self.in_flight,
+                max_in_flight=self.max_in_flight,
+                tracked_clients=len(self._buckets),
+                requests_per_minute=round(self.rate_per_second * 60, 2),
+                burst=self.burst
+            )
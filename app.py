@@ -6,18 +6,32 @@ Real-time fraud detection API using trained Deep Neural Network
 
 import os
 import sys
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, request, jsonify, render_template, g
 from flask_cors import CORS
 import logging
+import threading
+import time
 from datetime import datetime
 import json
+import hmac
 
 # Add project root to path for imports
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 # Import our custom modules
-from models.fraud_model import FraudDetectionModel
+# (fraud_model is the module-level instance, so importing both modules
+# does not create - and load - two models)
+from models.fraud_model import fraud_model, FraudDetectionModel
+from models.attribution import ATTRIBUTION_METHODS
+from models.cascade import ScoringCascade
+from models.similar_cases import SimilarCaseIndex, INDEX_FILE as SIMILAR_CASES_FILE
 from config import Config
+from admission import AdmissionController
+from deadlines import DeadlineController
+from prediction_store import PredictionStore
+from shadow import ShadowScorer
+from fraud_rings import FraudRingGraph
+from profiler import SamplingProfiler
 
 # Initialize Flask app
 app = Flask(__name__)
@@ -33,29 +47,187 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Initialize the fraud detection model
-fraud_model = FraudDetectionModel()
-
 # Statistics tracking
 app_stats = {
     'total_predictions': 0,
     'fraud_detected': 0,
     'high_risk_detected': 0,
     'start_time': datetime.now(),
-    'model_loaded': False
+    'model_loaded': False,
+    'ready': False,  # Model loaded (or fallback chosen) and warmed up
+    'warmup_seconds': None
 }
 
+# Counters are updated from several request threads (and the ASGI
+# inference executor), so increments go through this lock
+stats_lock = threading.Lock()
+
+# Per-client rate limiting and load shedding for the scoring endpoints
+admission = AdmissionController.from_config(Config)
+
+# Serve the configured artifact directory (e.g. a versioned incremental build)
+fraud_model.model_path = Config.MODEL_PATH
+
+# FRAUD / SUSPICIOUS cut-offs for model probabilities
+fraud_model.set_thresholds(Config.FRAUD_THRESHOLD, Config.HIGH_RISK_THRESHOLD)
+
+# Rule stage in front of the DNN for clearly low-risk transaction types
+if Config.CASCADE_ENABLED:
+    fraud_model.enable_cascade(ScoringCascade.from_config(Config))
+
+# Latency budgets: requests that cannot meet their deadline on the DNN path
+# are answered by the distilled student if one is configured, otherwise by
+# the rule-based fallback
+deadlines = DeadlineController.from_config(Config)
+student_model = FraudDetectionModel(model_path=Config.STUDENT_MODEL_PATH) if Config.STUDENT_MODEL_PATH else None
+if student_model is not None:
+    student_model.set_thresholds(Config.FRAUD_THRESHOLD, Config.HIGH_RISK_THRESHOLD)
+
+# Scored transactions are persisted off the request path (None if disabled)
+prediction_store = PredictionStore.from_config(Config)
+
+# Challenger model scored in the background on a sample of traffic (None if
+# no challenger is configured)
+shadow_scorer = ShadowScorer.from_config(Config, store=prediction_store)
+
+# Windowed origin -> destination graph for mule-ring features (None if disabled)
+ring_graph = FraudRingGraph.from_config(Config)
+
+# On-demand stack sampler for /api/admin/profile (idle until started)
+profiler = SamplingProfiler.from_config(Config)
+
+# Nearest known fraud cases for flagged transactions (loaded with the model
+# when MODEL_PATH contains a similar-case index)
+similar_cases = None
+_similar_cases_lock = threading.Lock()
+_similar_cases_checked = False  # Set once load_similar_cases has looked for the index
+
+# Endpoints subject to admission control, and how their token cost is counted
+RATE_LIMITED_ENDPOINTS = {
+    '/api/predict': 'single',
+    '/api/batch-predict': 'batch',
+    '/api/explain': 'batch',
+    '/api/similar-cases': 'batch',
+}
+
+# Guards the background initialisation started by the readiness probe
+_init_lock = threading.Lock()
+_init_thread = None
+
 
 def initialize_model():
-    """Load the fraud detection model on app startup"""
+    """Load and warm up the fraud detection model on app startup"""
     try:
         logger.info("🚀 Initializing Fraud Detection System...")
         fraud_model.load_model()
-        app_stats['model_loaded'] = True
-        logger.info("✅ Fraud detection model loaded successfully!")
+        app_stats['model_loaded'] = fraud_model.is_loaded
+        prepare_serving()
+        if fraud_model.is_loaded:
+            logger.info("✅ Fraud detection model loaded successfully!")
+        else:
+            logger.warning("⚠️ Model not available - serving rule-based fallback predictions")
     except Exception as e:
         logger.error(f"❌ Error loading model: {e}")
         app_stats['model_loaded'] = False
+    finally:
+        # Ready either way: without a model, requests use the rule-based fallback
+        app_stats['ready'] = True
+
+def prepare_serving(isolate_keras=False):
+    """
+    Startup that follows loading fraud_model, shared by initialize_model and
+    prefork_server.py: load the student tier and the similar-case index,
+    enable bucketing and warm up
+    
+    Args:
+        isolate_keras (bool): Passed to the student's load_model (the
+            pre-fork parent must not start TensorFlow)
+    """
+    if student_model is not None:
+        student_model.load_model(isolate_keras=isolate_keras)
+    load_similar_cases()
+    if Config.BUCKETED_EXECUTION:
+        fraud_model.enable_bucketing(Config.BATCH_BUCKETS)
+    if Config.WARMUP_ON_STARTUP:
+        app_stats['warmup_seconds'] = fraud_model.warmup()
+
+def load_similar_cases():
+    """Load the similar-case index from the model artifacts, if one was built"""
+    global similar_cases, _similar_cases_checked
+    _similar_cases_checked = True
+    index_file = os.path.join(fraud_model.model_path, SIMILAR_CASES_FILE)
+    if not os.path.exists(index_file):
+        return
+    try:
+        index = SimilarCaseIndex.load(index_file)
+        index.check_compatible(fraud_model)
+        similar_cases = index
+        logger.info(f"✅ Similar-case index loaded ({len(index.cases)} fraud cases, {index.space} space)")
+    except Exception as e:
+        logger.error(f"❌ Error loading similar-case index: {e}")
+
+def get_similar_cases():
+    """
+    The similar-case index, loading it on first use
+    
+    WSGI servers only start initialize_model on the first readiness probe,
+    so a request may need the index before startup has loaded it. The
+    model it is checked against loads lazily the same way predictions do.
+    """
+    if not _similar_cases_checked:
+        with _similar_cases_lock:
+            if not _similar_cases_checked:
+                if not fraud_model.is_loaded:
+                    fraud_model.load_model()
+                load_similar_cases()
+    return similar_cases
+
+def ensure_initializing():
+    """
+    Start initialize_model in the background if nothing has started it yet
+    
+    WSGI servers import app.py without running __main__, so the first
+    readiness probe kicks off loading and warmup instead of the first
+    prediction request paying for it.
+    """
+    global _init_thread
+    if app_stats['ready']:
+        return
+    with _init_lock:
+        if _init_thread is None:
+            _init_thread = threading.Thread(target=initialize_model, name='model-init', daemon=True)
+            _init_thread.start()
+
+# ================================
+# ADMISSION CONTROL
+# ================================
+
+@app.before_request
+def mark_request_received():
+    """Record arrival time so deadlines include time spent before the handler"""
+    g.received_at = time.monotonic()
+
+@app.before_request
+def apply_admission_control():
+    """Reject over-limit clients and shed load before any model work"""
+    if request.method != 'POST' or request.path not in RATE_LIMITED_ENDPOINTS:
+        return None
+    client_key = get_client_key(
+        request.headers.get('X-API-Key'),
+        request.remote_addr,
+        request.headers.get('X-Forwarded-For')
+    )
+    decision = admit_request(request.path, client_key, lambda: request.get_json(silent=True))
+    if not decision.allowed:
+        body, headers = decision.to_response()
+        return jsonify(body), decision.status, headers
+    g.admitted = True
+    return None
+
+@app.teardown_request
+def release_admission(error=None):
+    if g.pop('admitted', False):
+        admission.release()
 
 # ================================
 # API ROUTES
@@ -69,33 +241,24 @@ def index():
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint for monitoring"""
-    uptime = (datetime.now() - app_stats['start_time']).total_seconds()
-    
-    return jsonify({
-        'status': 'healthy',
-        'model_loaded': app_stats['model_loaded'],
-        'uptime_seconds': uptime,
-        'total_predictions': app_stats['total_predictions'],
-        'fraud_detected': app_stats['fraud_detected'],
-        'version': '1.0.0'
-    })
+    return jsonify(build_health_payload())
+
+@app.route('/api/health/live', methods=['GET'])
+def liveness_check():
+    """Liveness probe: the process is up and serving requests"""
+    return jsonify({'status': 'alive'})
+
+@app.route('/api/health/ready', methods=['GET'])
+def readiness_check():
+    """Readiness probe: 503 until the model is loaded and warmed up"""
+    payload, status = build_readiness_payload()
+    return jsonify(payload), status
 
 @app.route('/api/model-info', methods=['GET'])
 def get_model_info():
     """Get information about the loaded model"""
-    try:
-        model_info = fraud_model.get_model_info()
-        return jsonify({
-            'success': True,
-            'model_info': model_info,
-            'stats': app_stats
-        })
-    except Exception as e:
-        logger.error(f"Error getting model info: {e}")
-        return jsonify({
-            'success': False,
-            'error': str(e)
-        }), 500
+    payload, status = build_model_info_payload()
+    return jsonify(payload), status
 
 @app.route('/api/predict', methods=['POST'])
 def predict_fraud():
@@ -114,15 +277,184 @@ def predict_fraud():
         "step": 150
     }
     """
+    if not request.is_json:
+        return jsonify({
+            'success': False,
+            'error': 'Request must be JSON'
+        }), 400
+    
+    payload, status = process_prediction(
+        request.get_json(), request.args,
+        deadline_header=request.headers.get(Config.DEADLINE_HEADER),
+        received_at=g.get('received_at')
+    )
+    return jsonify(payload), status
+
+@app.route('/api/batch-predict', methods=['POST'])
+def batch_predict():
+    """Batch prediction endpoint for multiple transactions"""
+    if not request.is_json:
+        return jsonify({
+            'success': False,
+            'error': 'Request must be JSON'
+        }), 400
+    
+    payload, status = process_batch_prediction(
+        request.get_json(), request.args,
+        deadline_header=request.headers.get(Config.DEADLINE_HEADER),
+        received_at=g.get('received_at')
+    )
+    return jsonify(payload), status
+
+@app.route('/api/explain', methods=['POST'])
+def explain_predictions():
+    """
+    Feature attributions for one or more transactions
+    
+    Expected JSON payload:
+    {
+        "transactions": [{...}, ...],   (or a single transaction object)
+        "method": "integrated_gradients",  (or "gradient_x_input")
+        "steps": 32
+    }
+    """
+    if not request.is_json:
+        return jsonify({
+            'success': False,
+            'error': 'Request must be JSON'
+        }), 400
+    
+    payload, status = process_explanation(request.get_json())
+    return jsonify(payload), status
+
+@app.route('/api/similar-cases', methods=['POST'])
+def find_similar_cases():
+    """Nearest known fraud cases for one or more transactions"""
+    if not request.is_json:
+        return jsonify({
+            'success': False,
+            'error': 'Request must be JSON'
+        }), 400
+    
+    payload, status = process_similar_cases(request.get_json())
+    return jsonify(payload), status
+
+@app.route('/api/predictions', methods=['GET'])
+def list_predictions():
+    """Query stored predictions, newest first, with keyset pagination"""
+    payload, status = query_predictions(request.args)
+    return jsonify(payload), status
+
+@app.route('/api/shadow', methods=['GET'])
+def get_shadow_report():
+    """Champion/challenger agreement report"""
+    payload, status = build_shadow_payload()
+    return jsonify(payload), status
+
+@app.route('/api/rings', methods=['GET'])
+def list_rings():
+    """Highest-risk fraud rings, or the ring containing ?account="""
+    payload, status = build_rings_payload(request.args)
+    return jsonify(payload), status
+
+@app.route('/api/admin/profile/start', methods=['POST'])
+def start_profile():
+    """Start a bounded sampling-profiler session (admin token required)"""
+    payload, status = process_profile_start(
+        request.get_json(silent=True), request.headers.get(Config.ADMIN_TOKEN_HEADER)
+    )
+    return jsonify(payload), status
+
+@app.route('/api/admin/profile', methods=['GET'])
+def get_profile():
+    """Profiler results as collapsed stacks or a top-N table (admin token required)"""
+    payload, status = build_profile_payload(request.args, request.headers.get(Config.ADMIN_TOKEN_HEADER))
+    return jsonify(payload), status
+
+@app.route('/api/stats', methods=['GET'])
+def get_statistics():
+    """Get application statistics"""
+    return jsonify(build_statistics_payload())
+
+# ================================
+# REQUEST HANDLERS
+# ================================
+# Framework-independent route bodies. Each returns a JSON-serialisable
+# payload (and an HTTP status where it can fail) so the Flask routes above
+# and alternative entry points such as asgi_app.py serve identical responses.
+
+def build_health_payload():
+    """Build the /api/health response body"""
+    uptime = (datetime.now() - app_stats['start_time']).total_seconds()
+    
+    return {
+        'status': 'healthy',
+        'live': True,
+        'ready': app_stats['ready'],
+        'model_loaded': app_stats['model_loaded'],
+        'warmup_seconds': app_stats['warmup_seconds'],
+        'uptime_seconds': uptime,
+        'total_predictions': app_stats['total_predictions'],
+        'fraud_detected': app_stats['fraud_detected'],
+        'version': '1.0.0'
+    }
+
+def build_readiness_payload():
+    """Build the /api/health/ready response body and status"""
+    ensure_initializing()
+    ready = app_stats['ready']
+    return {
+        'status': 'ready' if ready else 'starting',
+        'ready': ready,
+        'model_loaded': app_stats['model_loaded'],
+        'warmup_seconds': app_stats['warmup_seconds']
+    }, 200 if ready else 503
+
+def build_model_info_payload():
+    """Build the /api/model-info response body"""
+    try:
+        model_info = fraud_model.get_model_info()
+        return {
+            'success': True,
+            'model_info': model_info,
+            'student_model_info': student_model.get_model_info() if student_model is not None else None,
+            'similar_cases': similar_cases.info() if similar_cases is not None else None,
+            'stats': app_stats
+        }, 200
+    except Exception as e:
+        logger.error(f"Error getting model info: {e}")
+        return {
+            'success': False,
+            'error': str(e)
+        }, 500
+
+def process_prediction(transaction_data, params=None, deadline_header=None, received_at=None):
+    """
+    Validate and score a single transaction for /api/predict
+    
+    Args:
+        transaction_data (dict): Transaction JSON body (may carry deadline_ms)
+        params (dict): Query parameters (compact / fields / explain)
+        deadline_header (str): Value of the X-Deadline-Ms header, if any
+        received_at (float): time.monotonic() when the request arrived
+    """
+    received_at = received_at or time.monotonic()
     try:
-        # Validate request
-        if not request.is_json:
-            return jsonify({
+        if not isinstance(transaction_data, dict):
+            return {
                 'success': False,
-                'error': 'Request must be JSON'
-            }), 400
+                'error': 'Request body must be a JSON object'
+            }, 400
         
-        transaction_data = request.get_json()
+        options, error = parse_response_options(params)
+        if error:
+            return {'success': False, 'error': error}, 400
+        
+        deadline_ms, error = DeadlineController.parse_deadline(
+            deadline_header, transaction_data.pop('deadline_ms', None)
+        )
+        if error:
+            return {'success': False, 'error': error}, 400
         
         # Validate required fields
         required_fields = [
@@ -132,81 +464,132 @@ def predict_fraud():
         
         missing_fields = [field for field in required_fields if field not in transaction_data]
         if missing_fields:
-            return jsonify({
+            return {
                 'success': False,
                 'error': f'Missing required fields: {missing_fields}'
-            }), 400
+            }, 400
         
         # Validate data types and ranges
         validation_result = validate_transaction_data(transaction_data)
         if not validation_result['valid']:
-            return jsonify({
+            return {
                 'success': False,
                 'error': validation_result['error']
-            }), 400
+            }, 400
         
         # Make prediction
         logger.info(f"Processing fraud prediction for transaction: {transaction_data['type']} ${transaction_data['amount']}")
         
-        prediction_result = fraud_model.predict_fraud_probability(transaction_data)
+        if deadline_ms is not None:
+            deadlines.start()
+        prediction_result = score_transaction(transaction_data, deadline_ms, received_at)
         
         # Update statistics
-        app_stats['total_predictions'] += 1
-        if prediction_result['classification'] == 'FRAUD':
-            app_stats['fraud_detected'] += 1
-        elif prediction_result['classification'] == 'SUSPICIOUS':
-            app_stats['high_risk_detected'] += 1
+        transaction_id = record_prediction(prediction_result)
         
         # Add transaction metadata
         response = {
             'success': True,
-            'transaction_id': f"TXN_{app_stats['total_predictions']:06d}",
+            'transaction_id': transaction_id,
             'timestamp': datetime.now().isoformat(),
             'prediction': prediction_result,
             'model_info': {
                 'version': '1.0.0',
-                'model_type': fraud_model.get_model_info().get('model_type', 'Unknown')
+                'model_type': fraud_model.model_type
             }
         }
+        ring = observe_ring(transaction_data)
+        if ring is not None:
+            response['ring'] = ring
+        if options['compact']:
+            response['prediction'] = select_fields(prediction_result, options['fields'])
+            response['model_info'] = build_compact_model_info()
+        
+        # Optional inline explanation for flagged transactions
+        if options['explain'] and prediction_result['classification'] in ('FRAUD', 'SUSPICIOUS') \
+                and prediction_result.get('model_used') == 'Deep Neural Network':
+            explanation = fraud_model.explain(
+                [transaction_data], steps=Config.EXPLAIN_DEFAULT_STEPS, top_k=Config.EXPLAIN_TOP_K
+            )[0]
+            response['explanation'] = {
+                'method': explanation['method'],
+                'top_features': explanation['top_features']
+            }
+        
+        # Optional nearest known fraud cases for flagged transactions
+        case_index = get_similar_cases() if options['similar'] else None
+        if case_index is not None and prediction_result['classification'] in ('FRAUD', 'SUSPICIOUS'):
+            response['similar_cases'] = case_index.query(
+                fraud_model, fraud_model.build_feature_matrix([transaction_data]), Config.SIMILAR_CASES_K
+            )[0]
+        
+        if deadline_ms is not None:
+            response['degraded'] = prediction_result.get('degraded', False)
+            response['deadline_ms'] = deadline_ms
+            deadlines.record_outcome(deadline_ms, (time.monotonic() - received_at) * 1000,
+                                     degraded_rows=int(response['degraded']))
         
         # Log the prediction
         log_prediction(transaction_data, prediction_result, response['transaction_id'])
         
-        return jsonify(response)
+        return response, 200
         
     except Exception as e:
         logger.error(f"Error in fraud prediction: {e}")
-        return jsonify({
+        return {
             'success': False,
             'error': f'Prediction failed: {str(e)}'
-        }), 500
+        }, 500
 
-@app.route('/api/batch-predict', methods=['POST'])
-def batch_predict():
-    """Batch prediction endpoint for multiple transactions"""
+def process_batch_prediction(data, params=None, deadline_header=None, received_at=None):
+    """
+    Validate and score a list of transactions for /api/batch-predict
+    
+    Args:
+        data (dict): JSON body with 'transactions' and optional compact /
+            fields / deadline_ms
+        params (dict): Query parameters (compact / fields)
+        deadline_header (str): Value of the X-Deadline-Ms header, if any
+        received_at (float): time.monotonic() when the request arrived
+    """
+    received_at = received_at or time.monotonic()
     try:
-        if not request.is_json:
-            return jsonify({
-                'success': False,
-                'error': 'Request must be JSON'
-            }), 400
-        
-        data = request.get_json()
+        data = data if isinstance(data, dict) else {}
         transactions = data.get('transactions', [])
         
+        # Response options may come from the query string or the body
+        merged_params = {key: data[key] for key in ('compact', 'fields', 'similar') if key in data}
+        merged_params.update(params or {})
+        options, error = parse_response_options(merged_params)
+        if error:
+            return {'success': False, 'error': error}, 400
+        
+        deadline_ms, error = DeadlineController.parse_deadline(deadline_header, data.get('deadline_ms'))
+        if error:
+            return {'success': False, 'error': error}, 400
+        
         if not transactions:
-            return jsonify({
+            return {
                 'success': False,
                 'error': 'No transactions provided'
-            }), 400
+            }, 400
         
         if len(transactions) > 100:  # Limit batch size
-            return jsonify({
+            return {
                 'success': False,
                 'error': 'Batch size limited to 100 transactions'
-            }), 400
+            }, 400
+        
+        # Counted only once the request is valid, so rejected batches stay
+        # out of the deadline statistics
+        if deadline_ms is not None:
+            deadlines.start()
         
         results = []
+        degraded_count = 0
+        # Flagged rows get their similar cases in one batched index query
+        case_index = get_similar_cases() if options['similar'] else None
+        flagged_rows = [] if case_index is not None else None
         
         for i, transaction in enumerate(transactions):
             try:
@@ -220,20 +603,31 @@ def batch_predict():
                     })
                     continue
                 
-                # Make prediction
-                prediction_result = fraud_model.predict_fraud_probability(transaction)
+                # Make prediction (rows that can no longer meet the deadline
+                # are scored by the rule-based fallback)
+                prediction_result = score_transaction(transaction, deadline_ms, received_at)
                 
                 # Update stats
-                app_stats['total_predictions'] += 1
-                if prediction_result['classification'] == 'FRAUD':
-                    app_stats['fraud_detected'] += 1
+                transaction_id = record_prediction(prediction_result, count_high_risk=False)
+                persist_prediction(transaction, prediction_result, transaction_id)
                 
-                results.append({
+                flagged = prediction_result['classification'] in ('FRAUD', 'SUSPICIOUS')
+                degraded_count += bool(prediction_result.get('degraded'))
+                if options['compact']:
+                    prediction_result = select_fields(prediction_result, options['fields'])
+                
+                result = {
                     'transaction_index': i,
                     'success': True,
-                    'transaction_id': f"TXN_{app_stats['total_predictions']:06d}",
+                    'transaction_id': transaction_id,
                     'prediction': prediction_result
-                })
+                }
+                if flagged_rows is not None and flagged:
+                    flagged_rows.append((result, transaction))
+                ring = observe_ring(transaction)
+                if ring is not None:
+                    result['ring'] = ring
+                results.append(result)
                 
             except Exception as e:
                 results.append({
@@ -242,30 +636,388 @@ def batch_predict():
                     'error': str(e)
                 })
         
-        return jsonify({
+        if flagged_rows:
+            neighbours = case_index.query(
+                fraud_model, fraud_model.build_feature_matrix([transaction for _, transaction in flagged_rows]),
+                Config.SIMILAR_CASES_K
+            )
+            for (result, _), cases in zip(flagged_rows, neighbours):
+                result['similar_cases'] = cases
+        
+        response = {
             'success': True,
             'batch_size': len(transactions),
             'processed': len(results),
             'results': results
-        })
+        }
+        if deadline_ms is not None:
+            response['deadline_ms'] = deadline_ms
+            response['degraded_count'] = degraded_count
+            deadlines.record_outcome(deadline_ms, (time.monotonic() - received_at) * 1000,
+                                     degraded_rows=degraded_count)
+        if options['compact']:
+            # Static metadata is sent once instead of on every row
+            response['model_info'] = build_compact_model_info()
+            response['fields'] = options['fields']
+        return response, 200
         
     except Exception as e:
         logger.error(f"Error in batch prediction: {e}")
-        return jsonify({
+        return {
             'success': False,
             'error': str(e)
-        }), 500
+        }, 500
 
-@app.route('/api/stats', methods=['GET'])
-def get_statistics():
-    """Get application statistics"""
+def process_explanation(data):
+    """Validate transactions and compute feature attributions for /api/explain"""
+    try:
+        if isinstance(data, dict) and 'transactions' in data:
+            transactions = data['transactions']
+        else:
+            transactions = [data]
+            data = {}
+        
+        if not isinstance(transactions, list) or not transactions:
+            return {
+                'success': False,
+                'error': 'No transactions provided'
+            }, 400
+        
+        if len(transactions) > Config.EXPLAIN_MAX_BATCH:
+            return {
+                'success': False,
+                'error': f'Batch size limited to {Config.EXPLAIN_MAX_BATCH} transactions'
+            }, 400
+        
+        method = data.get('method', 'integrated_gradients')
+        if method not in ATTRIBUTION_METHODS:
+            return {
+                'success': False,
+                'error': f'Invalid method. Must be one of: {ATTRIBUTION_METHODS}'
+            }, 400
+        try:
+            steps = int(data.get('steps', Config.EXPLAIN_DEFAULT_STEPS))
+            top_k = int(data.get('top_k', Config.EXPLAIN_TOP_K))
+        except (ValueError, TypeError):
+            return {
+                'success': False,
+                'error': 'steps and top_k must be integers'
+            }, 400
+        # Cap the work a single request can ask for
+        steps = max(1, min(steps, Config.EXPLAIN_MAX_STEPS))
+        
+        results = [None] * len(transactions)
+        valid_indices = []
+        for i, transaction in enumerate(transactions):
+            validation_result = validate_transaction_data(transaction) if isinstance(transaction, dict) \
+                else {'valid': False, 'error': 'Transaction must be a JSON object'}
+            if validation_result['valid']:
+                valid_indices.append(i)
+            else:
+                results[i] = {
+                    'transaction_index': i,
+                    'success': False,
+                    'error': validation_result['error']
+                }
+        
+        if valid_indices:
+            explanations = fraud_model.explain(
+                [transactions[i] for i in valid_indices], method=method, steps=steps, top_k=top_k
+            )
+            for i, explanation in zip(valid_indices, explanations):
+                results[i] = dict(transaction_index=i, success=True, **explanation)
+        
+        return {
+            'success': True,
+            'method': method,
+            'steps': steps if method == 'integrated_gradients' else None,
+            'baseline': 'training mean (scaled zeros)',
+            'results': results
+        }, 200
+        
+    except ValueError as e:
+        return {
+            'success': False,
+            'error': str(e)
+        }, 400
+    except RuntimeError as e:
+        return {
+            'success': False,
+            'error': str(e)
+        }, 503
+    except Exception as e:
+        logger.error(f"Error computing explanations: {e}")
+        return {
+            'success': False,
+            'error': str(e)
+        }, 500
+
+def process_similar_cases(data):
+    """
+    Validate transactions and look up their nearest known fraud cases for /api/similar-cases
+    
+    Args:
+        data (dict): A transaction, or {'transactions': [...], 'k': n}
+    """
+    case_index = get_similar_cases()
+    if case_index is None:
+        return {
+            'success': False,
+            'error': 'Similar-case index is not loaded (build it with python -m models.similar_cases)'
+        }, 503
+    try:
+        if isinstance(data, dict) and 'transactions' in data:
+            transactions = data['transactions']
+        else:
+            transactions = [data]
+            data = {}
+        
+        if not isinstance(transactions, list) or not transactions:
+            return {
+                'success': False,
+                'error': 'No transactions provided'
+            }, 400
+        
+        if len(transactions) > Config.SIMILAR_CASES_MAX_BATCH:
+            return {
+                'success': False,
+                'error': f'Batch size limited to {Config.SIMILAR_CASES_MAX_BATCH} transactions'
+            }, 400
+        
+        try:
+            k = int(data.get('k', Config.SIMILAR_CASES_K))
+        except (ValueError, TypeError):
+            return {
+                'success': False,
+                'error': 'k must be an integer'
+            }, 400
+        k = max(1, min(k, Config.SIMILAR_CASES_MAX_K))
+        
+        results = [None] * len(transactions)
+        valid_indices = []
+        for i, transaction in enumerate(transactions):
+            validation_result = validate_transaction_data(transaction) if isinstance(transaction, dict) \
+                else {'valid': False, 'error': 'Transaction must be a JSON object'}
+            if validation_result['valid']:
+                valid_indices.append(i)
+            else:
+                results[i] = {
+                    'transaction_index': i,
+                    'success': False,
+                    'error': validation_result['error']
+                }
+        
+        if valid_indices:
+            neighbours = case_index.query(
+                fraud_model, fraud_model.build_feature_matrix([transactions[i] for i in valid_indices]), k
+            )
+            for i, cases in zip(valid_indices, neighbours):
+                results[i] = {'transaction_index': i, 'success': True, 'similar_cases': cases}
+        
+        return {
+            'success': True,
+            'k': k,
+            'space': case_index.space,
+            'results': results
+        }, 200
+        
+    except Exception as e:
+        logger.error(f"Error finding similar cases: {e}")
+        return {
+            'success': False,
+            'error': str(e)
+        }, 500
+
+def query_predictions(params):
+    """
+    Read a page of stored predictions for /api/predictions
+    
+    Args:
+        params (dict): Query parameters - limit, cursor (next_cursor of the
+            previous page), classification, type, transaction_id, and
+            since / until (epoch seconds or ISO-8601)
+    """
+    if prediction_store is None:
+        return {
+            'success': False,
+            'error': 'Prediction store is not enabled (set PREDICTION_STORE_ENABLED=1)'
+        }, 503
+    
+    params = params or {}
+    try:
+        limit = int(params.get('limit', Config.PREDICTIONS_PAGE_SIZE))
+        cursor = params.get('cursor')
+        cursor = int(cursor) if cursor not in (None, '') else None
+        since = parse_timestamp(params.get('since'))
+        until = parse_timestamp(params.get('until'))
+    except (TypeError, ValueError):
+        return {
+            'success': False,
+            'error': 'limit and cursor must be integers; since and until must be epoch seconds or ISO-8601'
+        }, 400
+    limit = max(1, min(limit, Config.PREDICTIONS_MAX_PAGE_SIZE))
+    
+    try:
+        predictions, next_cursor = prediction_store.query(
+            limit=limit,
+            before_id=cursor,
+            classification=params.get('classification'),
+            transaction_type=params.get('type'),
+            transaction_id=params.get('transaction_id'),
+            since=since,
+            until=until
+        )
+    except Exception as e:
+        logger.error(f"Error querying predictions: {e}")
+        return {
+            'success': False,
+            'error': 'Prediction query failed'
+        }, 500
+    
+    return {
+        'success': True,
+        'count': len(predictions),
+        'next_cursor': next_cursor,
+        'predictions': predictions
+    }, 200
+
+def build_shadow_payload():
+    """Build the /api/shadow response body"""
+    if shadow_scorer is None:
+        return {
+            'success': False,
+            'error': 'Shadow scoring is not enabled (set SHADOW_MODEL_PATH)'
+        }, 503
+    return {
+        'success': True,
+        'shadow': shadow_scorer.stats()
+    }, 200
+
+def build_rings_payload(params):
+    """
+    Build the /api/rings response body and status
+    
+    Args:
+        params (dict): account (return that account's ring and members), or
+            limit / min_accounts for the top rings by transfer -> cash-out
+            chains and size
+    """
+    if ring_graph is None:
+        return {
+            'success': False,
+            'error': 'Fraud-ring detection is not enabled'
+        }, 503
+    
+    params = params or {}
+    account = params.get('account')
+    if account:
+        ring = ring_graph.ring(account)
+        if ring is None:
+            return {
+                'success': False,
+                'error': f'No live transfers for account {account}'
+            }, 404
+        return {'success': True, 'ring': ring}, 200
+    
+    try:
+        limit = int(params.get('limit', Config.RINGS_PAGE_SIZE))
+        min_accounts = params.get('min_accounts')
+        min_accounts = int(min_accounts) if min_accounts not in (None, '') else None
+    except (TypeError, ValueError):
+        return {
+            'success': False,
+            'error': 'limit and min_accounts must be integers'
+        }, 400
+    limit = max(1, min(limit, Config.RINGS_MAX_LIMIT))
+    rings = ring_graph.top_rings(limit, min_accounts)
+    return {
+        'success': True,
+        'count': len(rings),
+        'window_steps': ring_graph.window_steps,
+        'clock_step': ring_graph.clock,
+        'rings': rings
+    }, 200
+
+def check_admin_token(token):
+    """
+    Guard for /api/admin/* endpoints
+    
+    Returns:
+        tuple or None: (payload, status) rejecting the request, or None if
+            the token matches. Without Config.ADMIN_TOKEN the endpoints
+            answer 404 as if they did not exist.
+    """
+    if not Config.ADMIN_TOKEN:
+        return {'success': False, 'error': 'Endpoint not found'}, 404
+    if not token or not hmac.compare_digest(token.encode('utf-8'), Config.ADMIN_TOKEN.encode('utf-8')):
+        return {'success': False, 'error': 'Invalid admin token'}, 403
+    return None
+
+def process_profile_start(data, token):
+    """
+    Start a profiling session for /api/admin/profile/start
+    
+    Args:
+        data (dict): Optional seconds, interval_ms and include_idle
+        token (str): Value of the admin token header
+    """
+    rejection = check_admin_token(token)
+    if rejection:
+        return rejection
+    
+    data = data if isinstance(data, dict) else {}
+    try:
+        seconds = float(data.get('seconds', Config.PROFILER_DEFAULT_SECONDS))
+        interval_ms = float(data.get('interval_ms', Config.PROFILER_DEFAULT_INTERVAL_MS))
+    except (TypeError, ValueError):
+        return {'success': False, 'error': 'seconds and interval_ms must be numbers'}, 400
+    if seconds <= 0 or interval_ms <= 0:
+        return {'success': False, 'error': 'seconds and interval_ms must be positive'}, 400
+    
+    session = profiler.start(seconds, interval_ms, include_idle=bool(data.get('include_idle', False)))
+    if session is None:
+        return {'success': False, 'error': 'A profiling session is already running'}, 409
+    logger.info(f"Profiling started for {session['seconds']}s at {session['interval_ms']}ms intervals")
+    return {'success': True, 'session': session}, 202
+
+def build_profile_payload(params, token):
+    """
+    Build the /api/admin/profile response body and status
+    
+    Args:
+        params (dict): format ('top' or 'collapsed') and limit (top only)
+        token (str): Value of the admin token header
+    """
+    rejection = check_admin_token(token)
+    if rejection:
+        return rejection
+    
+    params = params or {}
+    output_format = params.get('format', 'top')
+    if output_format not in ('top', 'collapsed'):
+        return {'success': False, 'error': "format must be 'top' or 'collapsed'"}, 400
+    
+    response = {'success': True}
+    response.update(profiler.stats())
+    if output_format == 'collapsed':
+        response['collapsed'] = profiler.collapsed()
+    else:
+        try:
+            limit = int(params.get('limit', Config.PROFILER_TOP_N))
+        except (TypeError, ValueError):
+            return {'success': False, 'error': 'limit must be an integer'}, 400
+        response['top'] = profiler.top(max(1, limit))
+    return response, 200
+
+def build_statistics_payload():
+    """Build the /api/stats response body"""
     uptime = (datetime.now() - app_stats['start_time']).total_seconds()
     
     # Calculate rates
     fraud_rate = (app_stats['fraud_detected'] / max(app_stats['total_predictions'], 1)) * 100
     predictions_per_hour = (app_stats['total_predictions'] / max(uptime / 3600, 1))
     
-    return jsonify({
+    return {
         'success': True,
         'statistics': {
             'total_predictions': app_stats['total_predictions'],
@@ -276,8 +1028,12 @@ def get_statistics():
             'uptime_hours': round(uptime / 3600, 2),
             'model_loaded': app_stats['model_loaded'],
             'start_time': app_stats['start_time'].isoformat()
-        }
-    })
+        },
+        'admission': admission.stats(),
+        'deadlines': deadlines.stats(),
+        'prediction_store': prediction_store.stats() if prediction_store is not None else None,
+        'rings': ring_graph.stats() if ring_graph is not None else None
+    }
 
 # ================================
 # UTILITY FUNCTIONS
@@ -344,6 +1100,151 @@ def validate_transaction_data(data):
             'error': f'Validation error: {str(e)}'
         }
 
+def get_client_key(api_key, remote_addr, forwarded_for=None):
+    """Identify the client for rate limiting: API key if given, else IP"""
+    if api_key:
+        return f'key:{api_key}'
+    if Config.TRUST_PROXY_HEADERS and forwarded_for:
+        return f"ip:{forwarded_for.split(',')[0].strip()}"
+    return f'ip:{remote_addr or "unknown"}'
+
+def precheck_admission(path, client_key):
+    """
+    Admission decision that can be made before the request body is read
+    
+    Single predictions cost one token, so they are admitted or rejected
+    here outright. Batch endpoints are only rejected here, when even a
+    minimal request would be; otherwise None is returned and the caller
+    charges the real cost with admit_batch once the body is parsed.
+    
+    Returns:
+        AdmissionDecision or None: admitted requests must later call admission.release()
+    """
+    if RATE_LIMITED_ENDPOINTS.get(path) != 'batch':
+        return admission.admit(client_key)
+    if admission.should_precheck_reject(client_key):
+        return admission.admit(client_key)
+    return None
+
+def admit_batch(client_key, body):
+    """Admit a parsed batch request at its per-transaction token cost"""
+    transactions = body.get('transactions') if isinstance(body, dict) else None
+    n_transactions = len(transactions) if isinstance(transactions, list) else 1
+    return admission.admit(client_key, admission.batch_cost(n_transactions))
+
+def admit_request(path, client_key, get_body):
+    """
+    Run admission control for a request to a rate-limited endpoint
+    
+    Batch bodies are only parsed (via get_body) when precheck_admission
+    shows the request could be admitted at all.
+    
+    Returns:
+        AdmissionDecision: admitted requests must later call admission.release()
+    """
+    decision = precheck_admission(path, client_key)
+    if decision is not None:
+        return decision
+    return admit_batch(client_key, get_body())
+
+# Per-row prediction fields selectable in compact mode
+PREDICTION_FIELDS = [
+    'probability', 'classification', 'risk_level', 'confidence',
+    'model_used', 'message', 'features_used', 'decided_by'
+]
+DEFAULT_COMPACT_FIELDS = ['probability', 'classification', 'risk_level', 'confidence', 'model_used']
+
+def score_transaction(transaction_data, deadline_ms=None, received_at=None):
+    """
+    Score one validated transaction, honouring an optional deadline
+    
+    If the time already spent plus the expected queueing and model time
+    would exceed deadline_ms, the DNN is skipped and the rule-based
+    fallback answers immediately, marked as degraded.
+    """
+    # Rows the cascade rule stage decides are answered here, screened once,
+    # and never need the deadline fallback
+    screened = fraud_model.cascade is not None and fraud_model.is_loaded
+    if screened:
+        cascade_result = fraud_model.cascade.screen(transaction_data)
+        if cascade_result is not None:
+            if deadline_ms is not None:
+                cascade_result['degraded'] = False
+            return cascade_result
+    if deadline_ms is not None and fraud_model.is_loaded:
+        elapsed_ms = (time.monotonic() - (received_at or time.monotonic())) * 1000
+        fallback, expected_ms = deadlines.should_fallback(deadline_ms, elapsed_ms, admission.in_flight)
+        if fallback:
+            if student_model is not None and student_model.is_loaded:
+                prediction_result = student_model.predict_fraud_probability(transaction_data)
+                prediction_result['model_used'] = 'Distilled Student'
+            else:
+                prediction_result = fraud_model._fallback_prediction(transaction_data)
+            prediction_result['degraded'] = True
+            prediction_result['degraded_reason'] = 'deadline'
+            prediction_result['expected_model_ms'] = round(expected_ms, 2)
+            return prediction_result
+    
+    started = time.monotonic()
+    prediction_result = fraud_model.predict_fraud_probability(transaction_data, screened=screened)
+    if prediction_result.get('model_used') == 'Deep Neural Network':
+        deadlines.record_model_latency((time.monotonic() - started) * 1000)
+    if deadline_ms is not None:
+        prediction_result['degraded'] = False
+    return prediction_result
+
+def parse_response_options(params):
+    """
+    Parse the compact / fields / explain / similar response options
+    
+    compact=1 drops static metadata (such as features_used) from every
+    prediction and reports it once in model_info. fields=a,b selects the
+    per-row prediction fields and implies compact mode. explain=1 adds
+    feature attributions and similar=1 the nearest known fraud cases to
+    FRAUD/SUSPICIOUS predictions.
+    
+    Returns:
+        tuple: ({'compact': bool, 'explain': bool, 'similar': bool, 'fields': list},
+            error message or None)
+    """
+    params = params or {}
+    compact = str(params.get('compact', '')).lower() in ('1', 'true', 'yes')
+    explain = str(params.get('explain', '')).lower() in ('1', 'true', 'yes')
+    similar = str(params.get('similar', '')).lower() in ('1', 'true', 'yes')
+    fields = params.get('fields')
+    
+    if fields is None or fields == '':
+        return {'compact': compact, 'explain': explain, 'similar': similar, 'fields': DEFAULT_COMPACT_FIELDS}, None
+    
+    if isinstance(fields, str):
+        fields = [field.strip() for field in fields.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in PREDICTION_FIELDS]
+    if unknown or not fields:
+        return None, f'Invalid fields: {unknown}. Must be a subset of: {PREDICTION_FIELDS}'
+    return {'compact': True, 'explain': explain, 'similar': similar, 'fields': list(fields)}, None
+
+def select_fields(prediction_result, fields):
+    """Keep only the requested fields of a prediction result"""
+    return {field: prediction_result[field] for field in fields if field in prediction_result}
+
+def build_compact_model_info():
+    """Model metadata sent once per compact response"""
+    return {
+        'version': '1.0.0',
+        'model_type': fraud_model.model_type,
+        'features': fraud_model.feature_names
+    }
+
+def record_prediction(prediction_result, count_high_risk=True):
+    """Update prediction counters and return the new transaction id"""
+    with stats_lock:
+        app_stats['total_predictions'] += 1
+        if prediction_result['classification'] == 'FRAUD':
+            app_stats['fraud_detected'] += 1
+        elif count_high_risk and prediction_result['classification'] == 'SUSPICIOUS':
+            app_stats['high_risk_detected'] += 1
+        return f"TXN_{app_stats['total_predictions']:06d}"
+
 def log_prediction(transaction_data, prediction_result, transaction_id):
     """Log prediction for audit purposes"""
     try:
@@ -360,6 +1261,43 @@ def log_prediction(transaction_data, prediction_result, transaction_id):
         
     except Exception as e:
         logger.error(f"Error logging prediction: {e}")
+    
+    persist_prediction(transaction_data, prediction_result, transaction_id)
+
+def persist_prediction(transaction_data, prediction_result, transaction_id):
+    """
+    Queue a scored transaction for the prediction store and, if sampled,
+    for challenger scoring (both non-blocking)
+    """
+    if prediction_store is not None:
+        try:
+            prediction_store.record(transaction_id, transaction_data, prediction_result)
+        except Exception as e:
+            logger.error(f"Error storing prediction: {e}")
+    if shadow_scorer is not None:
+        try:
+            shadow_scorer.submit(transaction_id, transaction_data, prediction_result)
+        except Exception as e:
+            logger.error(f"Error queueing shadow prediction: {e}")
+
+def observe_ring(transaction_data):
+    """Add a scored transaction to the ring graph and return its ring features (or None)"""
+    if ring_graph is None:
+        return None
+    try:
+        return ring_graph.observe(transaction_data)
+    except Exception as e:
+        logger.error(f"Error updating fraud-ring graph: {e}")
+        return None
+
+def parse_timestamp(value):
+    """Parse epoch seconds or an ISO-8601 string into epoch seconds (None passes through)"""
+    if value in (None, ''):
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
 
 # ================================
 # ERROR HANDLERS
@@ -449,17 +1387,14 @@ if __name__ == '__main__':
     # Create necessary directories
     os.makedirs('logs', exist_ok=True)
     
-    # Initialize model with your trained TensorFlow model
-    try:
-        print("🔄 Loading TensorFlow fraud detection model...")
-        fraud_model.load_model()
-        app_stats['model_loaded'] = True
+    # Initialize (load + warm up) the trained TensorFlow model
+    print("🔄 Loading TensorFlow fraud detection model...")
+    initialize_model()
+    if app_stats['model_loaded']:
         print("✅ TensorFlow model loaded successfully!")
-        print(f"🧠 Model type: {fraud_model.get_model_info().get('model_type', 'Unknown')}")
-    except Exception as e:
-        print(f"❌ Error loading TensorFlow model: {e}")
+    else:
         print("🔄 Will use fallback prediction method")
-        app_stats['model_loaded'] = False
+    print(f"🧠 Model type: {fraud_model.model_type}")
     
     # Detect environment and run appropriately
     if os.environ.get('NETLIFY') or os.environ.get('AWS_LAMBDA_FUNCTION_NAME'):
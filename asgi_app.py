@@ -0,0 +1,432 @@
+#!/usr/bin/env python3
+"""
+Fraud Detection ASGI Application
+Asyncio entry point serving the same API as app.py
+
+Connection handling and request/response I/O run on the event loop, while
+preprocessing and model.predict are handed to a bounded thread pool. A single
+worker can therefore hold thousands of idle keep-alive connections without
+spawning a thread per connection.
+
+Run with:
+    python asgi_app.py
+    uvicorn asgi_app:application --port 5000
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+from urllib.parse import parse_qsl
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from werkzeug.http import http_date
+
+# Add project root to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config import Config
+from app import (
+    initialize_model,
+    build_health_payload,
+    build_readiness_payload,
+    build_model_info_payload,
+    build_statistics_payload,
+    process_prediction,
+    process_batch_prediction,
+    process_explanation,
+    process_similar_cases,
+    query_predictions,
+    build_shadow_payload,
+    build_rings_payload,
+    build_profile_payload,
+    process_profile_start,
+    admission,
+    precheck_admission,
+    admit_batch,
+    get_client_key,
+    RATE_LIMITED_ENDPOINTS,
+)
+
+logger = logging.getLogger(__name__)
+
+# Preprocessing and TensorFlow inference are CPU bound, so they never run on
+# the event loop. The semaphore caps how many jobs may be queued or running
+# in the pool at once; further requests wait on the loop, not in the pool.
+inference_executor = ThreadPoolExecutor(
+    max_workers=Config.ASYNC_INFERENCE_WORKERS,
+    thread_name_prefix='inference'
+)
+_inference_slots = None
+
+CORS_HEADERS = [
+    (b'access-control-allow-origin', b'*'),
+]
+
+
+def _get_inference_slots():
+    """Create the pending-job semaphore on the running loop"""
+    global _inference_slots
+    if _inference_slots is None:
+        _inference_slots = asyncio.Semaphore(Config.ASYNC_MAX_PENDING_INFERENCE)
+    return _inference_slots
+
+
+async def run_inference(func, *args):
+    """Run a blocking prediction handler on the bounded inference pool"""
+    async with _get_inference_slots():
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(inference_executor, func, *args)
+
+
+def _json_default(value):
+    """Serialise values the same way Flask's jsonify does"""
+    if isinstance(value, datetime):
+        return http_date(value)
+    if hasattr(value, 'tolist'):  # numpy scalars / arrays
+        return value.tolist()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+async def send_json(send, payload, status=200):
+    """Send a complete JSON response"""
+    body = json.dumps(payload, default=_json_default, separators=(',', ':')).encode('utf-8')
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(body)).encode('ascii')),
+        ] + CORS_HEADERS
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def read_body(receive):
+    """Read the full request body, enforcing ASYNC_MAX_BODY_BYTES"""
+    chunks = []
+    size = 0
+    more_body = True
+    while more_body:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return None
+        chunk = message.get('body', b'')
+        size += len(chunk)
+        if size > Config.ASYNC_MAX_BODY_BYTES:
+            raise ValueError('Request body too large')
+        chunks.append(chunk)
+        more_body = message.get('more_body', False)
+    return b''.join(chunks)
+
+
+def _is_json(scope):
+    """Mirror Flask's request.is_json check on the content-type header"""
+    for name, value in scope.get('headers', []):
+        if name == b'content-type':
+            mimetype = value.decode('latin-1').split(';', 1)[0].strip().lower()
+            return mimetype == 'application/json' or (
+                mimetype.startswith('application/') and mimetype.endswith('+json')
+            )
+    return False
+
+
+def query_params(scope):
+    """Decode the query string into a dict (first value wins, like request.args.get)"""
+    params = {}
+    for key, value in parse_qsl(scope.get('query_string', b'').decode('latin-1')):
+        params.setdefault(key, value)
+    return params
+
+
+async def read_json(scope, receive, send, silent=False):
+    """
+    Read and decode a JSON request body, replying with 400 on failure
+
+    With silent=True a missing JSON content-type or an undecodable body
+    gives {} instead of a 400, like Flask's request.get_json(silent=True).
+    """
+    if not silent and not _is_json(scope):
+        await send_json(send, {'success': False, 'error': 'Request must be JSON'}, 400)
+        return None
+    try:
+        body = await read_body(receive)
+    except ValueError as e:
+        await send_json(send, {'success': False, 'error': str(e)}, 413)
+        return None
+    if body is None:  # Client went away
+        return None
+    if silent and not _is_json(scope):
+        return {}
+    try:
+        return json.loads(body)
+    except ValueError:
+        if silent:
+            return {}
+        await send_json(send, {'success': False, 'error': 'Invalid JSON body'}, 400)
+        return None
+
+# ================================
+# ROUTE HANDLERS
+# ================================
+# GET handlers receive data=None; POST handlers receive the decoded JSON body.
+
+async def health_check(scope, data, send):
+    await send_json(send, build_health_payload())
+
+
+async def liveness_check(scope, data, send):
+    await send_json(send, {'status': 'alive'})
+
+
+async def readiness_check(scope, data, send):
+    payload, status = build_readiness_payload()
+    await send_json(send, payload, status)
+
+
+async def get_model_info(scope, data, send):
+    payload, status = build_model_info_payload()
+    await send_json(send, payload, status)
+
+
+async def get_statistics(scope, data, send):
+    await send_json(send, build_statistics_payload())
+
+
+async def get_shadow_report(scope, data, send):
+    payload, status = build_shadow_payload()
+    await send_json(send, payload, status)
+
+
+async def list_rings(scope, data, send):
+    # The top-rings scan is O(components), so it stays off the event loop
+    payload, status = await run_inference(build_rings_payload, query_params(scope))
+    await send_json(send, payload, status)
+
+
+async def start_profile(scope, data, send):
+    payload, status = process_profile_start(data, header_value(scope, Config.ADMIN_TOKEN_HEADER))
+    await send_json(send, payload, status)
+
+
+async def get_profile(scope, data, send):
+    payload, status = build_profile_payload(query_params(scope), header_value(scope, Config.ADMIN_TOKEN_HEADER))
+    await send_json(send, payload, status)
+
+
+async def list_predictions(scope, data, send):
+    # SQLite reads block, so they run on the worker pool like inference
+    payload, status = await run_inference(query_predictions, query_params(scope))
+    await send_json(send, payload, status)
+
+
+def header_value(scope, name):
+    """Return a request header (name given in lower case) or None"""
+    name = name.lower().encode('latin-1')
+    for key, value in scope.get('headers', []):
+        if key == name:
+            return value.decode('latin-1')
+    return None
+
+
+async def predict_fraud(scope, data, send):
+    payload, status = await run_inference(
+        process_prediction, data, query_params(scope),
+        header_value(scope, Config.DEADLINE_HEADER), scope.get('received_at')
+    )
+    await send_json(send, payload, status)
+
+
+async def batch_predict(scope, data, send):
+    payload, status = await run_inference(
+        process_batch_prediction, data, query_params(scope),
+        header_value(scope, Config.DEADLINE_HEADER), scope.get('received_at')
+    )
+    await send_json(send, payload, status)
+
+
+async def explain_predictions(scope, data, send):
+    payload, status = await run_inference(process_explanation, data)
+    await send_json(send, payload, status)
+
+
+async def find_similar_cases(scope, data, send):
+    payload, status = await run_inference(process_similar_cases, data)
+    await send_json(send, payload, status)
+
+
+ROUTES = {
+    '/api/health': ('GET', health_check),
+    '/api/health/live': ('GET', liveness_check),
+    '/api/health/ready': ('GET', readiness_check),
+    '/api/model-info': ('GET', get_model_info),
+    '/api/stats': ('GET', get_statistics),
+    '/api/predictions': ('GET', list_predictions),
+    '/api/shadow': ('GET', get_shadow_report),
+    '/api/rings': ('GET', list_rings),
+    '/api/admin/profile': ('GET', get_profile),
+    '/api/admin/profile/start': ('POST', start_profile),
+    '/api/predict': ('POST', predict_fraud),
+    '/api/batch-predict': ('POST', batch_predict),
+    '/api/explain': ('POST', explain_predictions),
+    '/api/similar-cases': ('POST', find_similar_cases),
+}
+# POST routes whose Flask views read the body with get_json(silent=True)
+SILENT_JSON_ROUTES = {'/api/admin/profile/start'}
+
+# ================================
+# ASGI APPLICATION
+# ================================
+
+def request_client_key(scope):
+    """Rate-limit key for an ASGI request (same rules as the Flask app)"""
+    api_key = forwarded_for = None
+    for name, value in scope.get('headers', []):
+        if name == b'x-api-key':
+            api_key = value.decode('latin-1')
+        elif name == b'x-forwarded-for':
+            forwarded_for = value.decode('latin-1')
+    client = scope.get('client') or (None, None)
+    return get_client_key(api_key, client[0], forwarded_for)
+
+
+async def send_rejection(send, decision):
+    """Send a 429/503 admission rejection with Retry-After"""
+    body, headers = decision.to_response()
+    payload = json.dumps(body, separators=(',', ':')).encode('utf-8')
+    await send({
+        'type': 'http.response.start',
+        'status': decision.status,
+        'headers': [
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(payload)).encode('ascii')),
+        ] + [(name.lower().encode('ascii'), value.encode('ascii')) for name, value in headers.items()] + CORS_HEADERS
+    })
+    await send({'type': 'http.response.body', 'body': payload})
+
+
+async def lifespan(scope, receive, send):
+    """Load the model before accepting traffic and drain the pool on exit"""
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(inference_executor, initialize_model)
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            inference_executor.shutdown(wait=True)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def application(scope, receive, send):
+    """ASGI entry point"""
+    if scope['type'] == 'lifespan':
+        await lifespan(scope, receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+    # Deadlines count from arrival, including time queued for the pool
+    scope['received_at'] = time.monotonic()
+
+    path = scope['path'].rstrip('/') or '/'
+    route = ROUTES.get(path)
+    method = scope['method']
+    response_started = response_finished = False
+    send_downstream = send
+
+    async def send(message):
+        # Tracks the response state for the error handler and, like Flask,
+        # answers HEAD with the GET headers but no body
+        nonlocal response_started, response_finished
+        if message['type'] == 'http.response.start':
+            response_started = True
+        elif message['type'] == 'http.response.body':
+            response_finished = not message.get('more_body', False)
+            if method == 'HEAD':
+                message = dict(message, body=b'')
+        await send_downstream(message)
+
+    if route is None:
+        await send_json(send, {'success': False, 'error': 'Endpoint not found'}, 404)
+        return
+
+    allowed_method, handler = route
+    if method == 'OPTIONS':
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': CORS_HEADERS + [
+                (b'access-control-allow-methods', f'{allowed_method}, OPTIONS'.encode('ascii')),
+                (b'access-control-allow-headers', b'Content-Type'),
+                (b'content-length', b'0'),
+            ]
+        })
+        await send({'type': 'http.response.body', 'body': b''})
+        return
+    if method != allowed_method and not (method == 'HEAD' and allowed_method == 'GET'):
+        await send_json(send, {'success': False, 'error': 'Method not allowed'}, 405)
+        return
+
+    try:
+        if allowed_method != 'POST':
+            await handler(scope, None, send)
+            return
+
+        if path not in RATE_LIMITED_ENDPOINTS:
+            data = await read_json(scope, receive, send, silent=path in SILENT_JSON_ROUTES)
+            if data is not None:
+                await handler(scope, data, send)
+            return
+
+        # Admission runs on the event loop before the body is read, so
+        # over-limit and overload rejections cost neither the body read, the
+        # JSON parse nor a worker thread. Batches are charged their real
+        # cost once the body is parsed.
+        client_key = request_client_key(scope)
+        decision = precheck_admission(path, client_key)
+        if decision is not None and not decision.allowed:
+            await send_rejection(send, decision)
+            return
+        admitted = decision is not None
+        try:
+            data = await read_json(scope, receive, send)
+            if data is None:
+                return
+            if not admitted:
+                decision = admit_batch(client_key, data)
+                if not decision.allowed:
+                    await send_rejection(send, decision)
+                    return
+                admitted = True
+            await handler(scope, data, send)
+        finally:
+            if admitted:
+                admission.release()
+    except Exception as e:
+        logger.error(f"Unhandled error serving {scope['path']}: {e}")
+        if not response_started:
+            await send_json(send, {'success': False, 'error': 'Internal server error'}, 500)
+        elif not response_finished:
+            # The status line is already out; end the body so the server can close the response
+            await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    port = int(os.environ.get('PORT', 5000))
+    print(f"🚀 Starting async fraud detection API on port {port}...")
+    print(f"🧵 Inference workers: {Config.ASYNC_INFERENCE_WORKERS} "
+          f"(max pending: {Config.ASYNC_MAX_PENDING_INFERENCE})")
+    uvicorn.run(
+        application,
+        host='0.0.0.0',
+        port=port,
+        lifespan='on',
+        timeout_keep_alive=Config.ASYNC_KEEP_ALIVE_SECONDS,
+        log_level='info'
+    )
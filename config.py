@@ -8,7 +8,7 @@ class Config:
     DEBUG = True
     
     # Model settings
-    MODEL_PATH = 'models/'
+    MODEL_PATH = os.environ.get('MODEL_PATH', 'models/')  # e.g. models/versions/<version>/ from incremental training
     DATA_PATH = 'data/'
     
     # Model parameters (from original research)
@@ -36,9 +36,11 @@ class Config:
     
     TRANSACTION_TYPES = ['PAYMENT', 'TRANSFER', 'CASH_OUT', 'DEBIT', 'CASH_IN']
     
-    # Fraud detection thresholds (based on research findings)
-    FRAUD_THRESHOLD = 0.5
-    HIGH_RISK_THRESHOLD = 0.3
+    # Fraud detection thresholds (based on research findings). FRAUD and
+    # SUSPICIOUS cut-offs for model probabilities; re-derive them from labelled
+    # data with `python -m models.evaluation --data ...`
+    FRAUD_THRESHOLD = float(os.environ.get('FRAUD_THRESHOLD', 0.5))
+    HIGH_RISK_THRESHOLD = float(os.environ.get('HIGH_RISK_THRESHOLD', 0.3))
     LOW_RISK_THRESHOLD = 0.1
     
     # Business rules (from original research insights)
@@ -56,11 +58,106 @@ class Config:
         'f1_score_legitimate': 0.99
     }
     
-    # Database settings (for future expansion)
+    # Database settings (prediction store, see prediction_store.py)
     DATABASE_URL = os.environ.get('DATABASE_URL') or 'sqlite:///fraud_detection.db'
+    # Off unless requested: the default DATABASE_URL is relative to the working directory
+    PREDICTION_STORE_ENABLED = os.environ.get('PREDICTION_STORE_ENABLED', '').lower() in ('1', 'true', 'yes')
+    PREDICTION_STORE_BATCH_SIZE = 500  # Rows per insert transaction
+    PREDICTION_STORE_FLUSH_INTERVAL = 0.5  # Seconds the writer waits for a batch to fill
+    PREDICTION_STORE_QUEUE_SIZE = 10000  # Pending rows beyond this are dropped, not waited for
+    PREDICTION_RETENTION_DAYS = 30  # 0 keeps predictions forever
+    PREDICTION_PRUNE_INTERVAL = 3600  # Seconds between retention sweeps
+    PREDICTIONS_PAGE_SIZE = 50
+    PREDICTIONS_MAX_PAGE_SIZE = 500
     
     # API settings
-    MAX_REQUESTS_PER_MINUTE = 100
+    MAX_REQUESTS_PER_MINUTE = 100  # Per client (API key or IP), enforced by admission.py
+
+    # Admission control (rate limiting + load shedding) settings
+    RATE_LIMIT_ENABLED = True
+    RATE_LIMIT_BURST = None  # Bucket size in tokens (defaults to MAX_REQUESTS_PER_MINUTE)
+    RATE_LIMIT_MAX_CLIENTS = 100000  # Least recently seen clients beyond this are forgotten
+    BATCH_ROW_TOKEN_COST = 0.1  # Tokens per transaction in a batch (min 1 per request)
+    MAX_IN_FLIGHT_REQUESTS = int(os.environ.get('MAX_IN_FLIGHT_REQUESTS', 64))  # Above this, shed with 503
+    TRUST_PROXY_HEADERS = False  # Key clients by X-Forwarded-For instead of the socket address
+
+    # Scoring cascade (rule stage in front of the DNN, see models/cascade.py).
+    # Check recall with `python -m models.cascade --data ...` before enabling.
+    CASCADE_ENABLED = os.environ.get('CASCADE_ENABLED', '').lower() in ('1', 'true', 'yes')
+    CASCADE_MAX_RULE_AMOUNT = FRAUD_AMOUNT_RANGE[0]  # Rows at or above this always reach the model
+    CASCADE_BALANCE_TOLERANCE = 1.0  # Allowed origin balance error before a row is ambiguous
+    CASCADE_RULE_PROBABILITY = 0.0  # Probability reported for rule-decided rows
+
+    # Model execution settings
+    WARMUP_ON_STARTUP = True  # Run representative batches before reporting ready
+    BUCKETED_EXECUTION = True  # Pad Keras batches to fixed shapes to avoid retracing
+    BATCH_BUCKETS = [1, 8, 32, 128, 512]
+
+    # Feature attribution (/api/explain) settings
+    EXPLAIN_DEFAULT_STEPS = 32  # Integrated-gradients interpolation steps
+    EXPLAIN_MAX_STEPS = 64  # Per-request cap on interpolation steps
+    EXPLAIN_MAX_BATCH = 100
+    EXPLAIN_TOP_K = 5
+
+    # Distilled student (python -m models.distillation) that answers requests
+    # which cannot meet their deadline on the full DNN (unset: rule-based fallback)
+    STUDENT_MODEL_PATH = os.environ.get('STUDENT_MODEL_PATH')
+
+    # Similar known-fraud case retrieval (index built by python -m models.similar_cases
+    # into MODEL_PATH; /api/similar-cases and the similar=1 prediction option)
+    SIMILAR_CASES_K = 5
+    SIMILAR_CASES_MAX_K = 50
+    SIMILAR_CASES_MAX_BATCH = 100
+
+    # Shadow (champion/challenger) scoring settings
+    SHADOW_MODEL_PATH = os.environ.get('SHADOW_MODEL_PATH')  # Challenger artifact directory (unset disables)
+    SHADOW_SAMPLE_RATE = float(os.environ.get('SHADOW_SAMPLE_RATE', 0.1))  # Fraction of requests copied, up to 1.0
+    SHADOW_QUEUE_SIZE = 5000  # Pending shadow requests beyond this are dropped
+    SHADOW_BATCH_SIZE = 256
+    SHADOW_FLUSH_INTERVAL = 0.5
+
+    # Fraud-ring graph settings (see fraud_rings.py); needs nameOrig / nameDest on requests.
+    # Off unless requested: every scored transaction takes the graph's lock
+    RING_DETECTION_ENABLED = os.environ.get('RING_DETECTION_ENABLED', '').lower() in ('1', 'true', 'yes')
+    RING_WINDOW_STEPS = int(os.environ.get('RING_WINDOW_STEPS', 24))  # Edge lifetime in PaySim steps (hours)
+    RING_MAX_EDGES = 500000  # Oldest live edges beyond this expire early
+    RING_MAX_DEGREE = 50  # Accounts with this many live edges stop merging rings (hubs)
+    RING_MIN_SIZE = 3  # Accounts a component needs, with a transfer -> cash-out chain, to be flagged
+    RINGS_PAGE_SIZE = 20
+    RINGS_MAX_LIMIT = 200  # Largest /api/rings limit
+
+    # Latency-SLA (per-request deadline) settings
+    DEADLINE_HEADER = 'X-Deadline-Ms'  # Or a 'deadline_ms' body field
+    DEADLINE_SAFETY_MARGIN_MS = 2.0  # Headroom left for serialisation and network
+    DEADLINE_INITIAL_ESTIMATE_MS = 20.0  # Model latency assumed before any measurement
+    DEADLINE_PARALLELISM = int(os.environ.get('ASYNC_INFERENCE_WORKERS', 4))  # Requests scored concurrently
+
+    # Admin endpoints (/api/admin/*) are only served when a token is set
+    ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+    ADMIN_TOKEN_HEADER = 'X-Admin-Token'
+
+    # Sampling profiler settings (see profiler.py)
+    PROFILER_DEFAULT_SECONDS = 10
+    PROFILER_MAX_SECONDS = 60
+    PROFILER_DEFAULT_INTERVAL_MS = 5
+    PROFILER_MIN_INTERVAL_MS = 1  # Floor on the sampling interval, which bounds overhead
+    PROFILER_MAX_STACKS = 10000  # Distinct stacks kept per session
+    PROFILER_MAX_DEPTH = 64
+    PROFILER_TOP_N = 25
+
+    # Async (ASGI) serving settings
+    ASYNC_INFERENCE_WORKERS = int(os.environ.get('ASYNC_INFERENCE_WORKERS', 4))  # Threads running preprocessing + model.predict
+    ASYNC_MAX_PENDING_INFERENCE = int(os.environ.get('ASYNC_MAX_PENDING_INFERENCE', 256))  # Queued + running inference jobs
+    ASYNC_MAX_BODY_BYTES = 1024 * 1024
+    ASYNC_KEEP_ALIVE_SECONDS = 75
+
+    # Pre-fork (multi-process) serving settings. The admission limits above are
+    # totals: each worker enforces 1 / PREFORK_WORKERS of them
+    PREFORK_WORKERS = int(os.environ.get('PREFORK_WORKERS', 4))
+    PREFORK_BACKLOG = 2048
+    PREFORK_HEARTBEAT_TIMEOUT = 30  # Seconds without a heartbeat before a worker is restarted
+    PREFORK_REPORT_INTERVAL = 300  # Seconds between per-worker memory reports (0 disables)
+    PREFORK_RESTART_BACKOFF = 1.0  # Minimum seconds between restarts of the same worker slot
     
     # Logging settings
     LOG_LEVEL = 'INFO'
@@ -82,6 +179,7 @@ class TestingConfig(Config):
     """Testing configuration"""
     TESTING = True
     DEBUG = True
+    RATE_LIMIT_ENABLED = False
     DATABASE_URL = 'sqlite:///:memory:'
 
 # Configuration dictionary
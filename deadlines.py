@@ -0,0 +1,137 @@
+"""
+Fraud Detection Deadline Control
+Per-request latency budgets with a fast rule-based fallback
+
+Callers with a hard budget (e.g. card authorisation) send a deadline. If the
+time already spent on the request plus the expected queueing and model time
+would exceed it, the request is answered straight away with the rule-based
+fallback and marked as degraded instead of waiting for the DNN.
+"""
+
+import threading
+
+
+class LatencyEstimator:
+    """
+    Running estimate of model-path latency per transaction
+
+    Keeps exponentially weighted averages of the latency and of its absolute
+    deviation, and estimates with mean + k * deviation so a noisy model path
+    is treated conservatively.
+    """
+
+    def __init__(self, initial_ms=20.0, alpha=0.1, deviations=2.0):
+        self.alpha = alpha
+        self.deviations = deviations
+        self.mean_ms = initial_ms
+        self.deviation_ms = initial_ms / 2
+        self.samples = 0
+        self._lock = threading.Lock()
+
+    def observe(self, latency_ms):
+        with self._lock:
+            if self.samples == 0:
+                self.mean_ms = latency_ms
+                self.deviation_ms = latency_ms / 2
+            else:
+                error = latency_ms - self.mean_ms
+                self.mean_ms += self.alpha * error
+                self.deviation_ms += self.alpha * (abs(error) - self.deviation_ms)
+            self.samples += 1
+
+    def estimate_ms(self, rows=1):
+        return (self.mean_ms + self.deviations * self.deviation_ms) * rows
+
+
+class DeadlineController:
+    """Decides when a request must skip the DNN to meet its deadline"""
+
+    def __init__(self, parallelism=4, safety_margin_ms=2.0, initial_estimate_ms=20.0):
+        self.parallelism = max(1, parallelism)
+        self.safety_margin_ms = safety_margin_ms
+        self.estimator = LatencyEstimator(initial_ms=initial_estimate_ms)
+        self._lock = threading.Lock()
+        self.counters = {
+            'requests_with_deadline': 0,
+            'deadline_fallbacks': 0,  # Requests with at least one degraded row
+            'rows_degraded': 0,
+            'deadline_met': 0,
+            'deadline_missed': 0,
+        }
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            parallelism=config.DEADLINE_PARALLELISM,
+            safety_margin_ms=config.DEADLINE_SAFETY_MARGIN_MS,
+            initial_estimate_ms=config.DEADLINE_INITIAL_ESTIMATE_MS
+        )
+
+    @staticmethod
+    def parse_deadline(header_value=None, body_value=None):
+        """
+        Read a deadline in milliseconds from the header or the body field
+
+        Returns:
+            tuple: (deadline_ms or None, error message or None)
+        """
+        value = header_value if header_value not in (None, '') else body_value
+        if value in (None, ''):
+            return None, None
+        try:
+            deadline_ms = float(value)
+        except (TypeError, ValueError):
+            return None, 'deadline_ms must be a number of milliseconds'
+        if deadline_ms <= 0:
+            return None, 'deadline_ms must be greater than 0'
+        return deadline_ms, None
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self.counters[key] += amount
+
+    def start(self):
+        """Count a request that carries a deadline"""
+        self._count('requests_with_deadline')
+
+    def expected_ms(self, in_flight=1, rows=1):
+        """Expected queueing plus model time for a request arriving now"""
+        per_row = self.estimator.estimate_ms()
+        queued = max(0, in_flight - self.parallelism)
+        return queued * per_row / self.parallelism + per_row * rows
+
+    def should_fallback(self, deadline_ms, elapsed_ms, in_flight=1, rows=1):
+        """
+        True if the DNN path is not expected to finish within the deadline
+
+        Returns:
+            tuple: (fallback, expected total ms)
+        """
+        expected = elapsed_ms + self.expected_ms(in_flight, rows) + self.safety_margin_ms
+        return expected > deadline_ms, expected
+
+    def record_model_latency(self, latency_ms, rows=1):
+        self.estimator.observe(latency_ms / max(rows, 1))
+
+    def record_outcome(self, deadline_ms, total_ms, degraded_rows=0):
+        """
+        Count a finished request that carried a deadline
+
+        Fallbacks are decided per row, so a batch reports how many of its rows
+        were degraded; deadline_fallbacks counts requests, like
+        requests_with_deadline, and rows_degraded counts rows.
+        """
+        self._count('deadline_met' if total_ms <= deadline_ms else 'deadline_missed')
+        if degraded_rows:
+            self._count('deadline_fallbacks')
+            self._count('rows_degraded', degraded_rows)
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self.counters)
+        return dict(
+            counters,
+            estimated_model_ms=round(self.estimator.estimate_ms(), 3),
+            mean_model_ms=round(self.estimator.mean_ms, 3),
+            latency_samples=self.estimator.samples
+        )
@@ -2,5 +2,6 @@
 Fraud Detection Models Package
 """
 from .fraud_model import FraudDetectionModel
+from .dense_network import DenseNetwork
 
-__all__ = ['FraudDetectionModel']
\ No newline at end of file
+__all__ = ['FraudDetectionModel', 'DenseNetwork']
\ No newline at end of file
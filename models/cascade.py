@@ -0,0 +1,280 @@
+"""
+Type-aware scoring cascade
+
+Fraud in this dataset is concentrated in CASH_OUT and TRANSFER (PAYMENT
+~0.001%, CASH_IN and DEBIT 0.0%), so most rows can be decided by a few
+auditable rules and only the remainder needs the neural network:
+
+    stage 'rules'  - low-risk type, no system flag, amount below the
+                     high-fraud range and origin balances consistent with
+                     the amount -> LEGITIMATE
+    stage 'model'  - everything else (high-risk types, unknown types and
+                     rule-ambiguous rows)
+
+Measure the recall impact on labelled data before enabling it:
+
+    python -m models.cascade --data data/transactions.csv
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from .features import FIELD_DEFAULTS
+
+# Rule names, in the order they are checked; the first one that fires sends
+# the row to the model
+RULE_HIGH_RISK_TYPE = 'high_risk_type'
+RULE_UNKNOWN_TYPE = 'unknown_type'
+RULE_SYSTEM_FLAGGED = 'system_flagged'
+RULE_LARGE_AMOUNT = 'large_amount'
+RULE_ACCOUNT_DRAINED = 'account_drained'
+RULE_BALANCE_MISMATCH = 'balance_mismatch'
+ESCALATION_RULES = [
+    RULE_HIGH_RISK_TYPE, RULE_UNKNOWN_TYPE, RULE_SYSTEM_FLAGGED,
+    RULE_LARGE_AMOUNT, RULE_ACCOUNT_DRAINED, RULE_BALANCE_MISMATCH
+]
+
+
+class ScoringCascade:
+    """
+    Cheap rule stage in front of the model
+
+    Args:
+        high_risk_types (list): Types always sent to the model
+        transaction_types (list): Known types; anything else goes to the model
+        max_rule_amount (float): Rows at or above this amount go to the model
+        balance_tolerance (float): Allowed absolute error in the origin
+            balance update before a row counts as inconsistent
+        rule_probability (float): Probability reported for rule-decided rows
+    """
+
+    def __init__(self, high_risk_types, transaction_types, max_rule_amount=130000,
+                 balance_tolerance=1.0, rule_probability=0.0):
+        self.high_risk_types = list(high_risk_types)
+        self.transaction_types = list(transaction_types)
+        self.max_rule_amount = max_rule_amount
+        self.balance_tolerance = balance_tolerance
+        self.rule_probability = rule_probability
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            high_risk_types=config.HIGH_RISK_TYPES,
+            transaction_types=config.TRANSACTION_TYPES,
+            max_rule_amount=config.CASCADE_MAX_RULE_AMOUNT,
+            balance_tolerance=config.CASCADE_BALANCE_TOLERANCE,
+            rule_probability=config.CASCADE_RULE_PROBABILITY
+        )
+
+    def escalation_reasons(self, transactions):
+        """
+        First escalation rule that fires for each row (vectorised)
+
+        Args:
+            transactions (list or pd.DataFrame): Transaction dicts / rows
+
+        Returns:
+            np.ndarray: object array with a rule name per row, or None for
+                rows the rule stage decides
+        """
+        df = transactions if isinstance(transactions, pd.DataFrame) else pd.DataFrame(list(transactions))
+        n = len(df)
+
+        def column(name):
+            default = FIELD_DEFAULTS.get(name, 0)
+            if name not in df.columns:
+                return np.full(n, default)
+            values = df[name]
+            if name == 'type':
+                return values.fillna(default).to_numpy()
+            return pd.to_numeric(values, errors='coerce').fillna(default).to_numpy(dtype=np.float64)
+
+        types = column('type')
+        amount = column('amount')
+        old_orig = column('oldbalanceOrg')
+        new_orig = column('newbalanceOrig')
+
+        # Expected origin balance after the transaction: CASH_IN credits the
+        # origin, the other low-risk types debit it (floored at zero)
+        expected_new = np.where(types == 'CASH_IN', old_orig + amount, np.maximum(old_orig - amount, 0.0))
+
+        conditions = [
+            np.isin(types, self.high_risk_types),
+            ~np.isin(types, self.transaction_types),
+            column('isFlaggedFraud') == 1,
+            amount >= self.max_rule_amount,
+            (types != 'CASH_IN') & (old_orig > 0) & (new_orig == 0) & (amount >= old_orig),
+            (old_orig > 0) & (np.abs(new_orig - expected_new) > self.balance_tolerance),
+        ]
+        reasons = np.full(n, None, dtype=object)
+        for rule, condition in zip(reversed(ESCALATION_RULES), reversed(conditions)):
+            reasons[condition] = rule
+        return reasons
+
+    def escalation_reason(self, transaction_data):
+        """
+        Scalar equivalent of escalation_reasons for one transaction dict
+
+        Avoids building a DataFrame on the single-prediction path.
+        """
+        def value(name):
+            raw = transaction_data.get(name)
+            if raw is None:
+                return float(FIELD_DEFAULTS.get(name, 0))
+            try:
+                return float(raw)
+            except (TypeError, ValueError):
+                return float(FIELD_DEFAULTS.get(name, 0))
+
+        transaction_type = transaction_data.get('type') or FIELD_DEFAULTS['type']
+        amount = value('amount')
+        old_orig = value('oldbalanceOrg')
+        new_orig = value('newbalanceOrig')
+        if transaction_type == 'CASH_IN':
+            expected_new = old_orig + amount
+        else:
+            expected_new = max(old_orig - amount, 0.0)
+
+        if transaction_type in self.high_risk_types:
+            return RULE_HIGH_RISK_TYPE
+        if transaction_type not in self.transaction_types:
+            return RULE_UNKNOWN_TYPE
+        if value('isFlaggedFraud') == 1:
+            return RULE_SYSTEM_FLAGGED
+        if amount >= self.max_rule_amount:
+            return RULE_LARGE_AMOUNT
+        if transaction_type != 'CASH_IN' and old_orig > 0 and new_orig == 0 and amount >= old_orig:
+            return RULE_ACCOUNT_DRAINED
+        if old_orig > 0 and abs(new_orig - expected_new) > self.balance_tolerance:
+            return RULE_BALANCE_MISMATCH
+        return None
+
+    def rules_mask(self, transactions):
+        """Boolean mask of rows decided by the rule stage"""
+        return np.equal(self.escalation_reasons(transactions), None)
+
+    def screen(self, transaction_data):
+        """
+        Decide one transaction with the rule stage if possible
+
+        Returns:
+            dict or None: Prediction result for rule-decided rows, None if
+                the row must go to the model
+        """
+        if self.escalation_reason(transaction_data) is not None:
+            return None
+        return self.rule_result()
+
+    def rule_result(self):
+        return {
+            'probability': float(self.rule_probability),
+            'classification': 'LEGITIMATE',
+            'risk_level': 'Low',
+            'confidence': 0.99,
+            'model_used': 'cascade_rules',
+            'decided_by': 'rules',
+            'message': 'Low-risk transaction type with consistent balances'
+        }
+
+
+def evaluate_cascade(data_path, cascade, model=None, chunk_rows=500000, threshold=0.5):
+    """
+    Measure the recall impact of the cascade on a labelled CSV
+
+    Reads the file in chunks (the full dataset has >6M rows). Without a
+    model, reports how many frauds the rule stage would decide (an upper
+    bound on recall lost); with a model, compares model-only and cascade
+    recall at the given threshold.
+
+    Args:
+        data_path (str): CSV with transaction columns and an isFraud label
+        cascade (ScoringCascade): Cascade to evaluate
+        model (FraudDetectionModel): Loaded model, or None for rules only
+        chunk_rows (int): Rows per chunk
+        threshold (float): Fraud threshold for recall
+
+    Returns:
+        dict: Evaluation report
+    """
+    report = {
+        'rows': 0,
+        'frauds': 0,
+        'rule_decided_rows': 0,
+        'rule_decided_frauds': 0,
+        'escalations': {rule: 0 for rule in ESCALATION_RULES},
+    }
+    if model is not None:
+        report.update(model_detected=0, cascade_detected=0, model_seconds=0.0, cascade_model_seconds=0.0)
+
+    for chunk in pd.read_csv(data_path, chunksize=chunk_rows):
+        labels = chunk['isFraud'].to_numpy() == 1
+        reasons = cascade.escalation_reasons(chunk)
+        decided = np.equal(reasons, None)
+
+        report['rows'] += len(chunk)
+        report['frauds'] += int(labels.sum())
+        report['rule_decided_rows'] += int(decided.sum())
+        report['rule_decided_frauds'] += int((labels & decided).sum())
+        for rule in ESCALATION_RULES:
+            report['escalations'][rule] += int((reasons == rule).sum())
+
+        if model is not None:
+            features = model.build_feature_matrix(chunk)
+            started = time.perf_counter()
+            probabilities = np.asarray(model.score_feature_matrix(features)).reshape(-1)
+            report['model_seconds'] += time.perf_counter() - started
+
+            started = time.perf_counter()
+            cascade_probabilities = np.full(len(chunk), cascade.rule_probability, dtype=np.float32)
+            if (~decided).any():
+                cascade_probabilities[~decided] = np.asarray(
+                    model.score_feature_matrix(features[~decided])
+                ).reshape(-1)
+            report['cascade_model_seconds'] += time.perf_counter() - started
+
+            report['model_detected'] += int((labels & (probabilities >= threshold)).sum())
+            report['cascade_detected'] += int((labels & (cascade_probabilities >= threshold)).sum())
+
+    frauds = max(report['frauds'], 1)
+    report['rule_decided_share'] = round(report['rule_decided_rows'] / max(report['rows'], 1), 4)
+    report['max_recall_loss'] = round(report['rule_decided_frauds'] / frauds, 6)
+    if model is not None:
+        report['model_recall'] = round(report['model_detected'] / frauds, 6)
+        report['cascade_recall'] = round(report['cascade_detected'] / frauds, 6)
+        report['recall_delta'] = round(report['cascade_recall'] - report['model_recall'], 6)
+        report['model_seconds'] = round(report['model_seconds'], 3)
+        report['cascade_model_seconds'] = round(report['cascade_model_seconds'], 3)
+    return report
+
+
+def main():
+    from config import Config
+    from .fraud_model import FraudDetectionModel
+
+    parser = argparse.ArgumentParser(description='Measure the recall impact of the scoring cascade')
+    parser.add_argument('--data', required=True, help='Labelled CSV (PaySim columns incl. isFraud)')
+    parser.add_argument('--model-path', default=Config.MODEL_PATH, help='Model artifact directory')
+    parser.add_argument('--rules-only', action='store_true', help='Skip model scoring')
+    parser.add_argument('--chunk-rows', type=int, default=500000)
+    parser.add_argument('--threshold', type=float, default=Config.FRAUD_THRESHOLD)
+    args = parser.parse_args()
+
+    model = None
+    if not args.rules_only:
+        model = FraudDetectionModel(model_path=args.model_path)
+        model.load_model()
+        if not model.is_loaded:
+            print("⚠️ Model not available, reporting rule stage only")
+            model = None
+
+    report = evaluate_cascade(args.data, ScoringCascade.from_config(Config), model,
+                              chunk_rows=args.chunk_rows, threshold=args.threshold)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
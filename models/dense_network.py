@@ -0,0 +1,206 @@
+import os
+import sys
+import tempfile
+import subprocess
+
+import numpy as np
+from multiprocessing import shared_memory
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Run by from_keras_file_isolated in a child interpreter
+_CONVERT_SCRIPT = (
+    'import sys; from models.dense_network import DenseNetwork; '
+    'DenseNetwork.from_keras_file(sys.argv[1]).save(sys.argv[2])'
+)
+
+
+def _relu(x):
+    return np.maximum(x, 0.0, out=x)
+
+
+def _sigmoid(x):
+    # Clip to keep exp() finite for very confident logits
+    np.clip(x, -60.0, 60.0, out=x)
+    np.negative(x, out=x)
+    np.exp(x, out=x)
+    x += 1.0
+    return np.reciprocal(x, out=x)
+
+
+def _linear(x):
+    return x
+
+
+ACTIVATIONS = {
+    'relu': _relu,
+    'sigmoid': _sigmoid,
+    'linear': _linear,
+}
+
+
+class DenseNetwork:
+    """
+    NumPy forward pass for the fraud detection Dense stack (128→64→32→1)
+
+    Mirrors the parts of the Keras model API used for inference
+    (``predict`` and ``input_shape``) so FraudDetectionModel can serve from
+    it without importing TensorFlow. Dropout layers are inactive at
+    inference time and are simply skipped.
+    """
+
+    def __init__(self, layers, shared_block=None):
+        """
+        Args:
+            layers (list): (kernel, bias, activation) tuples in forward order
+            shared_block (SharedMemory): Block backing the arrays, if any
+        """
+        for _, _, activation in layers:
+            if activation not in ACTIVATIONS:
+                raise ValueError(f'Unsupported activation: {activation}')
+        self.layers = layers
+        self.shared_block = shared_block
+
+    @property
+    def input_shape(self):
+        return (None, self.layers[0][0].shape[0])
+
+    @property
+    def architecture(self):
+        return '→'.join(str(kernel.shape[1]) for kernel, _, _ in self.layers)
+
+    @property
+    def nbytes(self):
+        return sum(kernel.nbytes + bias.nbytes for kernel, bias, _ in self.layers)
+
+    @classmethod
+    def from_keras(cls, keras_model):
+        """Copy the weights of a Sequential Dense/Dropout Keras model"""
+        layers = []
+        for layer in keras_model.layers:
+            weights = layer.get_weights()
+            if not weights:
+                continue  # Dropout, InputLayer
+            kernel, bias = weights
+            activation = layer.get_config().get('activation', 'linear')
+            layers.append((
+                np.ascontiguousarray(kernel, dtype=np.float32),
+                np.ascontiguousarray(bias, dtype=np.float32),
+                activation
+            ))
+        return cls(layers)
+
+    @classmethod
+    def from_keras_file(cls, path):
+        """Load a saved Keras model (.h5) as a DenseNetwork (imports TensorFlow)"""
+        from tensorflow.keras.models import load_model as keras_load_model
+        return cls.from_keras(keras_load_model(path, compile=False))
+
+    @classmethod
+    def from_keras_file_isolated(cls, path, timeout=300):
+        """
+        Like from_keras_file, but TensorFlow only runs in a short-lived child
+        interpreter that writes the weights to a temporary .npz
+
+        For processes that fork afterwards (prefork_server.py): the TF
+        runtime's threads and locks do not survive os.fork().
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, 'network.npz')
+            result = subprocess.run(
+                [sys.executable, '-c', _CONVERT_SCRIPT, os.path.abspath(path), output],
+                cwd=_PROJECT_ROOT, capture_output=True, text=True, timeout=timeout
+            )
+            if result.returncode != 0:
+                raise RuntimeError(f'Converting {path} failed: {result.stderr.strip().splitlines()[-1:]}')
+            return cls.load(output)
+
+    def predict(self, features, verbose=0, batch_size=None):
+        """Return fraud probabilities with shape (n, 1), like keras.Model.predict"""
+        x = np.asarray(features, dtype=np.float32)
+        if x.ndim == 1:
+            x = x.reshape(1, -1)
+        for kernel, bias, activation in self.layers:
+            x = x @ kernel
+            x += bias
+            x = ACTIVATIONS[activation](x)
+        return x
+
+    # ================================
+    # PERSISTENCE
+    # ================================
+
+    def save(self, path):
+        """Save weights to an .npz file"""
+        arrays = {}
+        for i, (kernel, bias, activation) in enumerate(self.layers):
+            arrays[f'kernel_{i}'] = kernel
+            arrays[f'bias_{i}'] = bias
+            arrays[f'activation_{i}'] = np.array(activation)
+        np.savez(path, n_layers=np.array(len(self.layers)), **arrays)
+
+    @classmethod
+    def load(cls, path):
+        """Load weights saved with ``save``"""
+        with np.load(path) as data:
+            layers = [
+                (data[f'kernel_{i}'].astype(np.float32),
+                 data[f'bias_{i}'].astype(np.float32),
+                 str(data[f'activation_{i}']))
+                for i in range(int(data['n_layers']))
+            ]
+        return cls(layers)
+
+    # ================================
+    # SHARED MEMORY
+    # ================================
+
+    def to_shared_memory(self):
+        """
+        Copy the weights into one read-only SharedMemory block
+
+        Returns a new DenseNetwork whose arrays are views into the block.
+        Processes forked afterwards map the same physical pages, and other
+        processes can attach by name with ``from_shared_memory(spec)``.
+        """
+        block = shared_memory.SharedMemory(create=True, size=max(self.nbytes, 1))
+        spec = {'name': block.name, 'layers': []}
+        offset = 0
+        for kernel, bias, activation in self.layers:
+            layer_spec = []
+            for array in (kernel, bias):
+                view = np.ndarray(array.shape, dtype=np.float32, buffer=block.buf, offset=offset)
+                view[...] = array
+                layer_spec.append((offset, array.shape))
+                offset += array.nbytes
+            spec['layers'].append((layer_spec[0], layer_spec[1], activation))
+        network = self.from_shared_memory(spec, block=block)
+        network.shared_spec = spec
+        return network
+
+    @classmethod
+    def from_shared_memory(cls, spec, block=None):
+        """Build read-only array views over an existing SharedMemory block"""
+        if block is None:
+            block = shared_memory.SharedMemory(name=spec['name'])
+        layers = []
+        for (kernel_offset, kernel_shape), (bias_offset, bias_shape), activation in spec['layers']:
+            kernel = np.ndarray(tuple(kernel_shape), dtype=np.float32, buffer=block.buf, offset=kernel_offset)
+            bias = np.ndarray(tuple(bias_shape), dtype=np.float32, buffer=block.buf, offset=bias_offset)
+            kernel.flags.writeable = False
+            bias.flags.writeable = False
+            layers.append((kernel, bias, activation))
+        network = cls(layers, shared_block=block)
+        network.shared_spec = spec
+        return network
+
+    def release(self, unlink=False):
+        """Drop the array views and close (optionally unlink) the shared block"""
+        if self.shared_block is None:
+            return
+        block = self.shared_block
+        self.layers = []
+        self.shared_block = None
+        block.close()
+        if unlink:
+            block.unlink()
@@ -0,0 +1,334 @@
+"""
+Knowledge distillation into a small student network
+
+Trains a much smaller NumPy network (14 -> 16 -> 1 by default, or a
+logistic model with --hidden 0) to reproduce the teacher's probabilities
+from fraud_detection_model.h5 on a large unlabelled transaction sample:
+
+    python -m models.distillation --data data/PS_20174392719_1491204439457_log.csv \\
+        --rows 2000000 --output-dir models/student
+
+- Targets are the teacher's soft probabilities, not labels, so any
+  transaction log works. The cross-entropy is weighted by
+  1 + positive_weight * teacher probability, so the rare high-risk region
+  is not drowned out by the legitimate majority.
+- The student reuses the teacher's scaler and feature order, and trains
+  with mini-batch Adam in NumPy without TensorFlow.
+- The output directory holds student_model.npz, scaler.pkl,
+  feature_names.pkl and distillation.json. FraudDetectionModel loads it like
+  any artifact directory (MODEL_PATH=models/student/), or it can serve as
+  the deadline tier through STUDENT_MODEL_PATH.
+
+The report compares teacher and student on held-out rows: single-row
+latency, batch throughput, how closely the probabilities agree, and how many
+teacher FRAUD / SUSPICIOUS calls the student keeps (plus label recall when
+the data has isFraud).
+"""
+
+import os
+import json
+import time
+import argparse
+
+import joblib
+import numpy as np
+
+from .dense_network import DenseNetwork
+from .evaluation import iter_labelled_chunks, LABEL_COLUMN
+from .features import DEFAULT_FEATURE_NAMES, scale_feature_matrix
+
+DEFAULT_HIDDEN = (16,)
+DEFAULT_ROWS = 2000000
+DEFAULT_EPOCHS = 5
+DEFAULT_BATCH_SIZE = 1024
+DEFAULT_LEARNING_RATE = 3e-3
+DEFAULT_POSITIVE_WEIGHT = 10.0
+DEFAULT_HOLDOUT = 0.1
+REPORT_FILE = 'distillation.json'
+
+
+def sample_transactions(data_path, max_rows=DEFAULT_ROWS, sample_fraction=1.0, seed=0):
+    """
+    Uniformly sample up to max_rows transactions from a CSV, Parquet file or dataset cache
+
+    The whole file is read: every row gets a random key and the max_rows
+    smallest keys are kept (a reservoir sample), so a log sorted by step is
+    covered end to end while memory stays O(max_rows + chunk). With
+    sample_fraction < 1 each chunk is thinned first, which only saves work.
+
+    Returns:
+        pd.DataFrame: The sample in file order
+    """
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    reservoir = None
+    keys = np.zeros(0)
+    offset = 0
+    for chunk in iter_labelled_chunks(data_path):
+        chunk = chunk.set_index(pd.RangeIndex(offset, offset + len(chunk)))
+        offset += len(chunk)
+        if sample_fraction < 1.0:
+            chunk = chunk[rng.random(len(chunk)) < sample_fraction]
+        chunk_keys = rng.random(len(chunk))
+        if reservoir is None:
+            reservoir, keys = chunk, chunk_keys
+        else:
+            reservoir = pd.concat([reservoir, chunk])
+            keys = np.concatenate([keys, chunk_keys])
+        if len(reservoir) > max_rows:
+            keep = np.argpartition(keys, max_rows)[:max_rows]
+            reservoir, keys = reservoir.iloc[keep], keys[keep]
+    if reservoir is None:
+        return pd.DataFrame()
+    return reservoir.sort_index().reset_index(drop=True)
+
+
+def train_student(features, targets, hidden=DEFAULT_HIDDEN, epochs=DEFAULT_EPOCHS,
+                  batch_size=DEFAULT_BATCH_SIZE, learning_rate=DEFAULT_LEARNING_RATE,
+                  positive_weight=DEFAULT_POSITIVE_WEIGHT, seed=0, verbose=True):
+    """
+    Fit a ReLU MLP with a sigmoid output to soft targets (weighted cross-entropy, Adam)
+
+    Args:
+        features (np.ndarray): (n, d) scaled features
+        targets (np.ndarray): (n,) teacher probabilities
+        hidden (tuple): Hidden layer widths; () gives logistic regression
+
+    Returns:
+        DenseNetwork: The trained student
+    """
+    rng = np.random.default_rng(seed)
+    features = np.asarray(features, dtype=np.float32)
+    targets = np.asarray(targets, dtype=np.float32).reshape(-1, 1)
+    weights = 1.0 + positive_weight * targets
+
+    sizes = [features.shape[1]] + list(hidden) + [1]
+    params = []
+    for fan_in, fan_out in zip(sizes[:-1], sizes[1:]):
+        kernel = rng.normal(0.0, np.sqrt(2.0 / fan_in), size=(fan_in, fan_out)).astype(np.float32)
+        params.append([kernel, np.zeros(fan_out, dtype=np.float32)])
+    # Start the output at the base rate so early steps fit shape, not offset
+    base_rate = float(np.clip(np.average(targets, weights=weights), 1e-6, 1 - 1e-6))
+    params[-1][1][:] = np.log(base_rate / (1 - base_rate))
+
+    moments = [[np.zeros_like(p) for p in layer] for layer in params]
+    velocities = [[np.zeros_like(p) for p in layer] for layer in params]
+    beta1, beta2, epsilon = 0.9, 0.999, 1e-8
+    step = 0
+
+    n_rows = len(features)
+    for epoch in range(epochs):
+        order = rng.permutation(n_rows)
+        loss_sum = 0.0
+        for start in range(0, n_rows, batch_size):
+            index = order[start:start + batch_size]
+            x, y, w = features[index], targets[index], weights[index]
+
+            activations = [x]
+            for i, (kernel, bias) in enumerate(params):
+                z = activations[-1] @ kernel + bias
+                activations.append(np.maximum(z, 0.0) if i < len(params) - 1 else z)
+            logits = activations[-1]
+            p = 1.0 / (1.0 + np.exp(-np.clip(logits, -30, 30)))
+
+            w_sum = w.sum()
+            loss_sum += float(-(w * (y * np.log(p + 1e-7) + (1 - y) * np.log(1 - p + 1e-7))).sum())
+            grad = (p - y) * w / w_sum  # d(weighted mean BCE) / d(logits)
+
+            step += 1
+            for i in range(len(params) - 1, -1, -1):
+                kernel, bias = params[i]
+                grads = (activations[i].T @ grad, grad.sum(axis=0))
+                if i > 0:
+                    grad = (grad @ kernel.T) * (activations[i] > 0)
+                for j, g in enumerate(grads):
+                    moments[i][j] = beta1 * moments[i][j] + (1 - beta1) * g
+                    velocities[i][j] = beta2 * velocities[i][j] + (1 - beta2) * g * g
+                    m_hat = moments[i][j] / (1 - beta1 ** step)
+                    v_hat = velocities[i][j] / (1 - beta2 ** step)
+                    params[i][j] -= (learning_rate * m_hat / (np.sqrt(v_hat) + epsilon)).astype(np.float32)
+        if verbose:
+            print(f"📉 Epoch {epoch + 1}/{epochs} - weighted loss {loss_sum / weights.sum():.5f}")
+
+    return DenseNetwork([
+        (kernel, bias, 'relu' if i < len(params) - 1 else 'sigmoid')
+        for i, (kernel, bias) in enumerate(params)
+    ])
+
+
+def measure_latency(score, raw_features, single_rows=1000, batch_rows=100000):
+    """
+    Single-row latency percentiles and batch throughput of a scoring function
+
+    Args:
+        score (callable): Raw feature matrix -> probabilities (scaling included)
+
+    Returns:
+        dict: p50 / p99 microseconds per single-row call and batch rows/s
+    """
+    single_rows = min(single_rows, len(raw_features))
+    score(raw_features[:1])  # Warm up
+    timings = np.empty(single_rows)
+    for i in range(single_rows):
+        started = time.perf_counter()
+        score(raw_features[i:i + 1])
+        timings[i] = time.perf_counter() - started
+    batch = raw_features[:batch_rows]
+    started = time.perf_counter()
+    score(batch)
+    batch_seconds = time.perf_counter() - started
+    return {
+        'single_row_p50_us': round(float(np.percentile(timings, 50)) * 1e6, 1),
+        'single_row_p99_us': round(float(np.percentile(timings, 99)) * 1e6, 1),
+        'batch_rows_per_second': round(len(batch) / batch_seconds, 1) if batch_seconds else None,
+    }
+
+
+def compare(teacher_probabilities, student_probabilities, fraud_threshold, suspicious_threshold, labels=None):
+    """Fidelity of the student to the teacher, and label recall if labels are given"""
+    teacher_probabilities = np.asarray(teacher_probabilities).reshape(-1)
+    student_probabilities = np.asarray(student_probabilities).reshape(-1)
+
+    def levels(p):
+        return (p >= suspicious_threshold).astype(np.int8) + (p >= fraud_threshold).astype(np.int8)
+
+    teacher_levels, student_levels = levels(teacher_probabilities), levels(student_probabilities)
+    teacher_fraud = teacher_levels == 2
+    teacher_flagged = teacher_levels >= 1
+    report = {
+        'rows': len(teacher_probabilities),
+        'mean_abs_probability_diff': round(float(np.abs(teacher_probabilities - student_probabilities).mean()), 6),
+        'max_abs_probability_diff': round(float(np.abs(teacher_probabilities - student_probabilities).max()), 6),
+        'classification_agreement': round(float((teacher_levels == student_levels).mean()), 6),
+        'teacher_fraud': int(teacher_fraud.sum()),
+        'teacher_flagged': int(teacher_flagged.sum()),
+        # Share of the teacher's FRAUD (and FRAUD or SUSPICIOUS) calls the student also makes
+        'fraud_recall_vs_teacher': round(float((student_levels[teacher_fraud] == 2).mean()), 6)
+        if teacher_fraud.any() else None,
+        'flagged_recall_vs_teacher': round(float((student_levels[teacher_flagged] >= 1).mean()), 6)
+        if teacher_flagged.any() else None,
+    }
+    if labels is not None:
+        labels = np.asarray(labels).astype(bool)
+        if labels.any():
+            report['label_fraud_recall'] = {
+                'teacher': round(float(teacher_fraud[labels].mean()), 6),
+                'student': round(float((student_levels == 2)[labels].mean()), 6),
+            }
+    return report
+
+
+def distill(teacher, data_path, output_dir, max_rows=DEFAULT_ROWS, sample_fraction=1.0,
+            hidden=DEFAULT_HIDDEN, epochs=DEFAULT_EPOCHS, batch_size=DEFAULT_BATCH_SIZE,
+            learning_rate=DEFAULT_LEARNING_RATE, positive_weight=DEFAULT_POSITIVE_WEIGHT,
+            holdout=DEFAULT_HOLDOUT, seed=0):
+    """
+    Train, export and benchmark a student of a loaded teacher
+
+    Returns:
+        dict: The report written to <output_dir>/distillation.json
+    """
+    feature_names = teacher.feature_names or DEFAULT_FEATURE_NAMES
+    df = sample_transactions(data_path, max_rows, sample_fraction, seed)
+    labels = df[LABEL_COLUMN].to_numpy() if LABEL_COLUMN in df.columns else None
+    raw = teacher.build_feature_matrix(df)
+    del df
+    print(f"📦 Sampled {len(raw):,} transactions; scoring with the teacher...")
+    started = time.perf_counter()
+    teacher_probabilities = np.asarray(teacher.score_feature_matrix(raw)).reshape(-1)
+    print(f"🧠 Teacher scored them in {time.perf_counter() - started:.1f}s")
+
+    rng = np.random.default_rng(seed)
+    test_mask = rng.random(len(raw)) < holdout
+    scaled = scale_feature_matrix(raw, teacher.scaler, feature_names)
+
+    started = time.perf_counter()
+    student = train_student(
+        scaled[~test_mask], teacher_probabilities[~test_mask], hidden=hidden, epochs=epochs,
+        batch_size=batch_size, learning_rate=learning_rate, positive_weight=positive_weight, seed=seed
+    )
+    train_seconds = time.perf_counter() - started
+
+    os.makedirs(output_dir, exist_ok=True)
+    from .fraud_model import STUDENT_MODEL_FILE
+    student.save(os.path.join(output_dir, STUDENT_MODEL_FILE))
+    joblib.dump(teacher.scaler, os.path.join(output_dir, 'scaler.pkl'))
+    joblib.dump(list(feature_names), os.path.join(output_dir, 'feature_names.pkl'))
+
+    def student_score(features):
+        return student.predict(scale_feature_matrix(features, teacher.scaler, feature_names)).reshape(-1)
+
+    test_raw = raw[test_mask]
+    report = {
+        'data': os.path.abspath(data_path),
+        'output_dir': os.path.abspath(output_dir),
+        'teacher_path': os.path.abspath(teacher.model_path),
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'training_rows': int((~test_mask).sum()),
+        'holdout_rows': int(test_mask.sum()),
+        'train_seconds': round(train_seconds, 2),
+        'hyperparameters': {
+            'hidden': list(hidden), 'epochs': epochs, 'batch_size': batch_size,
+            'learning_rate': learning_rate, 'positive_weight': positive_weight, 'seed': seed
+        },
+        'thresholds': {'fraud': teacher.fraud_threshold, 'suspicious': teacher.suspicious_threshold},
+        'teacher': dict(
+            architecture=teacher.export_network().architecture if teacher.model is not None else None,
+            **measure_latency(teacher.score_feature_matrix, test_raw)
+        ),
+        'student': dict(
+            architecture=student.architecture,
+            parameters=int(sum(kernel.size + bias.size for kernel, bias, _ in student.layers)),
+            **measure_latency(student_score, test_raw)
+        ),
+        'holdout': compare(
+            teacher_probabilities[test_mask], student_score(test_raw),
+            teacher.fraud_threshold, teacher.suspicious_threshold,
+            labels[test_mask] if labels is not None else None
+        ),
+    }
+    with open(os.path.join(output_dir, REPORT_FILE), 'w') as f:
+        json.dump(report, f, indent=2)
+    return report
+
+
+def main():
+    from config import Config
+    from .fraud_model import FraudDetectionModel
+
+    parser = argparse.ArgumentParser(description='Distil the fraud DNN into a small low-latency student')
+    parser.add_argument('--data', required=True, help='CSV, Parquet file or dataset cache directory (labels optional)')
+    parser.add_argument('--teacher-path', default=Config.MODEL_PATH, help='Teacher artifact directory')
+    parser.add_argument('--output-dir', default=os.path.join(Config.MODEL_PATH, 'student'))
+    parser.add_argument('--rows', type=int, default=DEFAULT_ROWS, help='Maximum transactions to distil on')
+    parser.add_argument('--sample-fraction', type=float, default=1.0,
+                        help='Thin each chunk to this fraction before sampling (faster on very large files)')
+    parser.add_argument('--hidden', default=','.join(map(str, DEFAULT_HIDDEN)),
+                        help="Hidden layer widths, e.g. '16' or '16,8'; '0' for logistic regression")
+    parser.add_argument('--epochs', type=int, default=DEFAULT_EPOCHS)
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--learning-rate', type=float, default=DEFAULT_LEARNING_RATE)
+    parser.add_argument('--positive-weight', type=float, default=DEFAULT_POSITIVE_WEIGHT)
+    parser.add_argument('--holdout', type=float, default=DEFAULT_HOLDOUT)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    hidden = tuple(int(width) for width in args.hidden.split(',') if int(width) > 0)
+    teacher = FraudDetectionModel(model_path=args.teacher_path)
+    teacher.set_thresholds(Config.FRAUD_THRESHOLD, Config.HIGH_RISK_THRESHOLD)
+    teacher.load_model()
+    if not teacher.is_loaded or teacher.scaler is None:
+        raise SystemExit(f"Teacher model and scaler could not be loaded from {args.teacher_path}")
+
+    report = distill(
+        teacher, args.data, args.output_dir, max_rows=args.rows, sample_fraction=args.sample_fraction,
+        hidden=hidden, epochs=args.epochs, batch_size=args.batch_size, learning_rate=args.learning_rate,
+        positive_weight=args.positive_weight, holdout=args.holdout, seed=args.seed
+    )
+    print(json.dumps(report, indent=2))
+    print(f"✅ Serve it with MODEL_PATH={report['output_dir']}{os.sep} or STUDENT_MODEL_PATH={report['output_dir']}{os.sep}")
+
+
+if __name__ == '__main__':
+    main()
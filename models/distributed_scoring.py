@@ -0,0 +1,639 @@
+"""
+Coordinator / worker bulk scoring across processes and hosts
+
+Re-scoring a multi-month archive outgrows one host's predict_many, so the
+work is split into byte ranges of the input CSVs and handed out over a small
+HTTP work queue:
+
+    # Coordinator plus four local workers (single-machine mode)
+    python -m models.distributed_scoring coordinator --input data/archive_*.csv \\
+        --output scored.csv --local-workers 4
+
+    # More workers on other hosts
+    python -m models.distributed_scoring worker --coordinator http://scoring-01:8765
+
+- The coordinator splits each file into line-aligned byte ranges of about
+  --chunk-mb and leases them to workers. A lease lasts --lease-timeout seconds
+  and is renewed by the worker's heartbeats. Tasks whose worker stops sending
+  heartbeats or reports a failure are requeued, up to --max-attempts times.
+- Workers load FraudDetectionModel once, read their byte range (from the
+  local or shared filesystem, or from the coordinator if the path does not
+  exist on their host), score it with the vectorised feature path and upload
+  the scored rows.
+- Leased tasks sit in a heap ordered by lease expiry, so checking for
+  expired leases on every lease call costs O(log n) per expiry, not a scan
+  of the task table. Renewals push a fresh entry; superseded entries are
+  skipped when they reach the top.
+- Each scored row is the input line exactly as read, with the probability
+  and classification appended, so values keep their original formatting.
+- Parts are appended to the output in input order as soon as every earlier
+  part is in, so the output matches the input row order and no more than
+  the out-of-order parts are held on disk. A JSON throughput report (per
+  worker and overall) is written next to the output.
+
+All input files must share the same header. Quoted fields containing
+newlines are not supported, as with models.dataset_cache.
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import uuid
+import heapq
+import socket
+import logging
+import argparse
+import threading
+import subprocess
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 8765
+DEFAULT_CHUNK_MB = 64
+DEFAULT_LEASE_TIMEOUT = 60.0
+DEFAULT_MAX_ATTEMPTS = 3
+OUTPUT_COLUMNS = ['fraud_probability', 'classification']
+
+
+def read_header(path):
+    with open(path, 'rb') as f:
+        return f.readline()
+
+
+def split_byte_ranges(path, chunk_bytes):
+    """
+    Line-aligned (start, end) byte ranges covering a CSV's data rows
+
+    Each boundary is moved forward to just after the next newline, so every
+    range holds whole rows. Only one line per boundary is read.
+    """
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        start = len(f.readline())
+        ranges = []
+        while start < size:
+            end = start + chunk_bytes
+            if end < size:
+                f.seek(end)
+                end += len(f.readline())
+            end = min(end, size)
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def read_byte_range(path, start, end):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        return f.read(end - start)
+
+
+# ================================
+# COORDINATOR
+# ================================
+
+class Coordinator:
+    """
+    Task table, leases and ordered merge for one bulk scoring job
+
+    Thread-safe: every HTTP request thread calls into the same instance.
+    """
+
+    def __init__(self, inputs, output_path, work_dir=None, chunk_bytes=DEFAULT_CHUNK_MB << 20,
+                 lease_timeout=DEFAULT_LEASE_TIMEOUT, max_attempts=DEFAULT_MAX_ATTEMPTS):
+        self.inputs = [os.path.abspath(path) for path in inputs]
+        self.output_path = output_path
+        self.work_dir = work_dir or f'{output_path}.parts'
+        self.lease_timeout = lease_timeout
+        self.max_attempts = max_attempts
+
+        self.header = read_header(self.inputs[0])
+        for path in self.inputs[1:]:
+            if read_header(path) != self.header:
+                raise ValueError(f'{path} has a different header from {self.inputs[0]}')
+
+        self.tasks = []
+        for path in self.inputs:
+            for start, end in split_byte_ranges(path, chunk_bytes):
+                self.tasks.append({
+                    'id': len(self.tasks), 'path': path, 'start': start, 'end': end,
+                    'state': 'pending', 'attempts': 0, 'worker': None, 'lease_expires': None,
+                    'rows': 0
+                })
+        self._pending = deque(task['id'] for task in self.tasks)
+        self._leases = []  # Heap of (lease_expires, task id); entries go stale on renewal or completion
+        self._lock = threading.Lock()
+        self._merge_lock = threading.Lock()
+        self._next_merge = 0
+        self.finished = threading.Event()
+        self.error = None
+        self.workers = {}
+        self.counters = {'retries': 0, 'lease_expiries': 0, 'failures': 0, 'duplicate_completions': 0}
+        self.started_at = time.time()
+        self.finished_at = None
+
+        os.makedirs(self.work_dir, exist_ok=True)
+        with open(self.output_path, 'wb') as f:
+            f.write(self.header.rstrip(b'\r\n') + (',' + ','.join(OUTPUT_COLUMNS) + '\n').encode())
+        if not self.tasks:
+            self._finish()
+
+    def _worker(self, worker_id):
+        return self.workers.setdefault(worker_id, {
+            'tasks': 0, 'rows': 0, 'scoring_seconds': 0.0, 'failures': 0, 'last_seen': None
+        })
+
+    def lease(self, worker_id):
+        """
+        Hand the next pending task to a worker
+
+        Returns:
+            dict: {'task': ...}, {'retry_after': seconds} while tasks are
+                leased elsewhere, or {'done': True}
+        """
+        with self._lock:
+            self._worker(worker_id)['last_seen'] = time.time()
+            self._expire_leases()
+            if self.finished.is_set():
+                return {'done': True, 'error': self.error}
+            # A late upload from an expired lease may already have completed a requeued task
+            while self._pending and self.tasks[self._pending[0]]['state'] != 'pending':
+                self._pending.popleft()
+            if not self._pending:
+                return {'retry_after': min(1.0, self.lease_timeout / 4)}
+            task = self.tasks[self._pending.popleft()]
+            task['state'] = 'leased'
+            task['worker'] = worker_id
+            task['attempts'] += 1
+            task['lease_expires'] = time.monotonic() + self.lease_timeout
+            heapq.heappush(self._leases, (task['lease_expires'], task['id']))
+            return {'task': {
+                'id': task['id'], 'path': task['path'], 'start': task['start'], 'end': task['end'],
+                'attempt': task['attempts'], 'heartbeat_interval': self.lease_timeout / 3
+            }}
+
+    def heartbeat(self, worker_id, task_id):
+        """Extend a lease; False if the worker no longer holds the task"""
+        with self._lock:
+            self._worker(worker_id)['last_seen'] = time.time()
+            task = self.tasks[task_id]
+            if task['state'] != 'leased' or task['worker'] != worker_id:
+                return False
+            task['lease_expires'] = time.monotonic() + self.lease_timeout
+            heapq.heappush(self._leases, (task['lease_expires'], task_id))
+            return True
+
+    def complete(self, worker_id, task_id, rows, seconds, body):
+        """Store a scored part and merge every part that is now in order"""
+        part_path = os.path.join(self.work_dir, f'part-{task_id:06d}.csv')
+        with self._lock:
+            task = self.tasks[task_id]
+            if task['state'] in ('writing', 'done', 'merged', 'failed'):
+                # A re-leased task finished twice; the first result is kept
+                self.counters['duplicate_completions'] += 1
+                return
+            # Claimed before writing, so a concurrent duplicate is discarded above
+            task['state'] = 'writing'
+        try:
+            temp_path = f'{part_path}.{uuid.uuid4().hex}.tmp'
+            with open(temp_path, 'wb') as f:
+                f.write(body)
+            os.replace(temp_path, part_path)
+        except OSError as e:
+            with self._lock:
+                self._retry(task, f'could not write part: {e}')
+            raise
+        with self._lock:
+            task['state'] = 'done'
+            task['rows'] = rows
+            stats = self._worker(worker_id)
+            stats['tasks'] += 1
+            stats['rows'] += rows
+            stats['scoring_seconds'] += seconds
+        self._merge_ready()
+
+    def fail(self, worker_id, task_id, error):
+        with self._lock:
+            task = self.tasks[task_id]
+            self._worker(worker_id)['failures'] += 1
+            self.counters['failures'] += 1
+            if task['state'] == 'leased' and task['worker'] == worker_id:
+                logger.warning(f"Task {task_id} failed on {worker_id}: {error}")
+                self._retry(task, error)
+
+    def _expire_leases(self):
+        now = time.monotonic()
+        leases = self._leases
+        while leases and leases[0][0] < now:
+            expires, task_id = heapq.heappop(leases)
+            task = self.tasks[task_id]
+            if task['state'] != 'leased' or task['lease_expires'] != expires:
+                continue  # Renewed, completed or requeued since this entry was pushed
+            self.counters['lease_expiries'] += 1
+            logger.warning(f"Lease on task {task_id} held by {task['worker']} expired")
+            self._retry(task, 'lease expired')
+
+    def _retry(self, task, reason):
+        task['worker'] = None
+        task['lease_expires'] = None
+        if task['attempts'] >= self.max_attempts:
+            task['state'] = 'failed'
+            self.error = f"Task {task['id']} ({task['path']} bytes {task['start']}-{task['end']}) " \
+                         f"failed {task['attempts']} times, last: {reason}"
+            self._finish()
+            return
+        task['state'] = 'pending'
+        self.counters['retries'] += 1
+        self._pending.append(task['id'])
+
+    def _merge_ready(self):
+        """Append completed parts to the output in task order"""
+        with self._merge_lock:
+            while True:
+                with self._lock:
+                    if self._next_merge >= len(self.tasks) or self.tasks[self._next_merge]['state'] != 'done':
+                        break
+                    task = self.tasks[self._next_merge]
+                part_path = os.path.join(self.work_dir, f"part-{task['id']:06d}.csv")
+                with open(self.output_path, 'ab') as output, open(part_path, 'rb') as part:
+                    while True:
+                        block = part.read(1 << 20)
+                        if not block:
+                            break
+                        output.write(block)
+                os.remove(part_path)
+                with self._lock:
+                    task['state'] = 'merged'
+                    self._next_merge += 1
+                    if self._next_merge == len(self.tasks):
+                        self._finish()
+
+    def abort(self, reason):
+        """Stop the job: workers are told it is done on their next lease"""
+        with self._lock:
+            self.error = self.error or reason
+            self._finish()
+
+    def _finish(self):
+        if not self.finished.is_set():
+            self.finished_at = time.time()
+            self.finished.set()
+
+    def reap(self):
+        """Requeue expired leases (called periodically; leases are also checked on every lease call)"""
+        with self._lock:
+            if not self.finished.is_set():
+                self._expire_leases()
+
+    def report(self):
+        """Progress and aggregate / per-worker throughput"""
+        with self._lock:
+            states = {}
+            for task in self.tasks:
+                states[task['state']] = states.get(task['state'], 0) + 1
+            rows = sum(task['rows'] for task in self.tasks)
+            wall = (self.finished_at or time.time()) - self.started_at
+            workers = {
+                worker_id: dict(
+                    stats,
+                    scoring_seconds=round(stats['scoring_seconds'], 3),
+                    rows_per_second=round(stats['rows'] / stats['scoring_seconds'], 1)
+                    if stats['scoring_seconds'] else None
+                )
+                for worker_id, stats in self.workers.items()
+            }
+            return dict(
+                self.counters,
+                inputs=self.inputs,
+                output=os.path.abspath(self.output_path),
+                finished=self.finished.is_set(),
+                error=self.error,
+                tasks=len(self.tasks),
+                task_states=states,
+                rows=rows,
+                wall_seconds=round(wall, 3),
+                rows_per_second=round(rows / wall, 1) if wall > 0 else None,
+                workers=workers
+            )
+
+
+class CoordinatorRequestHandler(BaseHTTPRequestHandler):
+    """JSON work-queue API; the server's `coordinator` attribute holds the job"""
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+    def _send(self, payload, status=200, body=None, content_type='application/json'):
+        data = body if body is not None else json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_body(self):
+        return self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+    def do_GET(self):
+        coordinator = self.server.coordinator
+        url = urllib.parse.urlparse(self.path)
+        params = dict(urllib.parse.parse_qsl(url.query))
+        if url.path == '/status':
+            self._send(coordinator.report())
+        elif url.path == '/data':
+            # Byte range for workers that cannot open the input path themselves
+            task = coordinator.tasks[int(params['task'])]
+            self._send(None, body=read_byte_range(task['path'], task['start'], task['end']),
+                       content_type='text/csv')
+        elif url.path == '/header':
+            self._send(None, body=coordinator.header, content_type='text/csv')
+        else:
+            self._send({'error': 'Not found'}, 404)
+
+    def do_POST(self):
+        coordinator = self.server.coordinator
+        url = urllib.parse.urlparse(self.path)
+        params = dict(urllib.parse.parse_qsl(url.query))
+        try:
+            if url.path == '/complete':
+                coordinator.complete(
+                    params['worker'], int(params['task']), int(params['rows']),
+                    float(params['seconds']), self._read_body()
+                )
+                self._send({'ok': True})
+                return
+            data = json.loads(self._read_body() or b'{}')
+            if url.path == '/lease':
+                self._send(coordinator.lease(data['worker_id']))
+            elif url.path == '/heartbeat':
+                ok = coordinator.heartbeat(data['worker_id'], int(data['task_id']))
+                self._send({'ok': ok}, 200 if ok else 409)
+            elif url.path == '/fail':
+                coordinator.fail(data['worker_id'], int(data['task_id']), data.get('error'))
+                self._send({'ok': True})
+            else:
+                self._send({'error': 'Not found'}, 404)
+        except (KeyError, ValueError, IndexError) as e:
+            self._send({'error': f'Bad request: {e}'}, 400)
+        except OSError as e:
+            self._send({'error': str(e)}, 500)
+
+
+def serve_coordinator(coordinator, host='0.0.0.0', port=DEFAULT_PORT):
+    """Start the work-queue server and lease reaper in background threads"""
+    server = ThreadingHTTPServer((host, port), CoordinatorRequestHandler)
+    server.daemon_threads = True
+    server.coordinator = coordinator
+    threading.Thread(target=server.serve_forever, name='coordinator-http', daemon=True).start()
+
+    def reap():
+        while not coordinator.finished.wait(max(coordinator.lease_timeout / 4, 0.5)):
+            coordinator.reap()
+
+    threading.Thread(target=reap, name='coordinator-reaper', daemon=True).start()
+    return server
+
+
+# ================================
+# WORKER
+# ================================
+
+class CoordinatorClient:
+    """Minimal JSON-over-HTTP client for the coordinator API"""
+
+    def __init__(self, url, timeout=30.0):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+
+    def request(self, path, payload=None, body=None, params=None, method='POST'):
+        url = f'{self.url}{path}'
+        if params:
+            url += '?' + urllib.parse.urlencode(params)
+        data = body if body is not None else (json.dumps(payload).encode() if payload is not None else None)
+        request = urllib.request.Request(url, data=data, method=method)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                content = response.read()
+                is_json = response.headers.get('Content-Type') == 'application/json'
+        except urllib.error.HTTPError as e:
+            if e.code == 409:
+                return {'ok': False}
+            raise
+        return json.loads(content) if is_json else content
+
+
+def score_chunk(model, csv_bytes):
+    """
+    Score a CSV byte range (header line included)
+
+    pandas only parses the rows for the model. The output repeats each input
+    line byte for byte (with LF line endings) and appends the two output
+    columns, so no value is re-formatted or re-typed.
+
+    Returns:
+        tuple: (scored rows as CSV bytes without a header, row count)
+    """
+    df = pd.read_csv(io.BytesIO(csv_bytes))
+    # Same rows pandas parsed: everything after the header except blank lines
+    lines = [line.rstrip(b'\r') for line in csv_bytes.split(b'\n')[1:]]
+    lines = [line for line in lines if line]
+    if len(lines) != len(df):
+        raise ValueError(f'Parsed {len(df)} rows from {len(lines)} lines; quoted newlines are not supported')
+
+    probabilities = np.asarray(model.score_feature_matrix(model.build_feature_matrix(df))).reshape(-1)
+    classification = np.where(
+        probabilities >= model.fraud_threshold, 'FRAUD',
+        np.where(probabilities >= model.suspicious_threshold, 'SUSPICIOUS', 'LEGITIMATE')
+    )
+    body = b''.join(
+        b'%s,%.6f,%s\n' % (line, probability, label.encode())
+        for line, probability, label in zip(lines, probabilities.astype(np.float64), classification)
+    )
+    return body, len(df)
+
+
+def run_worker(coordinator_url, model_path, worker_id=None, max_connect_failures=10):
+    """
+    Lease, score and upload tasks until the coordinator reports the job done
+
+    Returns:
+        int: Tasks completed by this worker
+    """
+    from config import Config
+    from .fraud_model import FraudDetectionModel
+
+    worker_id = worker_id or f'{socket.gethostname()}-{os.getpid()}'
+    client = CoordinatorClient(coordinator_url)
+
+    model = FraudDetectionModel(model_path=model_path)
+    model.set_thresholds(Config.FRAUD_THRESHOLD, Config.HIGH_RISK_THRESHOLD)
+    model.load_model()
+    if not model.is_loaded:
+        # Rule-based fallback scores must never end up in a bulk re-score
+        raise SystemExit(f'Model could not be loaded from {model_path}')
+
+    header = None
+    completed = 0
+    connect_failures = 0
+    while True:
+        try:
+            lease = client.request('/lease', {'worker_id': worker_id})
+            connect_failures = 0
+        except (urllib.error.URLError, ConnectionError, socket.timeout) as e:
+            connect_failures += 1
+            if connect_failures >= max_connect_failures:
+                print(f"⚠️ Coordinator unreachable ({e}); worker {worker_id} exiting")
+                return completed
+            time.sleep(min(2 ** connect_failures * 0.1, 5.0))
+            continue
+
+        if lease.get('done'):
+            return completed
+        task = lease.get('task')
+        if task is None:
+            time.sleep(lease.get('retry_after', 1.0))
+            continue
+
+        # Heartbeats keep the lease alive while the chunk is scored
+        stop = threading.Event()
+        lost = threading.Event()
+
+        def heartbeat():
+            while not stop.wait(task['heartbeat_interval']):
+                try:
+                    if not client.request('/heartbeat', {'worker_id': worker_id, 'task_id': task['id']}).get('ok'):
+                        lost.set()
+                        return
+                except (urllib.error.URLError, ConnectionError, socket.timeout):
+                    pass
+
+        beat = threading.Thread(target=heartbeat, name='worker-heartbeat', daemon=True)
+        beat.start()
+        try:
+            started = time.perf_counter()
+            if os.path.exists(task['path']):
+                if header is None:
+                    header = read_header(task['path'])
+                data = read_byte_range(task['path'], task['start'], task['end'])
+            else:
+                if header is None:
+                    header = client.request('/header', method='GET')
+                data = client.request('/data', params={'task': task['id']}, method='GET')
+            body, rows = score_chunk(model, header + data)
+            seconds = time.perf_counter() - started
+        except Exception as e:
+            stop.set()
+            logger.error(f"Task {task['id']} failed: {e}")
+            try:
+                client.request('/fail', {'worker_id': worker_id, 'task_id': task['id'], 'error': str(e)})
+            except (urllib.error.URLError, ConnectionError, socket.timeout):
+                pass
+            continue
+        finally:
+            stop.set()
+            beat.join()
+
+        if lost.is_set():
+            # The lease expired and the task went to another worker
+            continue
+        try:
+            client.request('/complete', body=body, params={
+                'worker': worker_id, 'task': task['id'], 'rows': rows, 'seconds': round(seconds, 6)
+            })
+        except (urllib.error.URLError, ConnectionError, socket.timeout) as e:
+            # The lease runs out and the coordinator hands the task out again
+            logger.error(f"Upload of task {task['id']} failed: {e}")
+            continue
+        completed += 1
+
+
+def spawn_local_workers(count, coordinator_url, model_path):
+    """Start worker processes on this machine (single-host mode)"""
+    return [
+        subprocess.Popen([
+            sys.executable, '-m', 'models.distributed_scoring', 'worker',
+            '--coordinator', coordinator_url, '--model-path', model_path,
+            '--worker-id', f'local-{i}'
+        ], cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        for i in range(count)
+    ]
+
+
+def main():
+    from config import Config
+
+    parser = argparse.ArgumentParser(description='Distributed bulk scoring of transaction CSVs')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    coordinator_parser = commands.add_parser('coordinator', help='Split inputs and serve the work queue')
+    coordinator_parser.add_argument('--input', nargs='+', required=True, help='CSV files with the same header')
+    coordinator_parser.add_argument('--output', required=True, help='Scored CSV (input columns + probability + classification)')
+    coordinator_parser.add_argument('--work-dir', help='Directory for out-of-order parts (default: <output>.parts)')
+    coordinator_parser.add_argument('--host', default='0.0.0.0')
+    coordinator_parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    coordinator_parser.add_argument('--chunk-mb', type=float, default=DEFAULT_CHUNK_MB)
+    coordinator_parser.add_argument('--lease-timeout', type=float, default=DEFAULT_LEASE_TIMEOUT)
+    coordinator_parser.add_argument('--max-attempts', type=int, default=DEFAULT_MAX_ATTEMPTS)
+    coordinator_parser.add_argument('--local-workers', type=int, default=0,
+                                    help='Worker processes to start on this machine')
+    coordinator_parser.add_argument('--model-path', default=Config.MODEL_PATH, help='Model artifacts for local workers')
+
+    worker_parser = commands.add_parser('worker', help='Score tasks leased from a coordinator')
+    worker_parser.add_argument('--coordinator', required=True, help='Coordinator URL, e.g. http://host:8765')
+    worker_parser.add_argument('--model-path', default=Config.MODEL_PATH)
+    worker_parser.add_argument('--worker-id', help='Default: <hostname>-<pid>')
+    args = parser.parse_args()
+
+    if args.command == 'worker':
+        completed = run_worker(args.coordinator, args.model_path, args.worker_id)
+        print(f"✅ Worker finished after {completed} tasks")
+        return
+
+    coordinator = Coordinator(
+        args.input, args.output, work_dir=args.work_dir, chunk_bytes=int(args.chunk_mb * (1 << 20)),
+        lease_timeout=args.lease_timeout, max_attempts=args.max_attempts
+    )
+    server = serve_coordinator(coordinator, args.host, args.port)
+    url = f"http://{'127.0.0.1' if args.host in ('0.0.0.0', '') else args.host}:{server.server_address[1]}"
+    print(f"🚀 Coordinator serving {len(coordinator.tasks)} tasks on {url}")
+
+    workers = spawn_local_workers(args.local_workers, url, args.model_path) if args.local_workers else []
+    try:
+        while not coordinator.finished.wait(5.0):
+            report = coordinator.report()
+            print(f"📊 {report['task_states']} - {report['rows']:,} rows, {report['rows_per_second']} rows/s")
+            if workers and all(worker.poll() is not None for worker in workers):
+                coordinator.abort('All local workers exited before the job finished')
+    except KeyboardInterrupt:
+        coordinator.abort('Interrupted')
+
+    # Workers that lease again now see done=True; give them a moment to exit
+    for worker in workers:
+        try:
+            worker.wait(timeout=coordinator.lease_timeout)
+        except subprocess.TimeoutExpired:
+            worker.terminate()
+    server.shutdown()
+
+    report = coordinator.report()
+    with open(f'{args.output}.report.json', 'w') as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+    if report['error']:
+        raise SystemExit(f"❌ {report['error']}")
+    if not os.listdir(coordinator.work_dir):
+        os.rmdir(coordinator.work_dir)
+
+
+if __name__ == '__main__':
+    main()
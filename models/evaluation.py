@@ -0,0 +1,231 @@
+"""
+Chunked offline evaluation and threshold sweep
+
+Scores a labelled CSV, Parquet file or dataset cache chunk by chunk and
+keeps only fixed-size per-bin counts of fraud and legitimate scores, so
+memory does not grow with the number of rows. From one pass it derives the confusion matrix,
+precision, recall and F1 at every bin edge (the PR curve) and recommends
+FRAUD / SUSPICIOUS cut-offs for Config.FRAUD_THRESHOLD and
+Config.HIGH_RISK_THRESHOLD:
+
+    python -m models.evaluation --data data/labelled.csv --curve-out pr_curve.csv
+"""
+
+import os
+import json
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_BINS = 1000
+DEFAULT_CHUNK_ROWS = 500000
+LABEL_COLUMN = 'isFraud'
+
+
+class ScoreHistogram:
+    """
+    Binned fraud / legitimate score counts
+
+    Thresholds are the bin lower edges: a row counts as predicted fraud at
+    threshold edges[i] if its score falls in bin i or above, so every metric
+    is exact at the bin edges.
+    """
+
+    def __init__(self, bins=DEFAULT_BINS):
+        self.bins = bins
+        self.positives = np.zeros(bins, dtype=np.int64)
+        self.negatives = np.zeros(bins, dtype=np.int64)
+
+    @property
+    def thresholds(self):
+        return np.arange(self.bins, dtype=np.float64) / self.bins
+
+    def update(self, probabilities, labels):
+        """Add a chunk of scores (0-1) and boolean / 0-1 labels"""
+        probabilities = np.asarray(probabilities, dtype=np.float64).reshape(-1)
+        labels = np.asarray(labels).reshape(-1).astype(bool)
+        index = np.clip((probabilities * self.bins).astype(np.int64), 0, self.bins - 1)
+        self.positives += np.bincount(index[labels], minlength=self.bins)
+        self.negatives += np.bincount(index[~labels], minlength=self.bins)
+
+    def merge(self, other):
+        """Add another histogram's counts (e.g. from a parallel shard)"""
+        if other.bins != self.bins:
+            raise ValueError('Histograms must have the same number of bins')
+        self.positives += other.positives
+        self.negatives += other.negatives
+
+    def curve(self):
+        """
+        Confusion counts and metrics at every threshold
+
+        Returns:
+            pd.DataFrame: threshold, tp, fp, fn, tn, precision, recall, f1
+        """
+        # Counts at or above each bin edge: reverse cumulative sums
+        tp = np.cumsum(self.positives[::-1])[::-1]
+        fp = np.cumsum(self.negatives[::-1])[::-1]
+        total_pos = int(self.positives.sum())
+        total_neg = int(self.negatives.sum())
+        fn = total_pos - tp
+        tn = total_neg - fp
+        with np.errstate(divide='ignore', invalid='ignore'):
+            precision = np.where(tp + fp > 0, tp / np.maximum(tp + fp, 1), 1.0)
+            recall = tp / max(total_pos, 1)
+            f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+        return pd.DataFrame({
+            'threshold': self.thresholds,
+            'tp': tp, 'fp': fp, 'fn': fn, 'tn': tn,
+            'precision': precision, 'recall': recall, 'f1': f1
+        })
+
+    def metrics_at(self, threshold):
+        """Confusion counts and metrics at the nearest bin edge at or below threshold"""
+        curve = self.curve()
+        row = curve.iloc[min(int(threshold * self.bins), self.bins - 1)]
+        return {key: (float(value) if key in ('threshold', 'precision', 'recall', 'f1') else int(value))
+                for key, value in row.items()}
+
+
+def recommend_thresholds(histogram, suspicious_recall=0.99, min_fraud_recall=0.0):
+    """
+    Recommend FRAUD and SUSPICIOUS cut-offs from a score histogram
+
+    - FRAUD: threshold with the best F1 among those with recall of at least
+      min_fraud_recall.
+    - SUSPICIOUS: highest threshold (at or below FRAUD) that still reaches
+      suspicious_recall, so the review queue catches nearly every fraud.
+
+    Returns:
+        dict: Cut-offs plus the metrics at each
+    """
+    curve = histogram.curve()
+    eligible = curve[curve['recall'] >= min_fraud_recall]
+    if eligible.empty:
+        eligible = curve
+    fraud_row = eligible.loc[eligible['f1'].idxmax()]
+
+    candidates = curve[(curve['recall'] >= suspicious_recall) & (curve['threshold'] <= fraud_row['threshold'])]
+    suspicious_row = candidates.iloc[-1] if not candidates.empty else curve.iloc[0]
+
+    def summary(row):
+        return {
+            'threshold': round(float(row['threshold']), 6),
+            'precision': round(float(row['precision']), 6),
+            'recall': round(float(row['recall']), 6),
+            'f1': round(float(row['f1']), 6),
+            'tp': int(row['tp']), 'fp': int(row['fp']), 'fn': int(row['fn']), 'tn': int(row['tn'])
+        }
+
+    return {
+        'FRAUD_THRESHOLD': round(float(fraud_row['threshold']), 6),
+        'HIGH_RISK_THRESHOLD': round(float(suspicious_row['threshold']), 6),
+        'fraud': summary(fraud_row),
+        'suspicious': summary(suspicious_row),
+    }
+
+
+def iter_labelled_chunks(data_path, chunk_rows=DEFAULT_CHUNK_ROWS, columns=None):
+    """
+    Yield DataFrame chunks of a labelled CSV, Parquet file or dataset cache
+
+    Parquet is read one record batch at a time and needs pyarrow. A
+    directory is read as a memory-mapped cache built by models.dataset_cache.
+    """
+    if os.path.isdir(data_path):
+        from .dataset_cache import load_dataset, read_meta
+        n_rows = read_meta(data_path)['rows']
+        for start in range(0, n_rows, chunk_rows):
+            yield load_dataset(data_path, columns=columns, rows=(start, min(start + chunk_rows, n_rows)))
+    elif data_path.endswith('.parquet'):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError('Reading Parquet requires pyarrow (pip install pyarrow)')
+        for batch in pq.ParquetFile(data_path).iter_batches(batch_size=chunk_rows, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(data_path, chunksize=chunk_rows, usecols=columns)
+
+
+def evaluate(model, chunks, bins=DEFAULT_BINS, label_column=LABEL_COLUMN, workers=None):
+    """
+    Score labelled chunks and accumulate a ScoreHistogram
+
+    Args:
+        model (FraudDetectionModel): Loaded model
+        chunks (iterable): DataFrames with transaction columns and labels
+        bins (int): Histogram bins (threshold resolution 1 / bins)
+        label_column (str): Name of the 0/1 fraud label column
+        workers (int): Score each chunk with predict_many across this many
+            processes instead of in-process
+
+    Returns:
+        tuple: (ScoreHistogram, rows scored, scoring seconds)
+    """
+    histogram = ScoreHistogram(bins)
+    rows = 0
+    seconds = 0.0
+    for chunk in chunks:
+        labels = chunk[label_column].to_numpy()
+        features = model.build_feature_matrix(chunk)
+        started = time.perf_counter()
+        if workers:
+            probabilities = model.predict_many(features, workers=workers)
+        else:
+            probabilities = model.score_feature_matrix(features)
+        seconds += time.perf_counter() - started
+        histogram.update(probabilities, labels)
+        rows += len(chunk)
+    return histogram, rows, seconds
+
+
+def main():
+    from config import Config
+    from .fraud_model import FraudDetectionModel
+
+    parser = argparse.ArgumentParser(description='Chunked evaluation and threshold sweep for the fraud model')
+    parser.add_argument('--data', required=True, help='Labelled CSV, Parquet file or dataset cache directory (isFraud column)')
+    parser.add_argument('--model-path', default=Config.MODEL_PATH, help='Model artifact directory')
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument('--bins', type=int, default=DEFAULT_BINS)
+    parser.add_argument('--workers', type=int, default=None, help='Score chunks across processes')
+    parser.add_argument('--suspicious-recall', type=float, default=0.99,
+                        help='Recall the SUSPICIOUS cut-off must reach')
+    parser.add_argument('--min-fraud-recall', type=float, default=0.0,
+                        help='Minimum recall for the FRAUD cut-off')
+    parser.add_argument('--curve-out', help='Write the full PR curve to this CSV')
+    args = parser.parse_args()
+
+    model = FraudDetectionModel(model_path=args.model_path)
+    model.load_model()
+    if not model.is_loaded:
+        raise SystemExit(f"Model could not be loaded from {args.model_path}")
+
+    histogram, rows, seconds = evaluate(
+        model, iter_labelled_chunks(args.data, args.chunk_rows), bins=args.bins, workers=args.workers
+    )
+    model.shutdown_pool()
+
+    report = {
+        'data': os.path.abspath(args.data),
+        'rows': rows,
+        'frauds': int(histogram.positives.sum()),
+        'scoring_seconds': round(seconds, 3),
+        'rows_per_second': round(rows / seconds, 1) if seconds else None,
+        'current': {
+            'fraud': histogram.metrics_at(Config.FRAUD_THRESHOLD),
+            'suspicious': histogram.metrics_at(Config.HIGH_RISK_THRESHOLD),
+        },
+        'recommended': recommend_thresholds(histogram, args.suspicious_recall, args.min_fraud_recall),
+    }
+    if args.curve_out:
+        histogram.curve().to_csv(args.curve_out, index=False)
+        report['curve'] = os.path.abspath(args.curve_out)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+
+# Column order used when the model was trained (fallback when
+# feature_names.pkl is missing)
+DEFAULT_FEATURE_NAMES = [
+    'step', 'amount', 'oldbalanceOrg', 'newbalanceOrig',
+    'oldbalanceDest', 'newbalanceDest', 'isFlaggedFraud',
+    'balance_diff_orig', 'balance_diff_dest',
+    'type_CASH_IN', 'type_CASH_OUT', 'type_DEBIT',
+    'type_PAYMENT', 'type_TRANSFER'
+]
+
+# Columns the StandardScaler was fitted on, in fit order
+NUMERICAL_FEATURES = [
+    'step', 'amount', 'oldbalanceOrg', 'newbalanceOrig',
+    'oldbalanceDest', 'newbalanceDest', 'balance_diff_orig', 'balance_diff_dest'
+]
+
+# Values used by preprocess_transaction for missing fields
+FIELD_DEFAULTS = {
+    'step': 1,
+    'amount': 0,
+    'oldbalanceOrg': 0,
+    'newbalanceOrig': 0,
+    'oldbalanceDest': 0,
+    'newbalanceDest': 0,
+    'isFlaggedFraud': 0,
+    'type': 'PAYMENT',
+}
+
+
+def build_feature_matrix(transactions, feature_names=None):
+    """
+    Build the raw (unscaled) feature matrix for many transactions at once
+
+    Vectorised equivalent of FraudDetectionModel.preprocess_transaction
+    before scaling: same engineered balance differences, same one-hot type
+    columns and same defaults for missing fields.
+
+    Args:
+        transactions (list or pd.DataFrame): Transaction dicts / rows
+        feature_names (list): Column order (defaults to DEFAULT_FEATURE_NAMES)
+
+    Returns:
+        np.ndarray: float32 matrix of shape (n, len(feature_names))
+    """
+    feature_names = feature_names or DEFAULT_FEATURE_NAMES
+    if isinstance(transactions, pd.DataFrame):
+        df = transactions
+    else:
+        df = pd.DataFrame(list(transactions))
+
+    def column(name):
+        default = FIELD_DEFAULTS.get(name, 0)
+        if name not in df.columns:
+            return np.full(len(df), default)
+        values = df[name]
+        if name == 'type':
+            return values.fillna(default).to_numpy()
+        return pd.to_numeric(values, errors='coerce').fillna(default).to_numpy(dtype=np.float64)
+
+    matrix = np.zeros((len(df), len(feature_names)), dtype=np.float32)
+    types = None
+    for j, name in enumerate(feature_names):
+        if name.startswith('type_'):
+            if types is None:
+                types = column('type')
+            matrix[:, j] = types == name[len('type_'):]
+        elif name == 'balance_diff_orig':
+            matrix[:, j] = column('oldbalanceOrg') - column('newbalanceOrig')
+        elif name == 'balance_diff_dest':
+            matrix[:, j] = column('newbalanceDest') - column('oldbalanceDest')
+        else:
+            matrix[:, j] = column(name)
+    return matrix
+
+
+def scale_feature_matrix(matrix, scaler, feature_names=None):
+    """
+    Apply the fitted scaler to the numerical columns of a raw feature matrix
+
+    Returns a new float32 matrix; the input is left untouched.
+    """
+    feature_names = feature_names or DEFAULT_FEATURE_NAMES
+    scaled = np.array(matrix, dtype=np.float32, copy=True)
+    if scaler is None:
+        return scaled
+
+    columns = [name for name in NUMERICAL_FEATURES if name in feature_names]
+    idx = [feature_names.index(name) for name in columns]
+
+    mean = getattr(scaler, 'mean_', None)
+    scale = getattr(scaler, 'scale_', None)
+    if scale is not None and len(scale) == len(idx):
+        # StandardScaler: apply the affine transform directly instead of
+        # going through a DataFrame round trip per call
+        block = scaled[:, idx]
+        if mean is not None:
+            block -= mean.astype(np.float32)
+        block /= scale.astype(np.float32)
+        scaled[:, idx] = block
+    else:
+        scaled[:, idx] = scaler.transform(pd.DataFrame(scaled[:, idx], columns=columns))
+    return scaled
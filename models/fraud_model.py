@@ -1,9 +1,46 @@
 import numpy as np
 import pandas as pd
 import joblib
-import tensorflow as tf
-from tensorflow.keras.models import load_model as keras_load_model
 import os
+import time
+import threading
+
+from .dense_network import DenseNetwork
+from .features import (
+    DEFAULT_FEATURE_NAMES, NUMERICAL_FEATURES,
+    build_feature_matrix, scale_feature_matrix
+)
+from .parallel_scoring import ShardedScorer, DEFAULT_MIN_PARALLEL_ROWS
+from .attribution import ATTRIBUTION_METHODS, integrated_gradients, gradient_x_input
+
+# Padded batch shapes for bucketed Keras execution. Every batch is padded up
+# to one of these sizes (larger batches are split), so TensorFlow only ever
+# sees a handful of fixed input shapes and never retraces after warmup.
+DEFAULT_BATCH_BUCKETS = (1, 8, 32, 128, 512)
+
+# Default classification cut-offs (Config.FRAUD_THRESHOLD / HIGH_RISK_THRESHOLD
+# override them for the DNN via set_thresholds; `python -m models.evaluation`
+# recommends values from labelled data). The rule-based fallback score is
+# calibrated against these defaults and always uses them.
+DEFAULT_FRAUD_THRESHOLD = 0.5
+DEFAULT_SUSPICIOUS_THRESHOLD = 0.3
+
+# NumPy student network written by models/distillation.py; loaded when an
+# artifact directory has no fraud_detection_model.h5
+STUDENT_MODEL_FILE = 'student_model.npz'
+
+# Display names for layer activations in get_model_info
+ACTIVATION_LABELS = {'relu': 'ReLU', 'sigmoid': 'Sigmoid', 'linear': 'Linear', 'tanh': 'Tanh'}
+
+# Representative transactions run through the model during warmup
+WARMUP_TRANSACTIONS = [
+    {'type': 'TRANSFER', 'amount': 250000, 'oldbalanceOrg': 500000, 'newbalanceOrig': 250000,
+     'oldbalanceDest': 100000, 'newbalanceDest': 350000, 'isFlaggedFraud': 0, 'step': 150},
+    {'type': 'PAYMENT', 'amount': 1000, 'oldbalanceOrg': 50000, 'newbalanceOrig': 49000,
+     'oldbalanceDest': 0, 'newbalanceDest': 1000, 'isFlaggedFraud': 0, 'step': 100},
+    {'type': 'CASH_OUT', 'amount': 300000, 'oldbalanceOrg': 300000, 'newbalanceOrig': 0,
+     'oldbalanceDest': 0, 'newbalanceDest': 300000, 'isFlaggedFraud': 0, 'step': 200},
+]
 
 class FraudDetectionModel:
     """
@@ -17,10 +54,35 @@ class FraudDetectionModel:
         self.scaler = None
         self.feature_names = None
         self.is_loaded = False
+        self.backend = None  # 'keras' or 'numpy'
+        self.is_student = False  # True when serving a distilled student artifact
+        self._sharded_scorer = None
+        self._exported_network = None
+        self.batch_buckets = None  # Set by enable_bucketing
+        self._bucket_functions = {}
+        self._bucket_lock = threading.Lock()
+        self.is_ready = False  # True once warmup has run
+        self.warmup_seconds = None
+        self.cascade = None  # Set by enable_cascade
+        self.fraud_threshold = DEFAULT_FRAUD_THRESHOLD
+        self.suspicious_threshold = DEFAULT_SUSPICIOUS_THRESHOLD
+        
+    def load_model(self, isolate_keras=False):
+        """
+        Load the trained model and preprocessors
         
-    def load_model(self):
-        """Load the trained model and preprocessors"""
+        Args:
+            isolate_keras (bool): Convert fraud_detection_model.h5 to a
+                DenseNetwork in a child process instead of loading Keras here,
+                so this process never starts the TF runtime (required before
+                os.fork(), e.g. in prefork_server.py)
+        """
         print("🚀 Starting model loading process...")
+        self.shutdown_pool()
+        self._exported_network = None
+        self._bucket_functions = {}
+        self.is_ready = False
+        self.is_student = False
         
         try:
             # Check current working directory and paths
@@ -29,14 +91,31 @@ class FraudDetectionModel:
             
             # Load the trained model
             model_file = os.path.join(self.model_path, 'fraud_detection_model.h5')
+            student_file = os.path.join(self.model_path, STUDENT_MODEL_FILE)
             print(f"🔍 Looking for model at: {os.path.abspath(model_file)}")
             print(f"🔍 Model file exists: {os.path.exists(model_file)}")
             
-            if os.path.exists(model_file):
+            if os.path.exists(model_file) and isolate_keras:
+                print("📦 Converting Keras model in a child process...")
+                self.model = DenseNetwork.from_keras_file_isolated(model_file)
+                self.backend = 'numpy'
+                print(f"✅ Keras weights loaded as a NumPy network ({self.model.architecture})")
+            elif os.path.exists(model_file):
                 print("📦 Loading Keras model...")
+                # Imported lazily so processes serving from a DenseNetwork
+                # (e.g. pre-forked workers) never start the TF runtime
+                from tensorflow.keras.models import load_model as keras_load_model
                 self.model = keras_load_model(model_file)
+                self.backend = 'keras'
                 print("✅ Keras model loaded successfully!")
                 print(f"📊 Model input shape: {self.model.input_shape}")
+            elif os.path.exists(student_file):
+                # Distilled student artifact (python -m models.distillation)
+                print("📦 Loading distilled student network...")
+                self.model = DenseNetwork.load(student_file)
+                self.backend = 'numpy'
+                self.is_student = True
+                print(f"✅ Student network loaded ({self.model.architecture})")
             else:
                 print(f"❌ Model file not found at: {model_file}")
                 self.model = None
@@ -68,13 +147,7 @@ class FraudDetectionModel:
             else:
                 print(f"❌ Feature names file not found at: {features_file}")
                 # Use default feature names if file doesn't exist
-                self.feature_names = [
-                    'step', 'amount', 'oldbalanceOrg', 'newbalanceOrig',
-                    'oldbalanceDest', 'newbalanceDest', 'isFlaggedFraud',
-                    'balance_diff_orig', 'balance_diff_dest',
-                    'type_CASH_IN', 'type_CASH_OUT', 'type_DEBIT', 
-                    'type_PAYMENT', 'type_TRANSFER'
-                ]
+                self.feature_names = list(DEFAULT_FEATURE_NAMES)
                 print("⚠️ Using default feature names")
             
             # Mark as loaded if model exists
@@ -99,8 +172,43 @@ class FraudDetectionModel:
             self.is_loaded = False
             self.model = None
             self.scaler = None
+            self.backend = None
             print("🔄 Falling back to rule-based prediction")
     
+    def export_network(self):
+        """
+        Return the loaded model as a NumPy DenseNetwork
+        
+        Returns:
+            DenseNetwork or None if no model is loaded
+        """
+        if self.model is None:
+            return None
+        if isinstance(self.model, DenseNetwork):
+            return self.model
+        if self._exported_network is None:
+            self._exported_network = DenseNetwork.from_keras(self.model)
+        return self._exported_network
+    
+    def attach_network(self, network, scaler=None, feature_names=None):
+        """
+        Serve predictions from an already-built DenseNetwork
+        
+        Used by worker processes that share weights loaded by a parent
+        process instead of loading fraud_detection_model.h5 themselves.
+        """
+        self.shutdown_pool()
+        self._exported_network = None
+        self._bucket_functions = {}
+        self.is_ready = False
+        self.model = network
+        self.backend = 'numpy'
+        if scaler is not None:
+            self.scaler = scaler
+        if feature_names is not None:
+            self.feature_names = feature_names
+        self.is_loaded = network is not None
+    
     def preprocess_transaction(self, transaction_data):
         """
         Preprocess a single transaction for prediction
@@ -162,9 +270,7 @@ class FraudDetectionModel:
             # Scale numerical features if scaler is available
             if self.scaler:
                 print("⚖️ Applying feature scaling...")
-                numerical_features = ['step', 'amount', 'oldbalanceOrg', 'newbalanceOrig', 
-                                    'oldbalanceDest', 'newbalanceDest', 'balance_diff_orig', 'balance_diff_dest']
-                numerical_features = [col for col in numerical_features if col in df.columns]
+                numerical_features = [col for col in NUMERICAL_FEATURES if col in df.columns]
                 df[numerical_features] = self.scaler.transform(df[numerical_features])
                 print("✅ Feature scaling applied")
             else:
@@ -178,12 +284,14 @@ class FraudDetectionModel:
             traceback.print_exc()
             return None
     
-    def predict_fraud_probability(self, transaction_data):
+    def predict_fraud_probability(self, transaction_data, screened=False):
         """
         Predict fraud probability for a transaction
         
         Args:
             transaction_data (dict): Transaction data
+            screened (bool): The caller already ran the cascade rule stage on
+                this row and it escalated, so it is not screened again
             
         Returns:
             dict: Prediction results with probability, classification, and confidence
@@ -194,6 +302,13 @@ class FraudDetectionModel:
             print("🔄 Model not loaded, attempting to load...")
             self.load_model()
         
+        # Clearly low-risk rows are decided by the rule stage without the DNN
+        if self.cascade is not None and self.is_loaded and not screened:
+            cascade_result = self.cascade.screen(transaction_data)
+            if cascade_result is not None:
+                print("⚡ Decided by cascade rule stage")
+                return cascade_result
+        
         try:
             # Preprocess the transaction
             processed_features = self.preprocess_transaction(transaction_data)
@@ -205,22 +320,14 @@ class FraudDetectionModel:
             # Make prediction using the model
             if self.model and self.is_loaded:
                 print("🧠 Using Deep Neural Network for prediction...")
-                probability = self.model.predict(processed_features, verbose=0)[0][0]
+                probability = self._run_model(processed_features)[0]
                 confidence = min(0.99, 0.85 + abs(probability - 0.5) * 0.28)  # Higher confidence for extreme predictions
                 
                 print(f"📊 Neural network probability: {probability:.4f}")
                 print(f"📊 Confidence score: {confidence:.4f}")
                 
                 # Classify based on probability
-                if probability >= 0.5:
-                    classification = 'FRAUD'
-                    risk_level = 'High'
-                elif probability >= 0.3:
-                    classification = 'SUSPICIOUS' 
-                    risk_level = 'Medium'
-                else:
-                    classification = 'LEGITIMATE'
-                    risk_level = 'Low'
+                classification, risk_level = self.classify_probability(probability)
                 
                 result = {
                     'probability': float(probability),
@@ -230,6 +337,8 @@ class FraudDetectionModel:
                     'model_used': 'Deep Neural Network',
                     'features_used': self.feature_names
                 }
+                if self.cascade is not None:
+                    result['decided_by'] = 'model'
                 
                 print(f"🎯 Prediction result: {classification} (probability: {probability:.3f})")
                 return result
@@ -245,6 +354,250 @@ class FraudDetectionModel:
             print("🔄 Falling back to rule-based prediction")
             return self._fallback_prediction(transaction_data)
     
+    def build_feature_matrix(self, transactions):
+        """
+        Build the raw (unscaled) feature matrix for many transactions
+        
+        Args:
+            transactions (list or pd.DataFrame): Transaction dicts / rows
+            
+        Returns:
+            np.array: float32 matrix in feature_names order
+        """
+        return build_feature_matrix(transactions, self.feature_names or DEFAULT_FEATURE_NAMES)
+    
+    def score_feature_matrix(self, features):
+        """
+        Scale and score a raw feature matrix in this process
+        
+        Returns:
+            np.array: fraud probabilities, shape (n,)
+        """
+        scaled = scale_feature_matrix(features, self.scaler, self.feature_names or DEFAULT_FEATURE_NAMES)
+        return self._run_model(scaled)
+    
+    def enable_cascade(self, cascade):
+        """
+        Put a rule stage in front of the model (see models/cascade.py)
+        
+        Args:
+            cascade (ScoringCascade): Cascade to use, or None to disable
+        """
+        self.cascade = cascade
+    
+    def enable_bucketing(self, buckets=DEFAULT_BATCH_BUCKETS):
+        """
+        Run the Keras model through fixed-shape compiled functions
+        
+        Batches are zero-padded up to the nearest bucket size and the
+        padding rows are stripped from the output. Each bucket has its own
+        concrete tf.function with a fixed input signature, so a new batch
+        size never triggers a retrace. Has no effect on the NumPy backend,
+        which does not trace.
+        
+        Args:
+            buckets (iterable): Padded batch sizes; None disables bucketing
+        """
+        self.batch_buckets = sorted(set(int(b) for b in buckets)) if buckets else None
+        self._bucket_functions = {}
+    
+    def _get_bucket_function(self, bucket):
+        """Build (once) the concrete function for one padded batch size"""
+        function = self._bucket_functions.get(bucket)
+        if function is None:
+            with self._bucket_lock:
+                function = self._bucket_functions.get(bucket)
+                if function is None:
+                    import tensorflow as tf
+                    model = self.model
+                    n_features = model.input_shape[-1]
+                    function = tf.function(
+                        lambda x: model(x, training=False),
+                        input_signature=[tf.TensorSpec([bucket, n_features], tf.float32)]
+                    ).get_concrete_function()
+                    self._bucket_functions[bucket] = function
+        return function
+    
+    def _run_model(self, scaled):
+        """
+        Run the network on scaled features
+        
+        Returns:
+            np.array: fraud probabilities, shape (n,)
+        """
+        if isinstance(self.model, DenseNetwork):
+            return self.model.predict(scaled).reshape(-1)
+        if not self.batch_buckets:
+            return self.model.predict(scaled, batch_size=4096, verbose=0).reshape(-1)
+        
+        scaled = np.asarray(scaled, dtype=np.float32)
+        n_rows, n_features = scaled.shape
+        probabilities = np.empty(n_rows, dtype=np.float32)
+        largest = self.batch_buckets[-1]
+        start = 0
+        while start < n_rows:
+            rows = min(n_rows - start, largest)
+            bucket = next(size for size in self.batch_buckets if size >= rows)
+            chunk = scaled[start:start + rows]
+            if rows < bucket:
+                padded = np.zeros((bucket, n_features), dtype=np.float32)
+                padded[:rows] = chunk
+                chunk = padded
+            output = self._get_bucket_function(bucket)(chunk)
+            probabilities[start:start + rows] = np.asarray(output).reshape(-1)[:rows]
+            start += rows
+        return probabilities
+    
+    def warmup(self, transactions=None):
+        """
+        Run representative batches through every execution path
+        
+        Traces and compiles each bucket (or the default Keras predict path)
+        and the single-transaction preprocessing path so the first real
+        requests after a deploy do not pay for graph construction.
+        
+        Returns:
+            float: Seconds spent warming up
+        """
+        started = time.time()
+        if not self.is_loaded:
+            self.load_model()
+        
+        if self.model is not None:
+            samples = transactions or WARMUP_TRANSACTIONS
+            base = self.build_feature_matrix(samples)
+            sizes = self.batch_buckets or sorted({1, len(base)})
+            print(f"🔥 Warming up model with batch sizes {sizes}...")
+            for size in sizes:
+                self.score_feature_matrix(np.resize(base, (size, base.shape[1])))
+            self.predict_fraud_probability(dict(samples[0]))
+        
+        self.warmup_seconds = time.time() - started
+        self.is_ready = True
+        print(f"✅ Warmup finished in {self.warmup_seconds:.2f}s")
+        return self.warmup_seconds
+    
+    def predict_many(self, features, workers=None, min_parallel_rows=DEFAULT_MIN_PARALLEL_ROWS):
+        """
+        Score a large raw feature matrix on a persistent process pool
+        
+        The matrix is split into row shards scored by worker processes that
+        attach the network weights once and exchange inputs/outputs through
+        shared memory. Small matrices (or workers=1) are scored in-process.
+        
+        Args:
+            features (np.array): (n, n_features) unscaled features, e.g. from
+                build_feature_matrix
+            workers (int): Worker processes (default: CPU count)
+            min_parallel_rows (int): Below this many rows, score in-process
+            
+        Returns:
+            np.array: fraud probabilities, shape (n,)
+        """
+        if not self.is_loaded:
+            self.load_model()
+        if self.model is None:
+            raise RuntimeError('No neural network model loaded')
+        
+        features = np.ascontiguousarray(features, dtype=np.float32)
+        workers = workers or os.cpu_count() or 1
+        if workers <= 1 or len(features) < min_parallel_rows:
+            return self.score_feature_matrix(features)
+        
+        if self._sharded_scorer is None or self._sharded_scorer.workers != workers:
+            self.shutdown_pool()
+            print(f"🧵 Starting scoring pool with {workers} workers...")
+            self._sharded_scorer = ShardedScorer(
+                self.export_network(), self.scaler,
+                self.feature_names or DEFAULT_FEATURE_NAMES, workers
+            )
+        return self._sharded_scorer.score(features)
+    
+    def shutdown_pool(self):
+        """Stop the predict_many worker pool, if one is running"""
+        if self._sharded_scorer is not None:
+            self._sharded_scorer.shutdown()
+            self._sharded_scorer = None
+    
+    def set_thresholds(self, fraud_threshold, suspicious_threshold):
+        """
+        Set the FRAUD and SUSPICIOUS cut-offs used for model probabilities
+        
+        Raises:
+            ValueError: If the cut-offs are outside [0, 1] or out of order
+        """
+        if not 0.0 <= suspicious_threshold <= fraud_threshold <= 1.0:
+            raise ValueError(
+                f"Thresholds must satisfy 0 <= suspicious ({suspicious_threshold}) "
+                f"<= fraud ({fraud_threshold}) <= 1"
+            )
+        self.fraud_threshold = float(fraud_threshold)
+        self.suspicious_threshold = float(suspicious_threshold)
+    
+    def classify_probability(self, probability, fraud_threshold=None, suspicious_threshold=None):
+        """
+        Map a fraud probability to (classification, risk_level)
+        
+        Uses the model's configured cut-offs unless others are given.
+        """
+        fraud_threshold = self.fraud_threshold if fraud_threshold is None else fraud_threshold
+        suspicious_threshold = self.suspicious_threshold if suspicious_threshold is None else suspicious_threshold
+        if probability >= fraud_threshold:
+            return 'FRAUD', 'High'
+        elif probability >= suspicious_threshold:
+            return 'SUSPICIOUS', 'Medium'
+        return 'LEGITIMATE', 'Low'
+    
+    def explain(self, transactions, method='integrated_gradients', steps=32, top_k=5):
+        """
+        Per-feature attributions for a batch of transactions
+        
+        Attributions are computed on the scaled inputs against a zero
+        baseline (the training mean, with no transaction type) in one
+        vectorised pass over the network weights.
+        
+        Args:
+            transactions (list): Transaction dicts
+            method (str): 'integrated_gradients' or 'gradient_x_input'
+            steps (int): Interpolation steps for integrated gradients
+            top_k (int): Number of strongest features to list per row
+            
+        Returns:
+            list: One dict per transaction with probability, classification,
+                attributions (feature -> value) and top_features
+        """
+        if method not in ATTRIBUTION_METHODS:
+            raise ValueError(f'Unknown attribution method: {method}. Must be one of: {ATTRIBUTION_METHODS}')
+        if not self.is_loaded:
+            self.load_model()
+        network = self.export_network()
+        if network is None:
+            raise RuntimeError('Attributions require the neural network model')
+        
+        feature_names = self.feature_names or DEFAULT_FEATURE_NAMES
+        scaled = scale_feature_matrix(self.build_feature_matrix(transactions), self.scaler, feature_names)
+        if method == 'integrated_gradients':
+            probabilities, attributions = integrated_gradients(network, scaled, steps=steps)
+        else:
+            probabilities, attributions = gradient_x_input(network, scaled)
+        
+        explanations = []
+        for probability, row in zip(probabilities, attributions):
+            classification, risk_level = self.classify_probability(probability)
+            order = np.argsort(-np.abs(row))[:top_k]
+            explanations.append({
+                'probability': float(probability),
+                'classification': classification,
+                'risk_level': risk_level,
+                'method': method,
+                'attributions': {name: float(value) for name, value in zip(feature_names, row)},
+                'top_features': [
+                    {'feature': feature_names[j], 'attribution': float(row[j])}
+                    for j in order
+                ]
+            })
+        return explanations
+    
     def _fallback_prediction(self, transaction_data):
         """
         Fallback prediction when model is not available
@@ -292,15 +645,9 @@ class FraudDetectionModel:
             risk_score = max(0.0, min(1.0, risk_score))
             
             # Classification
-            if risk_score >= 0.5:
-                classification = 'FRAUD'
-                risk_level = 'High'
-            elif risk_score >= 0.3:
-                classification = 'SUSPICIOUS'
-                risk_level = 'Medium'
-            else:
-                classification = 'LEGITIMATE'
-                risk_level = 'Low'
+            classification, risk_level = self.classify_probability(
+                risk_score, DEFAULT_FRAUD_THRESHOLD, DEFAULT_SUSPICIOUS_THRESHOLD
+            )
             
             result = {
                 'probability': risk_score,
@@ -325,14 +672,44 @@ class FraudDetectionModel:
                 'error': str(e)
             }
     
+    @property
+    def model_type(self):
+        """Short model description, without building the full get_model_info dict"""
+        if not (self.model and self.is_loaded):
+            return 'Rule-based Fallback'
+        return 'Distilled Student' if self.is_student else 'Deep Neural Network'
+    
+    def describe_layers(self):
+        """
+        Architecture and activations read from the loaded network's layers
+        
+        Returns:
+            tuple: (architecture such as '128→64→32→1', activations such as 'ReLU + Sigmoid')
+        """
+        if isinstance(self.model, DenseNetwork):
+            layers = [(kernel.shape[1], activation) for kernel, _, activation in self.model.layers]
+        else:
+            configs = [layer.get_config() for layer in self.model.layers]
+            layers = [(config['units'], config.get('activation', 'linear')) for config in configs if 'units' in config]
+        activations = []
+        for _, activation in layers:
+            label = ACTIVATION_LABELS.get(activation, activation)
+            if label not in activations:
+                activations.append(label)
+        return '→'.join(str(units) for units, _ in layers), ' + '.join(activations)
+    
     def get_model_info(self):
         """Get information about the loaded model"""
         if self.model and self.is_loaded:
+            architecture, activation = self.describe_layers()
             return {
-                'model_type': 'Deep Neural Network',
+                'model_type': self.model_type,
                 'input_features': len(self.feature_names) if self.feature_names else 'Unknown',
-                'architecture': '128→64→32→1',
-                'activation': 'ReLU + Sigmoid',
+                'architecture': architecture,
+                'activation': activation,
+                'backend': self.backend,
+                'cascade_enabled': self.cascade is not None,
+                'thresholds': {'fraud': self.fraud_threshold, 'suspicious': self.suspicious_threshold},
                 'is_loaded': self.is_loaded,
                 'features': self.feature_names,
                 'model_summary': f"Input shape: {self.model.input_shape if self.model else 'N/A'}"
@@ -0,0 +1,133 @@
+import os
+import atexit
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .dense_network import DenseNetwork
+from .features import scale_feature_matrix
+
+# Below this many rows, process start-up and shard hand-off cost more than
+# the forward pass itself, so predict_many scores in-process
+DEFAULT_MIN_PARALLEL_ROWS = 50000
+DEFAULT_SHARDS_PER_WORKER = 4
+
+# Per-process state of pool workers, set once by _init_worker
+_worker_state = {}
+
+
+def _init_worker(network_spec, scaler, feature_names):
+    """Pool initializer: attach the shared weights once per worker process"""
+    _worker_state['network'] = DenseNetwork.from_shared_memory(network_spec)
+    _worker_state['scaler'] = scaler
+    _worker_state['feature_names'] = feature_names
+
+
+def _score_shard(task):
+    """Scale and score rows [start, stop) of the shared input into the shared output"""
+    input_name, output_name, n_rows, n_cols, start, stop = task
+    input_block = shared_memory.SharedMemory(name=input_name)
+    output_block = shared_memory.SharedMemory(name=output_name)
+    try:
+        features = np.ndarray((n_rows, n_cols), dtype=np.float32, buffer=input_block.buf)
+        output = np.ndarray((n_rows,), dtype=np.float32, buffer=output_block.buf)
+        scaled = scale_feature_matrix(features[start:stop], _worker_state['scaler'], _worker_state['feature_names'])
+        output[start:stop] = _worker_state['network'].predict(scaled).reshape(-1)
+        # Views must be released before the blocks can be closed
+        del features, output
+    finally:
+        input_block.close()
+        output_block.close()
+    return stop - start
+
+
+def _pool_context():
+    """Avoid plain fork: the parent may hold TensorFlow threads and locks"""
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+
+class ShardedScorer:
+    """
+    Persistent process pool that scores large feature matrices in shards
+
+    Each worker attaches the network weights from one SharedMemory block when
+    it starts and keeps them for its lifetime. Per call, the input matrix and
+    the output vector live in shared memory too, so only small
+    (block name, row range) tasks cross the process boundary.
+    """
+
+    def __init__(self, network, scaler, feature_names, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.feature_names = feature_names
+        self._owns_weights = network.shared_block is None
+        self.network = network.to_shared_memory() if self._owns_weights else network
+        self.pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=_pool_context(),
+            initializer=_init_worker,
+            initargs=(self.network.shared_spec, scaler, feature_names)
+        )
+        self._lock = threading.Lock()
+        self._closed = False
+        atexit.register(self.shutdown)
+
+    def score(self, matrix, shard_rows=None):
+        """
+        Score a raw (unscaled) feature matrix
+
+        Args:
+            matrix (np.ndarray): (n, n_features) float32 features
+            shard_rows (int): Rows per task (default: n / (workers * 4))
+
+        Returns:
+            np.ndarray: fraud probabilities, shape (n,)
+        """
+        if self._closed:
+            raise RuntimeError('ShardedScorer has been shut down')
+        matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        n_rows, n_cols = matrix.shape
+        if n_rows == 0:
+            return np.zeros(0, dtype=np.float32)
+
+        shard_rows = shard_rows or -(-n_rows // (self.workers * DEFAULT_SHARDS_PER_WORKER))
+        input_block = shared_memory.SharedMemory(create=True, size=matrix.nbytes)
+        output_block = shared_memory.SharedMemory(create=True, size=n_rows * 4)
+        try:
+            shared_input = np.ndarray(matrix.shape, dtype=np.float32, buffer=input_block.buf)
+            shared_input[...] = matrix
+            del shared_input
+
+            futures = [
+                self.pool.submit(_score_shard, (
+                    input_block.name, output_block.name, n_rows, n_cols,
+                    start, min(start + shard_rows, n_rows)
+                ))
+                for start in range(0, n_rows, shard_rows)
+            ]
+            for future in futures:
+                future.result()
+
+            shared_output = np.ndarray((n_rows,), dtype=np.float32, buffer=output_block.buf)
+            probabilities = shared_output.copy()
+            del shared_output
+        finally:
+            input_block.close()
+            input_block.unlink()
+            output_block.close()
+            output_block.unlink()
+        return probabilities
+
+    def shutdown(self):
+        """Stop the worker processes and free the shared weights"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self.pool.shutdown(wait=True)
+        if self._owns_weights:
+            self.network.release(unlink=True)
+        atexit.unregister(self.shutdown)
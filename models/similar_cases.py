@@ -0,0 +1,279 @@
+"""
+Similar known-fraud case retrieval
+
+Investigators reviewing a flagged transaction want the closest confirmed
+fraud cases from history (e.g. the 1,643 test-set frauds in the README).
+The index holds one vector per labelled fraud and answers batched top-k
+queries with a scikit-learn KD-tree:
+
+    python -m models.similar_cases --data data/labelled.csv --space embedding
+
+- space='scaled' indexes the scaled feature_names vectors the model sees.
+  space='embedding' indexes the network's penultimate-layer activations
+  (32 units for the 128 -> 64 -> 32 -> 1 DNN). Those distances reflect what
+  the model considers alike rather than raw magnitudes.
+- The index is saved as similar_cases.pkl inside the model artifact
+  directory, next to scaler.pkl and feature_names.pkl, as a plain dict (no
+  pickled module classes, so it loads the same however it was built). It
+  stores SHA-1 fingerprints of the scaler and, for the embedding space, of
+  the network weights it was built with, so it is never queried after a
+  retrain, a scaler change or with a different network.
+- A few thousand cases in 14-32 dimensions fit comfortably in a KD-tree.
+  Batched queries run in well under a millisecond per query.
+"""
+
+import os
+import json
+import time
+import hashlib
+import argparse
+
+import joblib
+import numpy as np
+
+from .evaluation import iter_labelled_chunks, LABEL_COLUMN
+from .features import DEFAULT_FEATURE_NAMES, scale_feature_matrix
+
+INDEX_FILE = 'similar_cases.pkl'
+INDEX_FORMAT = 2
+SPACES = ('scaled', 'embedding')
+DEFAULT_LEAF_SIZE = 40
+
+# Transaction fields kept with each indexed case
+CASE_FIELDS = [
+    'step', 'type', 'amount', 'oldbalanceOrg', 'newbalanceOrig',
+    'oldbalanceDest', 'newbalanceDest', 'isFlaggedFraud', 'nameOrig', 'nameDest'
+]
+
+
+def transaction_vectors(model, raw_features, space):
+    """
+    Map raw feature rows into the index space of a loaded FraudDetectionModel
+
+    Returns:
+        np.ndarray: float32 (n, dims) vectors
+    """
+    scaled = np.asarray(
+        scale_feature_matrix(raw_features, model.scaler, model.feature_names or DEFAULT_FEATURE_NAMES),
+        dtype=np.float32
+    )
+    if space == 'scaled':
+        return scaled
+    network = model.export_network()
+    if network is None:
+        raise RuntimeError('Embedding space needs a loaded network')
+    x = scaled
+    for kernel, bias, activation in network.layers[:-1]:
+        x = x @ kernel
+        x += bias
+        x = np.maximum(x, 0.0) if activation == 'relu' else x
+    return np.ascontiguousarray(x, dtype=np.float32)
+
+
+def _network_signature(model):
+    network = model.export_network()
+    return network.architecture if network is not None else None
+
+
+def _digest(arrays):
+    sha = hashlib.sha1()
+    for array in arrays:
+        array = np.ascontiguousarray(array)
+        sha.update(str((array.dtype.str, array.shape)).encode())
+        sha.update(array.tobytes())
+    return sha.hexdigest()
+
+
+def scaler_fingerprint(scaler):
+    """SHA-1 of a fitted StandardScaler's mean_ and scale_ (None without a scaler)"""
+    if scaler is None:
+        return None
+    arrays = [getattr(scaler, name) for name in ('mean_', 'scale_') if getattr(scaler, name, None) is not None]
+    if not arrays:
+        raise ValueError('Scaler has no mean_/scale_ to fingerprint')
+    return _digest(arrays)
+
+
+def network_fingerprint(model):
+    """SHA-1 of the loaded network's kernels and biases (None without a network)"""
+    network = model.export_network()
+    if network is None:
+        return None
+    return _digest([array for kernel, bias, _ in network.layers for array in (kernel, bias)])
+
+
+class SimilarCaseIndex:
+    """KD-tree over known fraud cases with batched top-k lookup"""
+
+    def __init__(self, tree, cases, space, feature_names, architecture=None, metadata=None,
+                 scaler_digest=None, network_digest=None):
+        self.tree = tree
+        self.cases = cases  # List of case dicts, aligned with the tree's rows
+        self.space = space
+        self.feature_names = list(feature_names)
+        self.architecture = architecture
+        self.metadata = metadata or {}
+        self.scaler_digest = scaler_digest
+        self.network_digest = network_digest
+
+    @classmethod
+    def build(cls, model, transactions, space='scaled', leaf_size=DEFAULT_LEAF_SIZE, case_ids=None):
+        """
+        Index a DataFrame of confirmed fraud transactions
+
+        Args:
+            model (FraudDetectionModel): Loaded model (scaler, and the network for 'embedding')
+            transactions (pd.DataFrame): Fraud cases with transaction columns
+            space (str): 'scaled' or 'embedding'
+            case_ids (array-like): Identifier per case (default: row position)
+        """
+        from sklearn.neighbors import KDTree
+
+        if space not in SPACES:
+            raise ValueError(f'space must be one of {SPACES}')
+        if len(transactions) == 0:
+            raise ValueError('No fraud cases to index')
+        if model.scaler is None:
+            raise ValueError('Similar-case index needs the fitted scaler')
+        vectors = transaction_vectors(model, model.build_feature_matrix(transactions), space)
+        fields = [name for name in CASE_FIELDS if name in transactions.columns]
+        records = transactions[fields].to_dict('records')
+        case_ids = range(len(records)) if case_ids is None else case_ids
+        cases = [
+            dict({key: (value.item() if hasattr(value, 'item') else value) for key, value in record.items()},
+                 case_id=int(case_id))
+            for record, case_id in zip(records, case_ids)
+        ]
+        return cls(
+            KDTree(vectors, leaf_size=leaf_size), cases, space,
+            model.feature_names or DEFAULT_FEATURE_NAMES,
+            architecture=_network_signature(model) if space == 'embedding' else None,
+            metadata={'cases': len(cases), 'dimensions': int(vectors.shape[1]), 'leaf_size': leaf_size,
+                      'built_at': time.strftime('%Y-%m-%dT%H:%M:%S')},
+            scaler_digest=scaler_fingerprint(model.scaler),
+            network_digest=network_fingerprint(model) if space == 'embedding' else None
+        )
+
+    def check_compatible(self, model):
+        """Raise ValueError if model produces vectors in a different space than the index"""
+        names = list(model.feature_names or DEFAULT_FEATURE_NAMES)
+        if names != self.feature_names:
+            raise ValueError('Similar-case index was built with different feature_names')
+        if model.scaler is None:
+            raise ValueError('Similar-case index needs the fitted scaler, but the model has none')
+        if scaler_fingerprint(model.scaler) != self.scaler_digest:
+            raise ValueError('Similar-case index was built with a different scaler')
+        if self.space == 'embedding':
+            if _network_signature(model) != self.architecture:
+                raise ValueError(
+                    f'Similar-case index embeds with a {self.architecture} network, model has {_network_signature(model)}'
+                )
+            if network_fingerprint(model) != self.network_digest:
+                raise ValueError('Similar-case index was built with different network weights (rebuild after retraining)')
+
+    def query(self, model, raw_features, k=5):
+        """
+        Nearest known fraud cases for each row of a raw feature matrix
+
+        Returns:
+            list: One list per row of up to k case dicts, nearest first, each
+                with its 'distance' in the index space
+        """
+        k = max(1, min(int(k), len(self.cases)))
+        vectors = transaction_vectors(model, raw_features, self.space)
+        distances, indices = self.tree.query(vectors, k=k)
+        return [
+            [dict(self.cases[index], distance=round(float(distance), 6))
+             for distance, index in zip(row_distances, row_indices)]
+            for row_distances, row_indices in zip(distances, indices)
+        ]
+
+    def save(self, path):
+        # Plain data only: pickling the instance would record the class under
+        # __main__ when built via python -m models.similar_cases
+        joblib.dump({
+            'format': INDEX_FORMAT,
+            'tree': self.tree,
+            'cases': self.cases,
+            'space': self.space,
+            'feature_names': self.feature_names,
+            'architecture': self.architecture,
+            'metadata': self.metadata,
+            'scaler_digest': self.scaler_digest,
+            'network_digest': self.network_digest,
+        }, path)
+
+    @classmethod
+    def load(cls, path):
+        state = joblib.load(path)
+        if not isinstance(state, dict) or state.get('format') != INDEX_FORMAT:
+            raise ValueError(f'{path} does not contain a similar-case index (format {INDEX_FORMAT})')
+        return cls(
+            state['tree'], state['cases'], state['space'], state['feature_names'],
+            architecture=state['architecture'], metadata=state['metadata'],
+            scaler_digest=state['scaler_digest'], network_digest=state['network_digest']
+        )
+
+    def info(self):
+        return dict(self.metadata, space=self.space, architecture=self.architecture)
+
+
+def collect_fraud_cases(data_path, label_column=LABEL_COLUMN):
+    """Labelled fraud rows of a CSV, Parquet file or dataset cache, with their row numbers as case ids"""
+    import pandas as pd
+
+    parts = []
+    offset = 0
+    for chunk in iter_labelled_chunks(data_path):
+        frauds = chunk[chunk[label_column].astype(bool)]
+        parts.append(frauds.set_index(frauds.index + offset - chunk.index[0]) if len(chunk) else frauds)
+        offset += len(chunk)
+    cases = pd.concat(parts)
+    if 'type' in cases.columns:
+        cases['type'] = cases['type'].astype(str)
+    return cases
+
+
+def main():
+    from config import Config
+    from .fraud_model import FraudDetectionModel
+
+    parser = argparse.ArgumentParser(description='Build the similar known-fraud case index')
+    parser.add_argument('--data', required=True, help='Labelled CSV, Parquet file or dataset cache directory (isFraud column)')
+    parser.add_argument('--model-path', default=Config.MODEL_PATH, help='Artifact directory (the index is written here)')
+    parser.add_argument('--space', choices=SPACES, default='scaled')
+    parser.add_argument('--leaf-size', type=int, default=DEFAULT_LEAF_SIZE)
+    parser.add_argument('--k', type=int, default=Config.SIMILAR_CASES_K, help='k for the latency check')
+    args = parser.parse_args()
+
+    model = FraudDetectionModel(model_path=args.model_path)
+    model.load_model()
+    if model.scaler is None or (args.space == 'embedding' and not model.is_loaded):
+        raise SystemExit(f"Model artifacts could not be loaded from {args.model_path}")
+
+    cases = collect_fraud_cases(args.data)
+    started = time.perf_counter()
+    index = SimilarCaseIndex.build(model, cases, space=args.space, leaf_size=args.leaf_size, case_ids=cases.index)
+    build_seconds = time.perf_counter() - started
+    path = os.path.join(args.model_path, INDEX_FILE)
+    index.save(path)
+
+    # Query latency on the indexed cases themselves, in one batch
+    raw = model.build_feature_matrix(cases.head(1000))
+    started = time.perf_counter()
+    index.query(model, raw, k=args.k)
+    query_seconds = time.perf_counter() - started
+    report = dict(
+        index.info(),
+        path=os.path.abspath(path),
+        build_seconds=round(build_seconds, 3),
+        batch_queries=len(raw),
+        k=args.k,
+        per_query_us=round(query_seconds / max(len(raw), 1) * 1e6, 1)
+    )
+    print(json.dumps(report, indent=2))
+    print(f"✅ Indexed {len(index.cases):,} fraud cases")
+
+
+if __name__ == '__main__':
+    main()
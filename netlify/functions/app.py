@@ -8,6 +8,8 @@ sys.path.insert(0, project_root)
 
 # Import your existing Flask app
 from app import app
+# API routes are dispatched straight to their handlers (no WSGI round trip)
+from serverless import dispatch_event
 
 def handler(event, context):
     """Netlify serverless function handler"""
@@ -25,6 +27,11 @@ def handler(event, context):
                 'body': ''
             }
         
+        # Known API routes skip WSGI emulation entirely
+        response = dispatch_event(event, context)
+        if response is not None:
+            return response
+        
         # Import serverless WSGI adapter
         try:
             import serverless_wsgi
@@ -0,0 +1,395 @@
+"""
+Fraud Detection Prediction Store
+SQLite persistence for scored transactions, written off the request path
+
+Request handlers only put a row on a bounded queue. A single background
+writer drains the queue and inserts rows in batches, one transaction per
+batch, on a WAL-mode database so readers (/api/predictions) never block the
+writer. The same thread prunes rows older than the retention period.
+"""
+
+import os
+import json
+import time
+import queue
+import atexit
+import logging
+import sqlite3
+import threading
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    transaction_id TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    type TEXT,
+    amount REAL,
+    step INTEGER,
+    fraud_probability REAL,
+    classification TEXT,
+    risk_level TEXT,
+    model_used TEXT,
+    degraded INTEGER NOT NULL DEFAULT 0,
+    transaction_json TEXT,
+    prediction_json TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_predictions_created_at ON predictions (created_at);
+CREATE INDEX IF NOT EXISTS idx_predictions_classification ON predictions (classification, id);
+CREATE INDEX IF NOT EXISTS idx_predictions_type ON predictions (type, id);
+CREATE INDEX IF NOT EXISTS idx_predictions_transaction_id ON predictions (transaction_id);
+CREATE TABLE IF NOT EXISTS shadow_scores (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    transaction_id TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    champion_probability REAL,
+    champion_classification TEXT,
+    challenger_probability REAL,
+    challenger_classification TEXT,
+    challenger_model TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_shadow_scores_transaction_id ON shadow_scores (transaction_id);
+CREATE INDEX IF NOT EXISTS idx_shadow_scores_created_at ON shadow_scores (created_at);
+"""
+
+INSERT_SQL = """
+INSERT INTO predictions (
+    transaction_id, created_at, type, amount, step, fraud_probability,
+    classification, risk_level, model_used, degraded, transaction_json, prediction_json
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+INSERT_SHADOW_SQL = """
+INSERT INTO shadow_scores (
+    transaction_id, created_at, champion_probability, champion_classification,
+    challenger_probability, challenger_classification, challenger_model
+) VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+QUERY_COLUMNS = [
+    'id', 'transaction_id', 'created_at', 'type', 'amount', 'step',
+    'fraud_probability', 'classification', 'risk_level', 'model_used',
+    'degraded', 'transaction_json', 'prediction_json'
+]
+
+# Rows deleted per pruning statement, so a large backlog of expired rows
+# never holds the write lock for long
+PRUNE_CHUNK_ROWS = 5000
+
+
+def parse_database_url(database_url):
+    """
+    Map a sqlite:// URL to a sqlite3 database argument
+
+    sqlite:///relative.db, sqlite:////absolute.db and sqlite:///:memory:
+    are supported. In-memory databases use a shared-cache URI so the writer
+    thread and reader connections see the same data.
+
+    Returns:
+        tuple: (database, uri flag)
+
+    Raises:
+        ValueError: For non-SQLite URLs
+    """
+    if not database_url or not database_url.startswith('sqlite://'):
+        raise ValueError(f'Unsupported DATABASE_URL (only sqlite:// is supported): {database_url}')
+    path = database_url[len('sqlite://'):]
+    if path.startswith('/'):
+        path = path[1:]
+    if path in ('', ':memory:'):
+        return 'file:fraud_predictions?mode=memory&cache=shared', True
+    return path, False
+
+
+class PredictionStore:
+    """
+    Batched, asynchronous writer plus keyset-paginated reader for predictions
+
+    - record() never blocks: when the queue is full the row is dropped and
+      counted, so a slow disk degrades history, not scoring latency.
+    - The writer starts lazily in the process that first records, so the
+      store survives os.fork() in the pre-fork server (each worker gets its
+      own writer; WAL plus busy_timeout serialise their commits).
+    """
+
+    def __init__(self, database, uri=False, batch_size=500, flush_interval=0.5,
+                 queue_size=10000, retention_days=30, prune_interval=3600):
+        self.database = database
+        self.uri = uri
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retention_days = retention_days
+        self.prune_interval = prune_interval
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writer = None
+        self._writer_pid = None
+        self._stopping = threading.Event()
+        self._last_prune = 0.0
+        self.counters = {
+            'written': 0,
+            'dropped': 0,
+            'write_errors': 0,
+            'pruned': 0,
+        }
+
+        # Keep one connection open for in-memory databases: the shared-cache
+        # database is discarded as soon as its last connection closes
+        self._keepalive = self._connect() if uri else None
+        connection = self._keepalive or self._connect()
+        connection.executescript(SCHEMA)
+        if connection is not self._keepalive:
+            connection.close()
+        atexit.register(self.close)
+
+    @classmethod
+    def from_config(cls, config):
+        """Build the store from Config, or return None if it is disabled or misconfigured"""
+        if not config.PREDICTION_STORE_ENABLED:
+            return None
+        try:
+            database, uri = parse_database_url(config.DATABASE_URL)
+            if not uri and os.path.dirname(database):
+                os.makedirs(os.path.dirname(database), exist_ok=True)
+            return cls(
+                database, uri=uri,
+                batch_size=config.PREDICTION_STORE_BATCH_SIZE,
+                flush_interval=config.PREDICTION_STORE_FLUSH_INTERVAL,
+                queue_size=config.PREDICTION_STORE_QUEUE_SIZE,
+                retention_days=config.PREDICTION_RETENTION_DAYS,
+                prune_interval=config.PREDICTION_PRUNE_INTERVAL
+            )
+        except (ValueError, sqlite3.Error) as e:
+            logger.warning(f"Prediction store disabled: {e}")
+            return None
+
+    def _connect(self):
+        connection = sqlite3.connect(self.database, uri=self.uri, timeout=30, check_same_thread=False)
+        connection.execute('PRAGMA journal_mode=WAL')
+        # WAL keeps commits durable against application crashes with NORMAL
+        connection.execute('PRAGMA synchronous=NORMAL')
+        return connection
+
+    def _reader(self):
+        """Per-thread read connection"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or getattr(self._local, 'pid', None) != os.getpid():
+            connection = self._connect()
+            connection.row_factory = sqlite3.Row
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    # ================================
+    # WRITES
+    # ================================
+
+    def _ensure_writer(self):
+        pid = os.getpid()
+        if self._writer_pid == pid and self._writer.is_alive():
+            return
+        with self._lock:
+            if self._writer_pid == pid and self._writer.is_alive():
+                return
+            if self._writer_pid != pid:
+                # Forked child: rows queued by the parent belong to the parent
+                self._queue = queue.Queue(maxsize=self._queue.maxsize)
+                self._stopping = threading.Event()
+            self._writer = threading.Thread(target=self._write_loop, name='prediction-store-writer', daemon=True)
+            self._writer_pid = pid
+            self._writer.start()
+
+    def _enqueue(self, sql, row):
+        self._ensure_writer()
+        try:
+            self._queue.put_nowait((sql, row))
+        except queue.Full:
+            with self._lock:
+                self.counters['dropped'] += 1
+
+    def record(self, transaction_id, transaction_data, prediction_result):
+        """Queue one scored transaction for persistence (never blocks)"""
+        self._enqueue(INSERT_SQL, (
+            transaction_id,
+            time.time(),
+            transaction_data.get('type'),
+            float(transaction_data.get('amount', 0) or 0),
+            int(transaction_data.get('step', 0) or 0),
+            float(prediction_result.get('probability', 0.0)),
+            prediction_result.get('classification'),
+            prediction_result.get('risk_level'),
+            prediction_result.get('model_used'),
+            int(bool(prediction_result.get('degraded'))),
+            json.dumps(transaction_data, default=str),
+            json.dumps(prediction_result, default=str)
+        ))
+
+    def record_shadow(self, transaction_id, champion_result, challenger_probability,
+                      challenger_classification, challenger_model):
+        """Queue a challenger score to be stored next to the champion's (never blocks)"""
+        self._enqueue(INSERT_SHADOW_SQL, (
+            transaction_id,
+            time.time(),
+            float(champion_result.get('probability', 0.0)),
+            champion_result.get('classification'),
+            float(challenger_probability),
+            challenger_classification,
+            challenger_model
+        ))
+
+    def _drain(self, first):
+        rows = [first]
+        while len(rows) < self.batch_size:
+            try:
+                rows.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return rows
+
+    def _write_loop(self):
+        connection = self._connect()
+        try:
+            while not (self._stopping.is_set() and self._queue.empty()):
+                try:
+                    first = self._queue.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    self._maybe_prune(connection)
+                    continue
+                rows = self._drain(first)
+                batches = {}
+                for sql, row in rows:
+                    batches.setdefault(sql, []).append(row)
+                try:
+                    with connection:
+                        for sql, batch in batches.items():
+                            connection.executemany(sql, batch)
+                    with self._lock:
+                        self.counters['written'] += len(rows)
+                except sqlite3.Error as e:
+                    logger.error(f"Error writing {len(rows)} predictions: {e}")
+                    with self._lock:
+                        self.counters['write_errors'] += len(rows)
+                finally:
+                    for _ in rows:
+                        self._queue.task_done()
+                self._maybe_prune(connection)
+        finally:
+            connection.close()
+
+    def _maybe_prune(self, connection):
+        now = time.time()
+        if not self.retention_days or now - self._last_prune < self.prune_interval:
+            return
+        self._last_prune = now
+        try:
+            self.prune(connection=connection)
+        except sqlite3.Error as e:
+            logger.error(f"Error pruning predictions: {e}")
+
+    def prune(self, older_than_days=None, connection=None):
+        """
+        Delete predictions older than the retention period, in small chunks
+
+        Returns:
+            int: Number of rows deleted
+        """
+        days = self.retention_days if older_than_days is None else older_than_days
+        cutoff = time.time() - days * 86400
+        own_connection = connection is None
+        connection = connection or self._connect()
+        deleted = 0
+        try:
+            for table in ('predictions', 'shadow_scores'):
+                while True:
+                    with connection:
+                        cursor = connection.execute(
+                            f'DELETE FROM {table} WHERE id IN '
+                            f'(SELECT id FROM {table} WHERE created_at < ? LIMIT ?)',
+                            (cutoff, PRUNE_CHUNK_ROWS)
+                        )
+                    deleted += cursor.rowcount
+                    if cursor.rowcount < PRUNE_CHUNK_ROWS:
+                        break
+        finally:
+            if own_connection:
+                connection.close()
+        with self._lock:
+            self.counters['pruned'] += deleted
+        return deleted
+
+    def flush(self):
+        """Block until every queued row has been written"""
+        if self._writer_pid == os.getpid():
+            self._queue.join()
+
+    def close(self):
+        """Write out queued rows and stop the writer"""
+        if self._writer_pid == os.getpid() and self._writer.is_alive():
+            self._stopping.set()
+            self._writer.join(timeout=10)
+        atexit.unregister(self.close)
+
+    # ================================
+    # READS
+    # ================================
+
+    def query(self, limit=50, before_id=None, classification=None, transaction_type=None,
+              transaction_id=None, since=None, until=None):
+        """
+        Newest-first page of predictions using keyset pagination
+
+        Pages continue from before_id (the next_cursor of the previous page)
+        instead of an OFFSET, so deep pages cost the same as the first.
+
+        Returns:
+            tuple: (list of row dicts, next cursor or None)
+        """
+        clauses, args = [], []
+        if before_id is not None:
+            clauses.append('id < ?')
+            args.append(before_id)
+        if classification:
+            clauses.append('classification = ?')
+            args.append(classification)
+        if transaction_type:
+            clauses.append('type = ?')
+            args.append(transaction_type)
+        if transaction_id:
+            clauses.append('transaction_id = ?')
+            args.append(transaction_id)
+        if since is not None:
+            clauses.append('created_at >= ?')
+            args.append(since)
+        if until is not None:
+            clauses.append('created_at < ?')
+            args.append(until)
+
+        sql = f"SELECT {', '.join(QUERY_COLUMNS)} FROM predictions"
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        sql += ' ORDER BY id DESC LIMIT ?'
+        args.append(limit + 1)
+
+        rows = self._reader().execute(sql, args).fetchall()
+        next_cursor = rows[limit - 1]['id'] if len(rows) > limit else None
+        return [self._row_to_dict(row) for row in rows[:limit]], next_cursor
+
+    @staticmethod
+    def _row_to_dict(row):
+        record = {key: row[key] for key in QUERY_COLUMNS if not key.endswith('_json')}
+        record['degraded'] = bool(record['degraded'])
+        record['transaction'] = json.loads(row['transaction_json']) if row['transaction_json'] else None
+        record['prediction'] = json.loads(row['prediction_json']) if row['prediction_json'] else None
+        return record
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self.counters)
+        return dict(
+            counters,
+            pending=self._queue.qsize(),
+            retention_days=self.retention_days
+        )
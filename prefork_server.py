@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+Fraud Detection Pre-fork Server
+Multi-process serving mode that loads the model weights once
+
+The parent process has fraud_detection_model.h5 converted to a NumPy
+DenseNetwork in a short-lived child interpreter (so the parent itself never
+starts the TensorFlow runtime, whose threads and locks do not survive
+fork), loads the scaler and copies the network weights into a read-only
+SharedMemory block. It then forks N workers which serve app.py from the
+shared weights through the NumPy DenseNetwork backend, so no process that
+forks or is forked runs TensorFlow and no worker holds its own copy of the
+weights.
+
+Rate limits and load shedding are enforced per process: every worker gets
+1 / N of the configured request rate, burst and in-flight limit (see
+AdmissionController.split_across), so together they match the settings.
+
+The parent supervises the workers: crashed workers are restarted and
+workers whose serve loop stops sending heartbeats are killed and replaced.
+Per-worker RSS/PSS is logged periodically and served on /api/workers.
+
+Run with:
+    python prefork_server.py --workers 4 --port 5000
+"""
+
+import os
+import sys
+import gc
+import mmap
+import time
+import socket
+import signal
+import logging
+import argparse
+import threading
+
+import numpy as np
+from flask import jsonify
+from werkzeug.serving import make_server
+
+# Add project root to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config import Config
+from app import app, app_stats, admission, fraud_model, prepare_serving
+
+logger = logging.getLogger(__name__)
+
+
+def read_process_memory(pid):
+    """
+    Read memory usage for a process from /proc
+
+    Returns:
+        dict: rss_kb, pss_kb, shared_kb and private_kb (None where unavailable)
+    """
+    usage = {'rss_kb': None, 'pss_kb': None, 'shared_kb': None, 'private_kb': None}
+    fields = {
+        'Rss': 'rss_kb',
+        'Pss': 'pss_kb',
+    }
+    try:
+        # smaps_rollup (Linux 4.14+) gives PSS, which splits shared pages
+        # fairly between the processes mapping them
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            shared = private = 0
+            for line in f:
+                parts = line.split()
+                if len(parts) < 2:
+                    continue
+                key = parts[0].rstrip(':')
+                if key in fields:
+                    usage[fields[key]] = int(parts[1])
+                elif key in ('Shared_Clean', 'Shared_Dirty'):
+                    shared += int(parts[1])
+                elif key in ('Private_Clean', 'Private_Dirty'):
+                    private += int(parts[1])
+            usage['shared_kb'] = shared
+            usage['private_kb'] = private
+    except OSError:
+        try:
+            with open(f'/proc/{pid}/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        usage['rss_kb'] = int(line.split()[1])
+                        break
+        except OSError:
+            pass
+    return usage
+
+
+class PreforkServer:
+    """Parent process that owns the shared model, the socket and the workers"""
+
+    def __init__(self, host='0.0.0.0', port=5000, workers=None):
+        self.host = host
+        self.port = port
+        self.num_workers = workers or Config.PREFORK_WORKERS
+        self.listen_socket = None
+        self.shared_network = None
+        self.running = False
+
+        # Worker table shared with the children: one row per slot holding
+        # (pid, last heartbeat, start time, restarts). Anonymous mmaps are
+        # MAP_SHARED, so writes by a worker are visible to the parent and
+        # vice versa.
+        self._status_map = mmap.mmap(-1, self.num_workers * 4 * 8)
+        self.status = np.ndarray((self.num_workers, 4), dtype=np.float64, buffer=self._status_map)
+        self.status[:] = 0
+        self.parent_pid = os.getpid()
+        self.last_spawn = [0.0] * self.num_workers
+        self.pids = {}  # pid -> slot
+
+        app.add_url_rule('/api/workers', 'worker_status', self.worker_status_view, methods=['GET'])
+
+    # ================================
+    # STARTUP
+    # ================================
+
+    def load_shared_model(self):
+        """Load the model once in the parent and move its weights to shared memory"""
+        logger.info("🚀 Loading model in parent process...")
+        fraud_model.load_model(isolate_keras=True)
+        network = fraud_model.export_network()
+        if network is not None:
+            self.shared_network = network.to_shared_memory()
+            # Drop the private copy so only the shared weights remain
+            fraud_model.attach_network(self.shared_network)
+            gc.collect()
+            logger.info(f"✅ Shared {self.shared_network.nbytes / 1024:.1f} KB of weights "
+                        f"({self.shared_network.architecture}) in block {self.shared_network.shared_block.name}")
+        else:
+            logger.warning("⚠️ No model weights available - workers will use rule-based fallback")
+        app_stats['model_loaded'] = fraud_model.is_loaded
+        # Student tier, similar-case index and warmup, exactly as under
+        # app.py, so every forked worker inherits them ready to serve
+        prepare_serving(isolate_keras=True)
+        app_stats['ready'] = True
+
+    def bind(self):
+        """Create the listening socket inherited by every worker"""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(Config.PREFORK_BACKLOG)
+        sock.set_inheritable(True)
+        self.listen_socket = sock
+
+    # ================================
+    # WORKERS
+    # ================================
+
+    def spawn_worker(self, slot):
+        """Fork a worker for the given slot"""
+        self.status[slot, :3] = (0, time.time(), time.time())
+        pid = os.fork()
+        if pid == 0:
+            exit_code = 0
+            try:
+                self._run_worker(slot)
+            except Exception as e:
+                logger.error(f"💥 Worker {slot} crashed: {e}")
+                exit_code = 1
+            finally:
+                os._exit(exit_code)
+        self.pids[pid] = slot
+        self.last_spawn[slot] = time.time()
+        self.status[slot, 0] = pid
+        logger.info(f"👷 Started worker {slot} (pid {pid})")
+        return pid
+
+    def _run_worker(self, slot):
+        """Worker main loop: serve app.py on the inherited socket"""
+        signal.signal(signal.SIGINT, signal.SIG_IGN)  # The parent handles Ctrl-C
+        # Admission state is per process, so each worker enforces its share
+        # of the configured rate and concurrency limits
+        admission.split_across(self.num_workers)
+        server = make_server(self.host, self.port, app, threaded=True, fd=self.listen_socket.fileno())
+
+        status = self.status
+
+        def heartbeat():
+            # Called by serve_forever between polls, so a stalled serve
+            # loop stops the heartbeat and the parent replaces the worker
+            status[slot, 1] = time.time()
+
+        server.service_actions = heartbeat
+
+        def handle_sigterm(signum, frame):
+            threading.Thread(target=server.shutdown, daemon=True).start()
+
+        signal.signal(signal.SIGTERM, handle_sigterm)
+        status[slot, 0] = os.getpid()
+        heartbeat()
+        server.serve_forever(poll_interval=0.5)
+
+    def reap_workers(self):
+        """Collect exited workers and restart their slots"""
+        while True:
+            try:
+                pid, exit_status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            slot = self.pids.pop(pid, None)
+            if slot is None:
+                continue
+            logger.warning(f"⚠️ Worker {slot} (pid {pid}) exited with status {exit_status}")
+            if self.running:
+                wait = Config.PREFORK_RESTART_BACKOFF - (time.time() - self.last_spawn[slot])
+                if wait > 0:
+                    time.sleep(wait)
+                self.status[slot, 3] += 1
+                self.spawn_worker(slot)
+
+    def check_heartbeats(self):
+        """Kill workers whose serve loop has stopped making progress"""
+        now = time.time()
+        for pid, slot in list(self.pids.items()):
+            if now - self.status[slot, 1] > Config.PREFORK_HEARTBEAT_TIMEOUT:
+                logger.error(f"❌ Worker {slot} (pid {pid}) missed heartbeats - killing")
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+
+    # ================================
+    # REPORTING
+    # ================================
+
+    def memory_report(self):
+        """Collect per-process memory for the parent and every worker"""
+        now = time.time()
+        report = {
+            'parent': dict(pid=self.parent_pid, **read_process_memory(self.parent_pid)),
+            'workers': [],
+            'shared_weights_kb': round(self.shared_network.nbytes / 1024, 1) if self.shared_network else 0
+        }
+        for slot in range(self.num_workers):
+            pid = int(self.status[slot, 0])
+            if not pid:
+                continue
+            report['workers'].append(dict(
+                slot=slot,
+                pid=pid,
+                heartbeat_age_seconds=round(now - self.status[slot, 1], 2),
+                uptime_seconds=round(now - self.status[slot, 2], 1),
+                restarts=int(self.status[slot, 3]),
+                **read_process_memory(pid)
+            ))
+        known = [w for w in report['workers'] if w['rss_kb'] is not None]
+        report['total_worker_rss_kb'] = sum(w['rss_kb'] for w in known)
+        report['total_worker_pss_kb'] = sum(w['pss_kb'] or 0 for w in known)
+        return report
+
+    def log_memory_report(self):
+        report = self.memory_report()
+        logger.info(f"📊 Parent pid {report['parent']['pid']}: RSS {report['parent']['rss_kb']} KB")
+        for worker in report['workers']:
+            logger.info(f"📊 Worker {worker['slot']} pid {worker['pid']}: RSS {worker['rss_kb']} KB, "
+                        f"PSS {worker['pss_kb']} KB, shared {worker['shared_kb']} KB, "
+                        f"private {worker['private_kb']} KB, restarts {worker['restarts']}")
+        logger.info(f"📊 Workers total: RSS {report['total_worker_rss_kb']} KB, "
+                    f"PSS {report['total_worker_pss_kb']} KB")
+
+    def worker_status_view(self):
+        """GET /api/workers - worker health and memory usage"""
+        return jsonify({
+            'success': True,
+            'mode': 'prefork',
+            'num_workers': self.num_workers,
+            'memory': self.memory_report()
+        })
+
+    # ================================
+    # MAIN LOOP
+    # ================================
+
+    def stop(self, signum=None, frame=None):
+        self.running = False
+
+    def shutdown_workers(self, timeout=10):
+        """SIGTERM every worker, then SIGKILL stragglers"""
+        for pid in list(self.pids):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        deadline = time.time() + timeout
+        while self.pids and time.time() < deadline:
+            self.reap_workers()
+            time.sleep(0.1)
+        for pid in list(self.pids):
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        self.reap_workers()
+
+    def run(self):
+        """Load the model, fork workers and supervise them until stopped"""
+        self.load_shared_model()
+        self.bind()
+
+        self.running = True
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGUSR1, lambda signum, frame: self.log_memory_report())
+
+        for slot in range(self.num_workers):
+            self.spawn_worker(slot)
+        print(f"🚀 Pre-fork server listening on {self.host}:{self.port} with {self.num_workers} workers")
+
+        last_report = time.time()
+        try:
+            while self.running:
+                self.reap_workers()
+                self.check_heartbeats()
+                if Config.PREFORK_REPORT_INTERVAL and time.time() - last_report >= Config.PREFORK_REPORT_INTERVAL:
+                    self.log_memory_report()
+                    last_report = time.time()
+                time.sleep(0.5)
+        finally:
+            logger.info("🛑 Shutting down workers...")
+            self.shutdown_workers()
+            self.listen_socket.close()
+            if self.shared_network is not None:
+                self.shared_network.release(unlink=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the fraud detection API with pre-forked workers')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=int(os.environ.get('PORT', 5000)))
+    parser.add_argument('--workers', type=int, default=Config.PREFORK_WORKERS)
+    args = parser.parse_args()
+
+    PreforkServer(host=args.host, port=args.port, workers=args.workers).run()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+"""
+Fraud Detection Sampling Profiler
+On-demand, time-bounded stack sampling for live workers
+
+Nothing runs until an admin starts a session: the profiler is a plain
+object with no thread, hook or tracing function installed, so leaving it
+compiled in costs nothing. A session starts one daemon thread that reads
+every other thread's Python stack via sys._current_frames() at a fixed
+interval for a bounded duration, and counts identical stacks in memory.
+Overhead is bounded by the interval (one stack walk per thread per sample),
+memory by max_stacks distinct stacks, and the session always ends on its
+own.
+
+Results are served as collapsed stacks ("a;b;c count" lines, the input of
+flamegraph.pl / speedscope) or as a top-N table of self and inclusive
+sample counts per function. Each process has its own profiler, so under
+prefork_server.py a session profiles whichever worker received the start
+request.
+"""
+
+import os
+import sys
+import time
+import threading
+from collections import Counter
+
+# Leaf frames of threads parked waiting for work (queue workers, accept
+# loops). Their samples are left out unless include_idle is requested.
+IDLE_FRAMES = {
+    ('threading.py', 'wait'),
+    ('threading.py', '_wait_for_tstate_lock'),
+    ('selectors.py', 'select'),
+    ('socket.py', 'accept'),
+    ('socket.py', 'readinto'),
+    ('queue.py', 'get'),
+}
+
+
+class SamplingProfiler:
+    """Periodic stack sampler with in-memory aggregation"""
+
+    def __init__(self, max_seconds=60.0, min_interval_ms=1.0, max_stacks=10000, max_depth=64):
+        self.max_seconds = max_seconds
+        self.min_interval_ms = min_interval_ms
+        self.max_stacks = max_stacks
+        self.max_depth = max_depth
+
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self._stacks = Counter()
+        self.session = None
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            max_seconds=config.PROFILER_MAX_SECONDS,
+            min_interval_ms=config.PROFILER_MIN_INTERVAL_MS,
+            max_stacks=config.PROFILER_MAX_STACKS,
+            max_depth=config.PROFILER_MAX_DEPTH
+        )
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, seconds, interval_ms, include_idle=False):
+        """
+        Start a profiling session (replacing the previous session's results)
+
+        Returns:
+            dict or None: The session description, or None if a session is
+                already running
+        """
+        seconds = max(0.1, min(float(seconds), self.max_seconds))
+        interval_ms = max(float(interval_ms), self.min_interval_ms)
+        with self._lock:
+            if self.running:
+                return None
+            self._stacks = Counter()
+            self._stop = threading.Event()
+            self.session = {
+                'pid': os.getpid(),
+                'started_at': time.time(),
+                'seconds': seconds,
+                'interval_ms': interval_ms,
+                'include_idle': include_idle,
+                'samples': 0,
+                'idle_samples': 0,
+                'dropped_stacks': 0,
+                'finished_at': None,
+            }
+            self._thread = threading.Thread(
+                target=self._sample_loop, args=(seconds, interval_ms / 1000.0, include_idle, self._stop),
+                name='sampling-profiler', daemon=True
+            )
+            self._thread.start()
+            return dict(self.session)
+
+    def stop(self):
+        """End the running session early (results are kept)"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _frame_label(self, frame):
+        code = frame.f_code
+        return os.path.basename(code.co_filename), code.co_name
+
+    def _sample_loop(self, seconds, interval, include_idle, stop):
+        own_id = threading.get_ident()
+        deadline = time.monotonic() + seconds
+        session = self.session
+        while not stop.is_set() and time.monotonic() < deadline:
+            frames = sys._current_frames()
+            for thread_id, frame in frames.items():
+                if thread_id == own_id:
+                    continue
+                leaf = self._frame_label(frame)
+                if not include_idle and leaf in IDLE_FRAMES:
+                    session['idle_samples'] += 1
+                    continue
+                labels = []
+                while frame is not None and len(labels) < self.max_depth:
+                    filename, name = self._frame_label(frame)
+                    labels.append(f"{filename[:-3] if filename.endswith('.py') else filename}.{name}")
+                    frame = frame.f_back
+                stack = ';'.join(reversed(labels))
+                with self._lock:
+                    if stack in self._stacks or len(self._stacks) < self.max_stacks:
+                        self._stacks[stack] += 1
+                    else:
+                        session['dropped_stacks'] += 1
+                session['samples'] += 1
+            del frames
+            stop.wait(interval)
+        session['finished_at'] = time.time()
+
+    def collapsed(self):
+        """Collapsed-stack text, one 'frame;frame;frame count' line per stack"""
+        with self._lock:
+            stacks = self._stacks.most_common()
+        return '\n'.join(f'{stack} {count}' for stack, count in stacks)
+
+    def top(self, limit=25):
+        """
+        Functions by inclusive samples
+
+        Returns:
+            list: {'function', 'self', 'total', 'self_percent', 'total_percent'}
+        """
+        with self._lock:
+            stacks = list(self._stacks.items())
+        own = Counter()
+        inclusive = Counter()
+        samples = 0
+        for stack, count in stacks:
+            frames = stack.split(';')
+            own[frames[-1]] += count
+            for name in set(frames):
+                inclusive[name] += count
+            samples += count
+        samples = max(samples, 1)
+        return [
+            {
+                'function': name,
+                'self': own[name],
+                'total': total,
+                'self_percent': round(100.0 * own[name] / samples, 2),
+                'total_percent': round(100.0 * total / samples, 2),
+            }
+            for name, total in inclusive.most_common(limit)
+        ]
+
+    def stats(self):
+        with self._lock:
+            session = dict(self.session) if self.session else None
+            distinct = len(self._stacks)
+        return {
+            'running': self.running,
+            'session': session,
+            'distinct_stacks': distinct,
+        }
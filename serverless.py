@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Fraud Detection Serverless Adapter
+Direct dispatch of Lambda / Netlify events to the API handlers in app.py
+
+The original Netlify handler rebuilds a WSGI request for every invocation
+(app.test_client() in the fallback path) only to reach the same handler
+functions. This adapter maps the event's method and path straight to those
+handlers and serialises their (payload, status) result, while the model
+stays loaded in the module-level instance across warm invocations.
+
+Routes it does not know (templates, development helpers) return None from
+dispatch_event so callers can fall back to the full Flask app.
+
+Benchmark against the test_client handler:
+    python serverless.py --benchmark 2000
+"""
+
+import os
+import sys
+import json
+import time
+import base64
+import argparse
+import threading
+from datetime import datetime
+
+from werkzeug.http import http_date
+
+# Add project root to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config import Config
+from app import (
+    initialize_model,
+    build_health_payload,
+    build_readiness_payload,
+    build_model_info_payload,
+    build_statistics_payload,
+    process_prediction,
+    process_batch_prediction,
+    process_explanation,
+    process_similar_cases,
+    query_predictions,
+    build_shadow_payload,
+    build_rings_payload,
+    build_profile_payload,
+    process_profile_start,
+    admission,
+    admit_request,
+    get_client_key,
+    RATE_LIMITED_ENDPOINTS,
+)
+
+FUNCTION_PREFIXES = ('/.netlify/functions/app', '/.netlify/functions/serverless')
+
+CORS_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
+    'Access-Control-Allow-Headers': 'Content-Type, Authorization, X-API-Key, X-Deadline-Ms',
+}
+
+_model_lock = threading.Lock()
+_model_initialized = False
+
+
+def ensure_model():
+    """Load (and warm up) the shared model once per container, on the first invocation"""
+    global _model_initialized
+    if _model_initialized:
+        return
+    with _model_lock:
+        if not _model_initialized:
+            initialize_model()
+            _model_initialized = True
+
+
+# ================================
+# ROUTE HANDLERS
+# ================================
+# Every handler takes (params, data, headers, received_at) and returns
+# (payload, status), exactly like the framework-independent handlers in app.py.
+
+def health_check(params, data, headers, received_at):
+    return build_health_payload(), 200
+
+
+def liveness_check(params, data, headers, received_at):
+    return {'status': 'alive'}, 200
+
+
+def readiness_check(params, data, headers, received_at):
+    return build_readiness_payload()
+
+
+def get_model_info(params, data, headers, received_at):
+    return build_model_info_payload()
+
+
+def get_statistics(params, data, headers, received_at):
+    return build_statistics_payload(), 200
+
+
+def list_predictions(params, data, headers, received_at):
+    return query_predictions(params)
+
+
+def get_shadow_report(params, data, headers, received_at):
+    return build_shadow_payload()
+
+
+def list_rings(params, data, headers, received_at):
+    return build_rings_payload(params)
+
+
+def start_profile(params, data, headers, received_at):
+    return process_profile_start(data, headers.get(Config.ADMIN_TOKEN_HEADER.lower()))
+
+
+def get_profile(params, data, headers, received_at):
+    return build_profile_payload(params, headers.get(Config.ADMIN_TOKEN_HEADER.lower()))
+
+
+def predict_fraud(params, data, headers, received_at):
+    return process_prediction(data, params, headers.get(Config.DEADLINE_HEADER.lower()), received_at)
+
+
+def batch_predict(params, data, headers, received_at):
+    return process_batch_prediction(data, params, headers.get(Config.DEADLINE_HEADER.lower()), received_at)
+
+
+def explain_predictions(params, data, headers, received_at):
+    return process_explanation(data)
+
+
+def find_similar_cases(params, data, headers, received_at):
+    return process_similar_cases(data)
+
+
+ROUTES = {
+    ('GET', '/api/health'): health_check,
+    ('GET', '/api/health/live'): liveness_check,
+    ('GET', '/api/health/ready'): readiness_check,
+    ('GET', '/api/model-info'): get_model_info,
+    ('GET', '/api/stats'): get_statistics,
+    ('GET', '/api/predictions'): list_predictions,
+    ('GET', '/api/shadow'): get_shadow_report,
+    ('GET', '/api/rings'): list_rings,
+    ('GET', '/api/admin/profile'): get_profile,
+    ('POST', '/api/admin/profile/start'): start_profile,
+    ('POST', '/api/predict'): predict_fraud,
+    ('POST', '/api/batch-predict'): batch_predict,
+    ('POST', '/api/explain'): explain_predictions,
+    ('POST', '/api/similar-cases'): find_similar_cases,
+}
+# Scoring routes need the model; health and stats must answer without loading it
+MODEL_ROUTES = {'/api/predict', '/api/batch-predict', '/api/explain', '/api/similar-cases'}
+
+# ================================
+# EVENT HANDLING
+# ================================
+
+def _json_default(value):
+    """Serialise values the same way Flask's jsonify does"""
+    if isinstance(value, datetime):
+        return http_date(value)
+    if hasattr(value, 'tolist'):  # numpy scalars / arrays
+        return value.tolist()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+def json_response(payload, status=200, headers=None):
+    response_headers = {'Content-Type': 'application/json'}
+    response_headers.update(CORS_HEADERS)
+    if headers:
+        response_headers.update(headers)
+    return {
+        'statusCode': status,
+        'headers': response_headers,
+        'body': json.dumps(payload, default=_json_default, separators=(',', ':'))
+    }
+
+
+def event_method(event):
+    """HTTP method from a Netlify / API Gateway v1 or v2 event"""
+    method = event.get('httpMethod') or event.get('requestContext', {}).get('http', {}).get('method')
+    return (method or 'GET').upper()
+
+
+def event_path(event):
+    """API path with the function prefix removed (/.netlify/functions/app/predict -> /api/predict)"""
+    path = event.get('path') or event.get('rawPath') or '/'
+    for prefix in FUNCTION_PREFIXES:
+        if path.startswith(prefix):
+            path = path[len(prefix):] or '/'
+            if path != '/' and not path.startswith('/api/'):
+                path = '/api' + path
+            break
+    return path.rstrip('/') or '/'
+
+
+def event_body(event):
+    body = event.get('body') or ''
+    if event.get('isBase64Encoded'):
+        return base64.b64decode(body)
+    return body.encode('utf-8') if isinstance(body, str) else body
+
+
+def _is_json(headers):
+    """Mirror Flask's request.is_json check on the content-type header"""
+    mimetype = headers.get('content-type', '').split(';', 1)[0].strip().lower()
+    return mimetype == 'application/json' or (mimetype.startswith('application/') and mimetype.endswith('+json'))
+
+
+def dispatch_event(event, context=None):
+    """
+    Serve an event through the direct route table
+
+    Returns:
+        dict or None: Lambda-style response, or None if the route is not
+            handled here (the caller should fall back to the Flask app)
+    """
+    received_at = time.monotonic()
+    method = event_method(event)
+    path = event_path(event)
+    headers = {key.lower(): value for key, value in (event.get('headers') or {}).items()}
+
+    if method == 'OPTIONS':
+        return {'statusCode': 200, 'headers': dict(CORS_HEADERS), 'body': ''}
+
+    handler = ROUTES.get((method, path))
+    if handler is None:
+        return None
+
+    params = event.get('queryStringParameters') or {}
+    data = None
+    if method == 'POST':
+        if not _is_json(headers):
+            return json_response({'success': False, 'error': 'Request must be JSON'}, 400)
+        try:
+            data = json.loads(event_body(event))
+        except ValueError:
+            return json_response({'success': False, 'error': 'Invalid JSON body'}, 400)
+
+    if path in MODEL_ROUTES:
+        ensure_model()
+
+    if path not in RATE_LIMITED_ENDPOINTS:
+        payload, status = handler(params, data, headers, received_at)
+        return json_response(payload, status)
+
+    remote_addr = event.get('requestContext', {}).get('identity', {}).get('sourceIp') or \
+        event.get('requestContext', {}).get('http', {}).get('sourceIp')
+    client_key = get_client_key(headers.get('x-api-key'), remote_addr, headers.get('x-forwarded-for'))
+    decision = admit_request(path, client_key, lambda: data)
+    if not decision.allowed:
+        body, rejection_headers = decision.to_response()
+        return json_response(body, decision.status, rejection_headers)
+    try:
+        payload, status = handler(params, data, headers, received_at)
+    finally:
+        admission.release()
+    return json_response(payload, status)
+
+
+def handler(event, context=None):
+    """Lambda / Netlify entry point: direct dispatch, Flask app for everything else"""
+    try:
+        response = dispatch_event(event, context)
+        if response is not None:
+            return response
+        from netlify.functions.app import fallback_handler
+        return fallback_handler(event, context)
+    except Exception as e:
+        return json_response({
+            'success': False,
+            'error': f'Server error: {str(e)}',
+            'debug': str(type(e).__name__)
+        }, 500)
+
+# ================================
+# BENCHMARK
+# ================================
+
+def benchmark(iterations=1000):
+    """
+    Per-invocation time of direct dispatch vs the test_client fallback handler
+
+    Returns:
+        dict: Mean microseconds per invocation for each handler and event
+    """
+    from netlify.functions.app import fallback_handler
+
+    transaction = {
+        'type': 'PAYMENT', 'amount': 1000, 'oldbalanceOrg': 50000, 'newbalanceOrig': 49000,
+        'oldbalanceDest': 0, 'newbalanceDest': 1000, 'isFlaggedFraud': 0, 'step': 100
+    }
+    events = {
+        'health': {'httpMethod': 'GET', 'path': '/.netlify/functions/app/api/health', 'headers': {}},
+        'predict': {
+            'httpMethod': 'POST', 'path': '/.netlify/functions/app/api/predict',
+            'headers': {'content-type': 'application/json'}, 'body': json.dumps(transaction)
+        },
+    }
+    ensure_model()
+    report = {}
+    for name, event in events.items():
+        for label, func in (('direct', dispatch_event), ('test_client', fallback_handler)):
+            func(event, None)  # Warm invocation
+            started = time.perf_counter()
+            for _ in range(iterations):
+                func(event, None)
+            report[f'{name}_{label}_us'] = round((time.perf_counter() - started) / iterations * 1e6, 1)
+        report[f'{name}_speedup'] = round(report[f'{name}_test_client_us'] / report[f'{name}_direct_us'], 2)
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serverless adapter utilities')
+    parser.add_argument('--benchmark', type=int, metavar='N', default=1000,
+                        help='Invocations per handler and event')
+    args = parser.parse_args()
+    print(json.dumps(benchmark(args.benchmark), indent=2))
@@ -0,0 +1,221 @@
+"""
+Fraud Detection Shadow Scoring
+Champion/challenger evaluation of a retrained model on live traffic
+
+A sample of production requests is copied onto a bounded queue after the
+champion has answered. A background worker scores the copies with the
+challenger in batches and records both scores, so the challenger never adds
+latency to a primary response; when the queue is full, shadow work is
+dropped instead. Only answers the champion DNN produced are compared:
+rule-based fallbacks, cascade rule-stage decisions and deadline-degraded
+answers are skipped, so the statistics compare model with model.
+"""
+
+import os
+import time
+import queue
+import random
+import atexit
+import logging
+import threading
+from collections import deque
+
+import numpy as np
+
+from models.fraud_model import FraudDetectionModel
+
+logger = logging.getLogger(__name__)
+
+CLASSIFICATIONS = ['LEGITIMATE', 'SUSPICIOUS', 'FRAUD']
+
+# model_used of champion answers that are compared with the challenger
+CHAMPION_MODEL = 'Deep Neural Network'
+
+
+class ShadowScorer:
+    """
+    Background challenger scoring with agreement statistics
+
+    Agreement is counted on classifications; the probability gap is tracked
+    as a running mean. The most recent disagreements are kept for
+    inspection via /api/shadow.
+    """
+
+    def __init__(self, challenger, sample_rate=0.1, queue_size=5000, batch_size=256,
+                 flush_interval=0.5, store=None, recent_disagreements=50):
+        self.challenger = challenger
+        self.sample_rate = max(0.0, min(1.0, sample_rate))
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.store = store
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._worker = None
+        self._worker_pid = None
+        self._stopping = threading.Event()
+        self.recent_disagreements = deque(maxlen=recent_disagreements)
+        self.counters = {
+            'sampled': 0,
+            'skipped_non_model': 0,
+            'scored': 0,
+            'dropped': 0,
+            'errors': 0,
+            'agreements': 0,
+            'disagreements': 0,
+        }
+        # confusion[champion][challenger] = count
+        self.confusion = {c: {d: 0 for d in CLASSIFICATIONS} for c in CLASSIFICATIONS}
+        self._abs_diff_sum = 0.0
+        atexit.register(self.close)
+
+    @classmethod
+    def from_config(cls, config, store=None):
+        """Build the shadow scorer from Config, or return None if no challenger is configured"""
+        if not config.SHADOW_MODEL_PATH or config.SHADOW_SAMPLE_RATE <= 0:
+            return None
+        challenger = FraudDetectionModel(model_path=config.SHADOW_MODEL_PATH)
+        challenger.set_thresholds(config.FRAUD_THRESHOLD, config.HIGH_RISK_THRESHOLD)
+        return cls(
+            challenger,
+            sample_rate=config.SHADOW_SAMPLE_RATE,
+            queue_size=config.SHADOW_QUEUE_SIZE,
+            batch_size=config.SHADOW_BATCH_SIZE,
+            flush_interval=config.SHADOW_FLUSH_INTERVAL,
+            store=store
+        )
+
+    @property
+    def challenger_name(self):
+        return os.path.normpath(self.challenger.model_path)
+
+    def _ensure_worker(self):
+        pid = os.getpid()
+        if self._worker_pid == pid and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker_pid == pid and self._worker.is_alive():
+                return
+            if self._worker_pid != pid:
+                self._queue = queue.Queue(maxsize=self._queue.maxsize)
+                self._stopping = threading.Event()
+            self._worker = threading.Thread(target=self._score_loop, name='shadow-scorer', daemon=True)
+            self._worker_pid = pid
+            self._worker.start()
+
+    def submit(self, transaction_id, transaction_data, champion_result):
+        """
+        Offer a scored request for shadow scoring (never blocks)
+
+        Answers not produced by the champion DNN (rule-based fallback,
+        cascade rule stage, deadline-degraded) are not comparable and are
+        only counted.
+
+        Returns:
+            bool: True if the request was queued
+        """
+        if champion_result.get('model_used') != CHAMPION_MODEL or champion_result.get('degraded'):
+            with self._lock:
+                self.counters['skipped_non_model'] += 1
+            return False
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return False
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait((transaction_id, dict(transaction_data), champion_result))
+        except queue.Full:
+            with self._lock:
+                self.counters['dropped'] += 1
+            return False
+        with self._lock:
+            self.counters['sampled'] += 1
+        return True
+
+    def _score_loop(self):
+        # The challenger loads in the background thread so a slow or broken
+        # artifact can never delay startup of the champion
+        if not self.challenger.is_loaded:
+            self.challenger.load_model()
+        while not (self._stopping.is_set() and self._queue.empty()):
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            items = [first]
+            while len(items) < self.batch_size:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._score_batch(items)
+            except Exception as e:
+                logger.error(f"Error in shadow scoring of {len(items)} transactions: {e}")
+                with self._lock:
+                    self.counters['errors'] += len(items)
+            finally:
+                for _ in items:
+                    self._queue.task_done()
+
+    def _score_batch(self, items):
+        if not self.challenger.is_loaded:
+            raise RuntimeError('Challenger model is not loaded')
+        features = self.challenger.build_feature_matrix([transaction for _, transaction, _ in items])
+        probabilities = np.asarray(self.challenger.score_feature_matrix(features)).reshape(-1)
+
+        for (transaction_id, _, champion_result), probability in zip(items, probabilities):
+            probability = float(probability)
+            classification, _ = self.challenger.classify_probability(probability)
+            champion_classification = champion_result.get('classification')
+            agree = classification == champion_classification
+            with self._lock:
+                self.counters['scored'] += 1
+                self.counters['agreements' if agree else 'disagreements'] += 1
+                self._abs_diff_sum += abs(probability - float(champion_result.get('probability', 0.0)))
+                if champion_classification in self.confusion:
+                    self.confusion[champion_classification][classification] += 1
+                if not agree:
+                    self.recent_disagreements.append({
+                        'transaction_id': transaction_id,
+                        'timestamp': time.time(),
+                        'champion': {
+                            'probability': champion_result.get('probability'),
+                            'classification': champion_classification,
+                            'model_used': champion_result.get('model_used')
+                        },
+                        'challenger': {
+                            'probability': round(probability, 4),
+                            'classification': classification
+                        }
+                    })
+            if self.store is not None:
+                self.store.record_shadow(
+                    transaction_id, champion_result, probability, classification, self.challenger_name
+                )
+
+    def flush(self):
+        """Block until every queued request has been shadow scored"""
+        if self._worker_pid == os.getpid():
+            self._queue.join()
+
+    def close(self):
+        if self._worker_pid == os.getpid() and self._worker.is_alive():
+            self._stopping.set()
+            self._worker.join(timeout=10)
+        atexit.unregister(self.close)
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self.counters)
+            scored = counters['scored']
+            return dict(
+                counters,
+                challenger=self.challenger_name,
+                challenger_loaded=self.challenger.is_loaded,
+                sample_rate=self.sample_rate,
+                pending=self._queue.qsize(),
+                agreement_rate=round(counters['agreements'] / scored, 4) if scored else None,
+                mean_abs_probability_diff=round(self._abs_diff_sum / scored, 4) if scored else None,
+                confusion={c: dict(row) for c, row in self.confusion.items()},
+                recent_disagreements=list(self.recent_disagreements)
+            )
@@ -0,0 +1,114 @@
+"""
+Shared fixtures for the test suite
+
+Tests run without TensorFlow: models are NumPy DenseNetworks attached to a
+FraudDetectionModel, and artifact directories hold a student_model.npz
+instead of the Keras .h5.
+"""
+
+import os
+import sys
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.dense_network import DenseNetwork  # noqa: E402
+from models.features import DEFAULT_FEATURE_NAMES, NUMERICAL_FEATURES, build_feature_matrix  # noqa: E402
+from models.fraud_model import FraudDetectionModel, STUDENT_MODEL_FILE  # noqa: E402
+
+TRANSACTION_TYPES = ['CASH_IN', 'CASH_OUT', 'DEBIT', 'PAYMENT', 'TRANSFER']
+
+# API payloads shared by the endpoint tests: a low-risk payment the cascade
+# rule stage answers, and a transfer that drains the origin account
+PAYMENT = {'type': 'PAYMENT', 'amount': 1000.0, 'oldbalanceOrg': 5000.0, 'newbalanceOrig': 4000.0,
+           'oldbalanceDest': 0.0, 'newbalanceDest': 0.0, 'step': 10, 'isFlaggedFraud': 0}
+TRANSFER = {'type': 'TRANSFER', 'amount': 5000.0, 'oldbalanceOrg': 5000.0, 'newbalanceOrig': 0.0,
+            'oldbalanceDest': 0.0, 'newbalanceDest': 5000.0, 'step': 10, 'isFlaggedFraud': 0}
+
+
+def make_transactions(n, seed=0, fraud_rate=0.2):
+    """Synthetic PaySim-shaped transactions sorted by step, with an isFraud label"""
+    rng = np.random.default_rng(seed)
+    amount = rng.lognormal(9, 2, n).round(2)
+    old_orig = (amount * rng.uniform(0.5, 3, n)).round(2)
+    old_dest = rng.lognormal(10, 2, n).round(2)
+    is_fraud = (rng.random(n) < fraud_rate).astype(int)
+    return pd.DataFrame({
+        'step': np.sort(rng.integers(1, 744, n)),
+        'type': rng.choice(TRANSACTION_TYPES, n),
+        'amount': amount,
+        'nameOrig': [f'C{i}' for i in rng.integers(0, n, n)],
+        'oldbalanceOrg': old_orig,
+        'newbalanceOrig': np.maximum(old_orig - amount, 0).round(2),
+        'nameDest': [f'M{i}' for i in rng.integers(0, n, n)],
+        'oldbalanceDest': old_dest,
+        'newbalanceDest': (old_dest + amount).round(2),
+        'isFraud': is_fraud,
+        'isFlaggedFraud': 0,
+    })
+
+
+def make_network(seed=0, widths=(128, 64, 32, 1)):
+    """Randomly initialised Dense stack with the production architecture"""
+    rng = np.random.default_rng(seed)
+    layers = []
+    fan_in = len(DEFAULT_FEATURE_NAMES)
+    for i, width in enumerate(widths):
+        kernel = rng.normal(0, np.sqrt(2.0 / fan_in), (fan_in, width)).astype(np.float32)
+        activation = 'sigmoid' if i == len(widths) - 1 else 'relu'
+        layers.append((kernel, np.zeros(width, dtype=np.float32), activation))
+        fan_in = width
+    return DenseNetwork(layers)
+
+
+def fit_scaler(transactions):
+    from sklearn.preprocessing import StandardScaler
+
+    raw = build_feature_matrix(transactions)
+    columns = [DEFAULT_FEATURE_NAMES.index(name) for name in NUMERICAL_FEATURES]
+    return StandardScaler().fit(pd.DataFrame(raw[:, columns], columns=NUMERICAL_FEATURES))
+
+
+@pytest.fixture
+def transactions():
+    return make_transactions(2000)
+
+
+@pytest.fixture
+def model(transactions):
+    fraud_model = FraudDetectionModel(model_path='unused/')
+    fraud_model.attach_network(make_network(), scaler=fit_scaler(transactions),
+                               feature_names=list(DEFAULT_FEATURE_NAMES))
+    return fraud_model
+
+
+@pytest.fixture
+def artifact_dir(tmp_path, transactions):
+    """Model directory loadable by FraudDetectionModel.load_model without TensorFlow"""
+    make_network().save(str(tmp_path / STUDENT_MODEL_FILE))
+    joblib.dump(fit_scaler(transactions), tmp_path / 'scaler.pkl')
+    joblib.dump(list(DEFAULT_FEATURE_NAMES), tmp_path / 'feature_names.pkl')
+    return tmp_path
+
+
+@pytest.fixture
+def app_module(monkeypatch, model):
+    """app.py serving the fixture model, with admission control disabled"""
+    import app
+    from admission import AdmissionController
+
+    monkeypatch.setattr(app, 'fraud_model', model)
+    monkeypatch.setattr(app, 'admission', AdmissionController(enabled=False))
+    monkeypatch.setattr(app, 'similar_cases', None)
+    monkeypatch.setattr(app, '_similar_cases_checked', True)
+    monkeypatch.setitem(app.app_stats, 'ready', True)
+    return app
+
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
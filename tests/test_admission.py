@@ -0,0 +1,169 @@
+import asyncio
+import json
+
+import pytest
+
+import admission as admission_module
+from admission import AdmissionController
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = Clock()
+    monkeypatch.setattr(admission_module.time, 'monotonic', fake)
+    return fake
+
+
+def test_bucket_allows_burst_then_refills(clock):
+    controller = AdmissionController(rate_per_minute=60, burst=3)
+    for _ in range(3):
+        assert controller.admit('a').allowed
+        controller.release()
+    decision = controller.admit('a')
+    assert (decision.allowed, decision.status, decision.retry_after) == (False, 429, 1)
+
+    clock.now += 2.0  # one token per second
+    assert controller.admit('a').allowed
+    controller.release()
+    assert controller.admit('a').allowed
+    controller.release()
+    assert not controller.admit('a').allowed
+
+
+def test_clients_have_separate_buckets(clock):
+    controller = AdmissionController(rate_per_minute=60, burst=1)
+    assert controller.admit('a').allowed
+    assert not controller.admit('a').allowed
+    assert controller.admit('b').allowed
+
+
+def test_batch_cost_and_cap_at_burst(clock):
+    controller = AdmissionController(rate_per_minute=60, burst=10, row_cost=0.1)
+    assert controller.batch_cost(5) == 1.0
+    assert controller.batch_cost(80) == pytest.approx(8.0)
+    assert controller.admit('a', controller.batch_cost(80)).allowed
+    controller.release()
+    decision = controller.admit('a', controller.batch_cost(80))
+    assert not decision.allowed and decision.retry_after == 6
+
+    # A batch costing more than the burst still runs once the bucket is full
+    clock.now += 60
+    assert controller.admit('a', controller.batch_cost(5000)).allowed
+
+
+def test_in_flight_limit_sheds_with_503(clock):
+    controller = AdmissionController(rate_per_minute=600, max_in_flight=2)
+    assert controller.admit('a').allowed
+    assert controller.admit('b').allowed
+    decision = controller.admit('c')
+    assert (decision.allowed, decision.status) == (False, 503)
+    controller.release()
+    assert controller.admit('c').allowed
+    assert controller.stats()['rejected_overloaded'] == 1
+
+
+def test_least_recently_seen_clients_are_evicted(clock):
+    controller = AdmissionController(rate_per_minute=60, burst=1, max_clients=2, max_in_flight=100)
+    controller.admit('a')
+    controller.admit('b')
+    controller.admit('a')  # refreshes a
+    controller.admit('c')  # evicts b
+    assert set(controller._buckets) == {'a', 'c'}
+    assert controller.admit('b').allowed  # forgotten clients start with a full bucket
+
+
+def test_precheck_rejects_without_charging(clock):
+    controller = AdmissionController(rate_per_minute=60, burst=2)
+    assert not controller.should_precheck_reject('a')
+    controller.admit('a', 2)
+    assert controller.should_precheck_reject('a')
+    assert controller.counters['rejected_rate_limited'] == 0
+
+
+def test_disabled_controller_admits_everything(clock):
+    controller = AdmissionController(rate_per_minute=1, max_in_flight=0, enabled=False)
+    assert all(controller.admit('a', 100).allowed for _ in range(10))
+    assert controller.in_flight == 0
+
+
+# ================================
+# ASGI: rejection before the body is read
+# ================================
+
+def call_asgi(application, path, body):
+    messages = []
+    reads = []
+
+    async def receive():
+        reads.append(path)
+        return {'type': 'http.request', 'body': json.dumps(body).encode(), 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        'type': 'http', 'method': 'POST', 'path': path, 'client': ('10.0.0.1', 1234),
+        'headers': [(b'content-type', b'application/json')],
+    }
+    asyncio.run(application(scope, receive, send))
+    status = next(message['status'] for message in messages if message['type'] == 'http.response.start')
+    return status, reads
+
+
+@pytest.fixture
+def asgi(monkeypatch, clock):
+    import app
+    import asgi_app
+
+    controller = AdmissionController(rate_per_minute=60, burst=2, max_in_flight=10)
+    monkeypatch.setattr(app, 'admission', controller)
+    monkeypatch.setattr(asgi_app, 'admission', controller)
+    return asgi_app, controller
+
+
+@pytest.mark.parametrize('path', ['/api/predict', '/api/batch-predict'])
+def test_asgi_rejects_over_limit_clients_before_reading_body(asgi, path):
+    asgi_app, controller = asgi
+    controller.admit('ip:10.0.0.1', 2)
+    controller.release()
+    status, reads = call_asgi(asgi_app.application, path, {'transactions': []})
+    assert status == 429 and reads == []
+
+
+def test_asgi_sheds_overload_before_reading_body(asgi):
+    asgi_app, controller = asgi
+    controller.in_flight = controller.max_in_flight
+    status, reads = call_asgi(asgi_app.application, '/api/batch-predict', {'transactions': []})
+    assert status == 503 and reads == []
+
+
+def test_asgi_charges_batch_cost_after_parsing(asgi):
+    asgi_app, controller = asgi
+    controller.burst = 10.0
+    controller.row_cost = 1.0
+    controller.admit('ip:10.0.0.1', 7)
+    controller.release()
+    batch = {'transactions': [{'type': 'PAYMENT', 'amount': 1}] * 5}
+    status, reads = call_asgi(asgi_app.application, '/api/batch-predict', batch)
+    assert status == 429 and len(reads) == 1
+    assert controller.in_flight == 0
+
+
+def test_split_across_workers_divides_the_limits(clock):
+    controller = AdmissionController(rate_per_minute=120, burst=8, max_in_flight=10)
+    controller.split_across(4)
+    assert controller.rate_per_second == pytest.approx(0.5)
+    assert (controller.burst, controller.max_in_flight) == (2.0, 3)
+    assert [controller.admit('client').allowed for _ in range(3)] == [True, True, False]
+
+    tiny = AdmissionController(rate_per_minute=6, burst=2, max_in_flight=2)
+    tiny.split_across(8)
+    assert (tiny.burst, tiny.max_in_flight) == (1.0, 1)  # A single request always fits
@@ -0,0 +1,125 @@
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from config import Config
+from tests.conftest import TRANSFER
+
+
+@pytest.fixture
+def asgi_app(app_module, monkeypatch):
+    import asgi_app
+    monkeypatch.setattr(asgi_app, 'admission', app_module.admission)
+    monkeypatch.setattr(asgi_app, '_inference_slots', None)  # Bound to each test's event loop
+    return asgi_app
+
+
+def exchange(application, method, path, body=None, chunks=None, content_type=b'application/json', query=b'',
+             headers=()):
+    """Drive one HTTP request through the ASGI app; returns the messages it sent"""
+    if chunks is None:
+        chunks = [json.dumps(body).encode()] if body is not None else [b'']
+    incoming = [{'type': 'http.request', 'body': chunk, 'more_body': i < len(chunks) - 1}
+                for i, chunk in enumerate(chunks)]
+    messages = []
+
+    async def receive():
+        return incoming.pop(0)
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {'type': 'http', 'method': method, 'path': path, 'query_string': query,
+             'client': ('10.0.0.1', 1234), 'headers': [(b'content-type', content_type), *headers]}
+    asyncio.run(application(scope, receive, send))
+    return messages
+
+
+def request(application, method, path, body=None, **kwargs):
+    """Like exchange, for complete responses; returns (status, headers, decoded body)"""
+    start, payload = exchange(application, method, path, body, **kwargs)
+    raw = payload['body']
+    return start['status'], dict(start['headers']), json.loads(raw) if raw else None
+
+
+def test_get_routes(asgi_app):
+    status, headers, body = request(asgi_app.application, 'GET', '/api/health/live/')
+    assert status == 200 and body == {'status': 'alive'}
+    assert headers[b'access-control-allow-origin'] == b'*'
+    assert int(headers[b'content-length']) == len(json.dumps(body, separators=(',', ':')))
+    assert request(asgi_app.application, 'GET', '/api/health/ready')[0] == 200
+
+
+def test_unknown_routes_methods_and_preflight(asgi_app):
+    assert request(asgi_app.application, 'GET', '/api/nope')[0] == 404
+    assert request(asgi_app.application, 'GET', '/api/predict')[0] == 405
+    status, headers, _ = request(asgi_app.application, 'OPTIONS', '/api/predict')
+    assert status == 200 and headers[b'access-control-allow-methods'] == b'POST, OPTIONS'
+
+
+def test_prediction_matches_the_flask_app(asgi_app, client):
+    body = json.dumps(TRANSFER).encode()
+    status, _, payload = request(asgi_app.application, 'POST', '/api/predict',
+                                 chunks=[body[:10], body[10:]], query=b'compact=1')
+    assert status == 200
+    assert payload['prediction'] == client.post('/api/predict?compact=1', json=TRANSFER).get_json()['prediction']
+
+
+def test_body_errors(asgi_app, monkeypatch):
+    assert request(asgi_app.application, 'POST', '/api/explain', TRANSFER, content_type=b'text/plain')[0] == 400
+    assert request(asgi_app.application, 'POST', '/api/explain', chunks=[b'{nope'])[0] == 400
+    monkeypatch.setattr(Config, 'ASYNC_MAX_BODY_BYTES', 16)
+    assert request(asgi_app.application, 'POST', '/api/explain', TRANSFER)[0] == 413
+
+
+def test_head_sends_headers_without_a_body(asgi_app):
+    status, headers, body = request(asgi_app.application, 'HEAD', '/api/health/live')
+    assert status == 200 and body is None
+    assert int(headers[b'content-length']) == len(b'{"status":"alive"}')
+
+
+def test_profile_start_reads_the_body_leniently(asgi_app, app_module, monkeypatch):
+    from profiler import SamplingProfiler
+    monkeypatch.setattr(Config, 'ADMIN_TOKEN', 'secret')
+    monkeypatch.setattr(app_module, 'profiler', SamplingProfiler(max_seconds=0.1))
+    token = [(Config.ADMIN_TOKEN_HEADER.lower().encode(), b'secret')]
+
+    # Like Flask's get_json(silent=True): no JSON content-type means defaults
+    status, _, body = request(asgi_app.application, 'POST', '/api/admin/profile/start', chunks=[b''],
+                              content_type=b'text/plain', headers=token)
+    assert status == 202 and body['session']['seconds'] == 0.1
+    app_module.profiler._thread.join(5)
+    assert request(asgi_app.application, 'POST', '/api/admin/profile/start', chunks=[b'{nope'],
+                   headers=token)[0] == 202
+    app_module.profiler._thread.join(5)
+
+
+def test_errors_after_the_response_started_only_close_it(asgi_app, monkeypatch):
+    async def broken(scope, data, send):
+        await send({'type': 'http.response.start', 'status': 200, 'headers': []})
+        raise RuntimeError('boom')
+
+    monkeypatch.setitem(asgi_app.ROUTES, '/api/health/live', ('GET', broken))
+    messages = exchange(asgi_app.application, 'GET', '/api/health/live')
+    assert [message['type'] for message in messages] == ['http.response.start', 'http.response.body']
+    assert messages[0]['status'] == 200 and messages[1]['body'] == b''
+
+
+def test_lifespan_loads_the_model(asgi_app, monkeypatch):
+    loaded = []
+    monkeypatch.setattr(asgi_app, 'initialize_model', lambda: loaded.append(True))
+    monkeypatch.setattr(asgi_app, 'inference_executor', ThreadPoolExecutor(max_workers=1))
+    incoming = [{'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}]
+    sent = []
+
+    async def receive():
+        return incoming.pop(0)
+
+    async def send(message):
+        sent.append(message['type'])
+
+    asyncio.run(asgi_app.application({'type': 'lifespan'}, receive, send))
+    assert loaded == [True]
+    assert sent == ['lifespan.startup.complete', 'lifespan.shutdown.complete']
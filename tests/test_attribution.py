@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from models.attribution import input_gradients, gradient_x_input, integrated_gradients
+from tests.conftest import TRANSFER, make_network
+
+
+@pytest.fixture
+def network():
+    return make_network(seed=3)
+
+
+@pytest.fixture
+def features(network):
+    return np.random.default_rng(4).normal(size=(6, network.layers[0][0].shape[0])).astype(np.float32)
+
+
+def _forward64(network, features):
+    """float64 forward pass, so finite differences are not swamped by rounding"""
+    x = np.asarray(features, dtype=np.float64)
+    for kernel, bias, activation in network.layers:
+        z = x @ kernel.astype(np.float64) + bias
+        x = np.maximum(z, 0) if activation == 'relu' else 1 / (1 + np.exp(-z))
+    return x.reshape(-1)
+
+
+def test_input_gradients_match_finite_differences(network, features):
+    probabilities, grads = input_gradients(network, features)
+    np.testing.assert_allclose(probabilities, network.predict(features).reshape(-1), rtol=1e-5)
+    eps = 1e-5
+    for j in range(features.shape[1]):
+        up, down = features.astype(np.float64), features.astype(np.float64)
+        up[:, j] += eps
+        down[:, j] -= eps
+        numeric = (_forward64(network, up) - _forward64(network, down)) / (2 * eps)
+        np.testing.assert_allclose(grads[:, j], numeric, atol=1e-4)
+
+
+def test_integrated_gradients_are_complete(network, features):
+    probabilities, attributions = integrated_gradients(network, features, steps=64)
+    baseline = network.predict(np.zeros((1, features.shape[1]), dtype=np.float32)).reshape(-1)
+    np.testing.assert_allclose(attributions.sum(axis=1), probabilities - baseline, atol=5e-3)
+
+
+def test_zero_input_gets_zero_attribution(network, features):
+    baseline = features[0]
+    _, ig = integrated_gradients(network, features[:1], baseline=baseline)
+    _, gxi = gradient_x_input(network, features[:1], baseline=baseline)
+    assert not ig.any() and not gxi.any()
+
+
+def test_explain_endpoint_ranks_top_features(client):
+    body = client.post('/api/explain', json={'transactions': [TRANSFER, TRANSFER], 'top_k': 3}).get_json()
+    assert body['method'] == 'integrated_gradients'
+    first, second = body['results']
+    assert first['attributions'] == second['attributions']
+    top = [entry['feature'] for entry in first['top_features']]
+    magnitudes = sorted(first['attributions'].items(), key=lambda item: -abs(item[1]))
+    assert top == [name for name, _ in magnitudes[:3]]
+
+
+@pytest.mark.parametrize('payload', [
+    {'transactions': []},
+    {'transactions': [TRANSFER], 'method': 'shap'},
+    {'transactions': [TRANSFER], 'steps': 'many'},
+])
+def test_explain_rejects_bad_requests(client, payload):
+    assert client.post('/api/explain', json=payload).status_code == 400
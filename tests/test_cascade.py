@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from config import Config
+from models.cascade import ScoringCascade
+from tests.conftest import PAYMENT, TRANSFER
+
+
+@pytest.fixture
+def cascade():
+    return ScoringCascade.from_config(Config)
+
+
+def test_scalar_and_vectorised_rules_agree(cascade, transactions):
+    rows = transactions.to_dict('records')
+    assert list(cascade.escalation_reasons(transactions)) == [cascade.escalation_reason(row) for row in rows]
+
+
+@pytest.mark.parametrize('changes, decided', [
+    ({}, True),
+    ({'type': 'TRANSFER'}, False),
+    ({'type': 'UNKNOWN'}, False),
+    ({'isFlaggedFraud': 1}, False),
+    ({'amount': 10_000_000.0, 'oldbalanceOrg': 20_000_000.0, 'newbalanceOrig': 10_000_000.0}, False),
+    ({'newbalanceOrig': 0.0, 'amount': 5000.0}, False),
+    ({'newbalanceOrig': 100.0}, False),
+])
+def test_screen(cascade, changes, decided):
+    result = cascade.screen(dict(PAYMENT, **changes))
+    assert (result is not None) == decided
+
+
+@pytest.fixture
+def scoring_app(monkeypatch, model, cascade):
+    import app
+
+    calls = []
+    screen = cascade.screen
+    monkeypatch.setattr(cascade, 'screen', lambda transaction: calls.append(1) or screen(transaction))
+    model.enable_cascade(cascade)
+    monkeypatch.setattr(app, 'fraud_model', model)
+    return app, calls
+
+
+def test_score_transaction_screens_rule_rows_once(scoring_app):
+    app, calls = scoring_app
+    result = app.score_transaction(dict(PAYMENT), deadline_ms=50, received_at=None)
+    assert result['model_used'] == 'cascade_rules' and result['degraded'] is False
+    assert len(calls) == 1
+
+
+def test_score_transaction_escalates_to_the_model_once(scoring_app):
+    app, calls = scoring_app
+    result = app.score_transaction(dict(TRANSFER))
+    assert result['model_used'] == 'Deep Neural Network' and result['decided_by'] == 'model'
+    assert len(calls) == 1
+    expected = app.fraud_model.score_feature_matrix(app.fraud_model.build_feature_matrix([TRANSFER]))
+    assert result['probability'] == pytest.approx(float(np.ravel(expected)[0]), abs=1e-6)
@@ -0,0 +1,61 @@
+import json
+
+import numpy as np
+import pytest
+
+from models.dataset_cache import convert_csv, count_rows, load_columns, load_dataset, read_meta, META_FILE
+from models.evaluation import iter_labelled_chunks
+
+
+@pytest.fixture
+def csv_path(tmp_path, transactions):
+    path = tmp_path / 'log.csv'
+    transactions.head(700).to_csv(path, index=False)
+    return str(path)
+
+
+def test_count_rows_handles_missing_trailing_newline(tmp_path):
+    path = tmp_path / 'rows.csv'
+    path.write_bytes(b'a,b\n1,2\n3,4')
+    assert count_rows(str(path)) == 2
+    path.write_bytes(b'a,b\n1,2\n3,4\n')
+    assert count_rows(str(path), block_size=3) == 2
+
+
+def test_round_trip_matches_the_csv(tmp_path, csv_path, transactions):
+    cache = str(tmp_path / 'cache')
+    meta = convert_csv(csv_path, cache, chunk_rows=128)
+    source = transactions.head(700).reset_index(drop=True)
+
+    assert meta['rows'] == 700 and read_meta(cache) == meta
+    frame = load_dataset(cache)
+    assert list(frame['type'].astype(str)) == list(source['type'])
+    np.testing.assert_array_equal(frame['step'], source['step'])
+    np.testing.assert_array_equal(frame['isFraud'], source['isFraud'])
+    np.testing.assert_allclose(frame['amount'], source['amount'], rtol=1e-6)
+    np.testing.assert_allclose(frame['balance_diff_orig'], source['oldbalanceOrg'] - source['newbalanceOrig'],
+                               rtol=1e-6, atol=1e-2)
+    assert 'nameOrig' not in frame
+
+
+def test_row_and_column_selection_are_memory_mapped(tmp_path, csv_path):
+    cache = str(tmp_path / 'cache')
+    convert_csv(csv_path, cache)
+    columns = load_columns(cache, ['amount', 'type'], rows=(100, 150))
+    assert set(columns) == {'amount', 'type'}
+    assert len(columns['amount']) == 50 and isinstance(columns['amount'], np.memmap)
+    with pytest.raises(KeyError):
+        load_columns(cache, ['nameDest'])
+
+    chunks = list(iter_labelled_chunks(cache, chunk_rows=300))
+    assert [len(chunk) for chunk in chunks] == [300, 300, 100]
+
+
+def test_stale_cache_version_is_rejected(tmp_path, csv_path):
+    cache = tmp_path / 'cache'
+    convert_csv(csv_path, str(cache))
+    meta = json.loads((cache / META_FILE).read_text())
+    meta['version'] = 0
+    (cache / META_FILE).write_text(json.dumps(meta))
+    with pytest.raises(ValueError, match='version'):
+        load_dataset(str(cache))
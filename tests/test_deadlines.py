@@ -0,0 +1,63 @@
+import pytest
+
+from deadlines import DeadlineController, LatencyEstimator
+from tests.conftest import TRANSFER
+
+
+def test_estimator_tracks_mean_plus_deviation():
+    estimator = LatencyEstimator(initial_ms=20.0, alpha=0.5, deviations=2.0)
+    estimator.observe(10.0)
+    assert (estimator.mean_ms, estimator.deviation_ms) == (10.0, 5.0)
+    estimator.observe(20.0)
+    assert estimator.mean_ms == pytest.approx(15.0)
+    assert estimator.deviation_ms == pytest.approx(7.5)
+    assert estimator.estimate_ms(rows=2) == pytest.approx(60.0)
+
+
+@pytest.mark.parametrize('header, body, expected', [
+    (None, None, (None, None)),
+    ('', 25, (25.0, None)),
+    ('40', 25, (40.0, None)),
+    ('abc', None, (None, 'deadline_ms must be a number of milliseconds')),
+    (None, 0, (None, 'deadline_ms must be greater than 0')),
+])
+def test_parse_deadline(header, body, expected):
+    assert DeadlineController.parse_deadline(header, body) == expected
+
+
+def test_fallback_accounts_for_queueing():
+    controller = DeadlineController(parallelism=2, safety_margin_ms=1.0, initial_estimate_ms=10.0)
+    # estimate = 10 + 2 * 5 = 20 ms per row
+    assert controller.should_fallback(30, elapsed_ms=5) == (False, 26.0)
+    # 4 extra requests queued across 2 workers add 2 * 20 ms
+    assert controller.should_fallback(30, elapsed_ms=5, in_flight=6) == (True, 66.0)
+
+
+def test_fallbacks_are_counted_per_request_and_per_row(app_module, client, monkeypatch):
+    controller = DeadlineController()
+    monkeypatch.setattr(app_module, 'deadlines', controller)
+    # Nothing fits in a 1 microsecond budget, so every row is degraded
+    body = client.post('/api/batch-predict?compact=1',
+                       json={'transactions': [TRANSFER] * 3, 'deadline_ms': 0.001}).get_json()
+    client.post('/api/predict', json=dict(TRANSFER, deadline_ms=0.001))
+    client.post('/api/predict', json=dict(TRANSFER, deadline_ms=60_000))
+
+    assert body['degraded_count'] == 3
+    counters = controller.counters
+    assert counters['requests_with_deadline'] == 3
+    assert counters['deadline_fallbacks'] == 2
+    assert counters['rows_degraded'] == 4
+
+
+@pytest.mark.parametrize('body', [
+    {'transactions': [], 'deadline_ms': 50},
+    {'transactions': [{'type': 'PAYMENT'}] * 101, 'deadline_ms': 50},
+])
+def test_rejected_batches_are_not_counted(monkeypatch, body):
+    import app
+
+    controller = DeadlineController()
+    monkeypatch.setattr(app, 'deadlines', controller)
+    _, status = app.process_batch_prediction(body)
+    assert status == 400
+    assert controller.counters['requests_with_deadline'] == 0
@@ -0,0 +1,118 @@
+import time
+
+import numpy as np
+import pytest
+
+from deadlines import DeadlineController
+from models import distillation, evaluation
+from models.fraud_model import FraudDetectionModel
+from models.features import scale_feature_matrix
+from tests.conftest import PAYMENT, TRANSFER, make_network, make_transactions
+
+
+@pytest.fixture
+def log_csv(tmp_path, monkeypatch):
+    path = tmp_path / 'log.csv'
+    make_transactions(20_000, seed=3).to_csv(path, index=False)
+    monkeypatch.setattr(distillation, 'iter_labelled_chunks',
+                        lambda data_path: evaluation.iter_labelled_chunks(data_path, chunk_rows=1500))
+    return str(path)
+
+
+def test_sample_spans_the_whole_sorted_log(log_csv):
+    sample = distillation.sample_transactions(log_csv, max_rows=2000, seed=1)
+    assert len(sample) == 2000
+    assert sample['step'].is_monotonic_increasing  # Returned in file order
+    # The log is sorted by step; a uniform sample covers every part of it
+    counts = np.histogram(sample['step'], bins=4, range=(1, 744))[0]
+    assert counts.min() > 400
+
+
+def test_sample_is_reproducible_and_without_duplicates(log_csv):
+    first = distillation.sample_transactions(log_csv, max_rows=500, seed=7)
+    second = distillation.sample_transactions(log_csv, max_rows=500, seed=7)
+    assert first.equals(second)
+    assert not first.duplicated().any()
+
+
+def test_sample_smaller_file_returns_everything(log_csv):
+    assert len(distillation.sample_transactions(log_csv, max_rows=10**6)) == 20_000
+
+
+def test_student_learns_the_teacher(model, transactions):
+    raw = model.build_feature_matrix(transactions)
+    targets = model.score_feature_matrix(raw).reshape(-1)
+    scaled = scale_feature_matrix(raw, model.scaler, model.feature_names)
+    student = distillation.train_student(scaled, targets, hidden=(16,), epochs=30, batch_size=256,
+                                         verbose=False)
+    predicted = student.predict(scaled).reshape(-1)
+    assert student.architecture == '16→1'
+    assert np.corrcoef(predicted, targets)[0, 1] > 0.8
+
+
+@pytest.fixture
+def deadline_app(monkeypatch, model):
+    import app
+
+    controller = DeadlineController(initial_estimate_ms=1000.0)
+    monkeypatch.setattr(app, 'fraud_model', model)
+    monkeypatch.setattr(app, 'deadlines', controller)
+    return app
+
+
+def test_deadline_fallback_uses_the_student(deadline_app, artifact_dir, monkeypatch):
+    student = FraudDetectionModel(model_path=str(artifact_dir))
+    student.load_model()
+    assert student.is_loaded and student.backend == 'numpy'
+    monkeypatch.setattr(deadline_app, 'student_model', student)
+
+    transaction = dict(TRANSFER)
+    result = deadline_app.score_transaction(transaction, deadline_ms=5, received_at=time.monotonic())
+    assert result['model_used'] == 'Distilled Student'
+    assert result['degraded'] is True and result['degraded_reason'] == 'deadline'
+    expected = student.score_feature_matrix(student.build_feature_matrix([transaction])).reshape(-1)[0]
+    assert result['probability'] == pytest.approx(float(expected), abs=1e-6)
+
+
+def test_deadline_fallback_without_student_uses_rules(deadline_app, monkeypatch):
+    monkeypatch.setattr(deadline_app, 'student_model', None)
+    result = deadline_app.score_transaction(dict(PAYMENT), deadline_ms=5, received_at=time.monotonic())
+    assert result['model_used'] == 'rule_based_fallback' and result['degraded'] is True
+
+
+def test_student_artifact_describes_itself(artifact_dir):
+    student = FraudDetectionModel(model_path=str(artifact_dir))
+    student.load_model()
+    info = student.get_model_info()
+    assert info['model_type'] == student.model_type == 'Distilled Student'
+    assert info['architecture'] == '128→64→32→1' and info['activation'] == 'ReLU + Sigmoid'
+
+    student.attach_network(make_network(widths=(16, 1)))
+    assert student.get_model_info()['architecture'] == '16→1'
+
+
+def test_prefork_parent_loads_the_student(artifact_dir, monkeypatch):
+    import app
+    import prefork_server
+    from config import Config
+
+    teacher = FraudDetectionModel(model_path=str(artifact_dir))
+    student = FraudDetectionModel(model_path=str(artifact_dir))
+    monkeypatch.setattr(app, 'fraud_model', teacher)
+    monkeypatch.setattr(prefork_server, 'fraud_model', teacher)
+    monkeypatch.setattr(app, 'student_model', student)
+    monkeypatch.setattr(app, 'similar_cases', None)
+    monkeypatch.setattr(app, '_similar_cases_checked', False)
+    monkeypatch.setattr(Config, 'WARMUP_ON_STARTUP', False)
+    for key in ('model_loaded', 'ready'):
+        monkeypatch.setitem(app.app_stats, key, False)
+
+    # Only the startup path is exercised: no socket, no workers
+    server = prefork_server.PreforkServer.__new__(prefork_server.PreforkServer)
+    server.shared_network = None
+    try:
+        server.load_shared_model()
+        assert student.is_loaded and teacher.is_loaded and app.app_stats['ready']
+    finally:
+        if server.shared_network is not None:
+            server.shared_network.release(unlink=True)
@@ -0,0 +1,166 @@
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from models.distributed_scoring import (
+    Coordinator, read_byte_range, read_header, run_worker, score_chunk, serve_coordinator, split_byte_ranges
+)
+from models.fraud_model import FraudDetectionModel
+
+
+@pytest.fixture
+def input_csv(tmp_path, transactions):
+    path = tmp_path / 'input.csv'
+    transactions.to_csv(path, index=False)
+    return str(path)
+
+
+def scored_part(task_id, rows=1):
+    return f'row-{task_id}\n'.encode() * rows
+
+
+def test_byte_ranges_hold_whole_lines_and_cover_the_file(input_csv):
+    ranges = split_byte_ranges(input_csv, 4096)
+    assert len(ranges) > 5
+    assert ranges[0][0] == len(read_header(input_csv))
+    assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+    with open(input_csv, 'rb') as f:
+        f.readline()
+        assert b''.join(read_byte_range(input_csv, start, end) for start, end in ranges) == f.read()
+    assert all(read_byte_range(input_csv, start, end).endswith(b'\n') for start, end in ranges)
+
+
+def test_out_of_order_completions_merge_in_task_order(input_csv, tmp_path):
+    output = str(tmp_path / 'scored.csv')
+    coordinator = Coordinator([input_csv], output, chunk_bytes=8192)
+    leases = [coordinator.lease('w1')['task'] for _ in coordinator.tasks]
+    assert coordinator.lease('w1') == {'retry_after': pytest.approx(1.0)}
+
+    for task in reversed(leases[1:]):
+        coordinator.complete('w1', task['id'], 1, 0.01, scored_part(task['id']))
+    with open(output) as f:
+        assert len(f.read().splitlines()) == 1  # Header only: part 0 is still missing
+    coordinator.complete('w1', leases[0]['id'], 1, 0.01, scored_part(0))
+
+    assert coordinator.finished.is_set() and coordinator.error is None
+    with open(output) as f:
+        lines = f.read().splitlines()
+    assert lines[0].endswith(',fraud_probability,classification')
+    assert lines[1:] == [f'row-{task["id"]}' for task in leases]
+    assert coordinator.report()['task_states'] == {'merged': len(leases)}
+
+
+def test_expired_lease_is_requeued_and_late_upload_is_dropped(input_csv, tmp_path):
+    coordinator = Coordinator([input_csv], str(tmp_path / 'scored.csv'), chunk_bytes=10**9, lease_timeout=0.05)
+    first = coordinator.lease('slow')['task']
+    assert coordinator.heartbeat('slow', first['id'])
+    time.sleep(0.1)
+
+    second = coordinator.lease('fast')['task']
+    assert second['id'] == first['id'] and second['attempt'] == 2
+    assert not coordinator.heartbeat('slow', first['id'])
+    assert coordinator.counters['lease_expiries'] == 1
+
+    coordinator.complete('fast', second['id'], 1, 0.01, scored_part(0))
+    coordinator.complete('slow', first['id'], 1, 0.01, scored_part(99))
+    assert coordinator.counters['duplicate_completions'] == 1
+    with open(coordinator.output_path) as f:
+        assert f.read().splitlines()[1:] == ['row-0']
+
+
+def test_heartbeats_keep_a_lease_alive(input_csv, tmp_path):
+    coordinator = Coordinator([input_csv], str(tmp_path / 'scored.csv'), chunk_bytes=10**9, lease_timeout=0.2)
+    task = coordinator.lease('w1')['task']
+    for _ in range(5):
+        time.sleep(0.08)
+        assert coordinator.heartbeat('w1', task['id'])
+        coordinator.reap()
+    assert coordinator.counters['lease_expiries'] == 0
+
+
+def test_failures_retry_until_max_attempts(input_csv, tmp_path):
+    coordinator = Coordinator([input_csv], str(tmp_path / 'scored.csv'), chunk_bytes=10**9, max_attempts=2)
+    task = coordinator.lease('w1')['task']
+    coordinator.fail('w1', task['id'], 'boom')
+    assert coordinator.counters['retries'] == 1
+    task = coordinator.lease('w2')['task']
+    coordinator.fail('w2', task['id'], 'boom again')
+    assert coordinator.finished.is_set()
+    assert 'failed 2 times' in coordinator.error and 'boom again' in coordinator.error
+    assert coordinator.lease('w3')['done']
+
+
+def test_inputs_must_share_a_header(input_csv, tmp_path):
+    other = tmp_path / 'other.csv'
+    other.write_text('a,b\n1,2\n')
+    with pytest.raises(ValueError):
+        Coordinator([input_csv, str(other)], str(tmp_path / 'scored.csv'))
+
+
+def test_workers_over_http_match_single_process_scoring(input_csv, artifact_dir, tmp_path):
+    output = str(tmp_path / 'scored.csv')
+    coordinator = Coordinator([input_csv], output, chunk_bytes=16384, lease_timeout=10)
+    server = serve_coordinator(coordinator, host='127.0.0.1', port=0)
+    url = f'http://127.0.0.1:{server.server_address[1]}'
+    try:
+        workers = [
+            threading.Thread(target=run_worker, args=(url, str(artifact_dir), f'w{i}'), daemon=True)
+            for i in range(3)
+        ]
+        for worker in workers:
+            worker.start()
+        assert coordinator.finished.wait(60)
+        for worker in workers:
+            worker.join(10)
+    finally:
+        server.shutdown()
+    assert coordinator.error is None
+
+    model = FraudDetectionModel(model_path=str(artifact_dir))
+    model.load_model()
+    with open(input_csv, 'rb') as f:
+        expected, rows = score_chunk(model, f.read())
+    scored = pd.read_csv(output)
+    assert len(scored) == rows
+    with open(output, 'rb') as f:
+        f.readline()
+        assert f.read() == expected
+    assert sum(stats['rows'] for stats in coordinator.report()['workers'].values()) == rows
+
+
+def test_scored_rows_keep_the_input_text(model, transactions):
+    header = ','.join(transactions.columns)
+    rows = [','.join(str(value) for value in row) for row in transactions.head(3).itertuples(index=False)]
+    # Formatting pandas would not reproduce: trailing zeros, exponent notation, CRLF, a blank line
+    rows[0] = rows[0].replace(f",{transactions['amount'].iloc[0]},", f",{transactions['amount'].iloc[0]:.4f},")
+    rows[1] = rows[1].replace(f",{transactions['amount'].iloc[1]},", f",{transactions['amount'].iloc[1]:.3e},")
+    csv_bytes = (header + '\r\n' + '\r\n'.join(rows) + '\r\n\r\n').encode()
+
+    body, count = score_chunk(model, csv_bytes)
+
+    assert count == 3
+    lines = body.decode().split('\n')
+    assert lines[-1] == ''
+    for line, row in zip(lines, rows):
+        assert line.startswith(row + ',')
+        probability, label = line[len(row) + 1:].split(',')
+        assert 0 <= float(probability) <= 1 and label in ('FRAUD', 'SUSPICIOUS', 'LEGITIMATE')
+
+
+def test_stale_heap_entries_do_not_expire_renewed_or_finished_leases(input_csv, tmp_path):
+    coordinator = Coordinator([input_csv], str(tmp_path / 'scored.csv'), chunk_bytes=8192, lease_timeout=0.05)
+    *done, live = [coordinator.lease('w1')['task'] for _ in coordinator.tasks]
+    for task in done:
+        coordinator.complete('w1', task['id'], 1, 0.01, scored_part(task['id']))
+    time.sleep(0.03)
+    assert coordinator.heartbeat('w1', live['id'])
+    time.sleep(0.03)  # Past the first lease's expiry, within the renewed one
+    coordinator.reap()
+
+    assert coordinator.counters['lease_expiries'] == 0
+    assert [task_id for _, task_id in coordinator._leases] == [live['id']]
+    time.sleep(0.05)
+    coordinator.reap()
+    assert coordinator.counters['lease_expiries'] == 1 and coordinator._leases == []
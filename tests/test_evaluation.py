@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+
+from models.evaluation import ScoreHistogram, evaluate, recommend_thresholds
+from models.fraud_model import FraudDetectionModel
+
+
+@pytest.fixture
+def scores():
+    rng = np.random.default_rng(0)
+    labels = rng.random(20_000) < 0.05
+    probabilities = np.clip(np.where(labels, rng.beta(5, 2, len(labels)), rng.beta(1, 6, len(labels))), 0, 1)
+    return probabilities, labels
+
+
+def brute_force(probabilities, labels, threshold):
+    predicted = probabilities >= threshold
+    tp = int((predicted & labels).sum())
+    fp = int((predicted & ~labels).sum())
+    fn = int((~predicted & labels).sum())
+    precision = tp / (tp + fp) if tp + fp else 1.0
+    recall = tp / max(int(labels.sum()), 1)
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return tp, fp, fn, precision, recall, f1
+
+
+def test_curve_is_exact_at_bin_edges(scores):
+    probabilities, labels = scores
+    # Keep scores away from edges so float rounding in the binning cannot move them
+    probabilities = (np.floor(probabilities * 100) + 0.5) / 100
+    histogram = ScoreHistogram(bins=100)
+    histogram.update(probabilities, labels)
+    curve = histogram.curve()
+    for i in (0, 10, 37, 50, 80, 99):
+        row = curve.iloc[i]
+        tp, fp, fn, precision, recall, f1 = brute_force(probabilities, labels, row['threshold'])
+        assert (row['tp'], row['fp'], row['fn']) == (tp, fp, fn)
+        assert row['precision'] == pytest.approx(precision)
+        assert row['recall'] == pytest.approx(recall)
+        assert row['f1'] == pytest.approx(f1)
+    assert (curve['tp'] + curve['fn'] == labels.sum()).all()
+    assert (curve['fp'] + curve['tn'] == (~labels).sum()).all()
+
+
+def test_merged_shards_equal_one_pass(scores):
+    probabilities, labels = scores
+    whole = ScoreHistogram(bins=200)
+    whole.update(probabilities, labels)
+    merged = ScoreHistogram(bins=200)
+    for shard in np.array_split(np.arange(len(labels)), 7):
+        part = ScoreHistogram(bins=200)
+        part.update(probabilities[shard], labels[shard])
+        merged.merge(part)
+    assert np.array_equal(merged.positives, whole.positives)
+    assert np.array_equal(merged.negatives, whole.negatives)
+    with pytest.raises(ValueError):
+        merged.merge(ScoreHistogram(bins=10))
+
+
+def test_recommendation_maximises_f1_and_meets_suspicious_recall(scores):
+    probabilities, labels = scores
+    histogram = ScoreHistogram(bins=100)
+    histogram.update(probabilities, labels)
+    curve = histogram.curve()
+    recommended = recommend_thresholds(histogram, suspicious_recall=0.95)
+
+    assert recommended['fraud']['f1'] == pytest.approx(curve['f1'].max(), abs=1e-6)
+    suspicious = recommended['HIGH_RISK_THRESHOLD']
+    assert suspicious <= recommended['FRAUD_THRESHOLD']
+    assert recommended['suspicious']['recall'] >= 0.95
+    # The next edge up would miss the recall target
+    next_edge = curve[curve['threshold'] > suspicious + 1e-9].iloc[0]
+    assert next_edge['recall'] < 0.95 or next_edge['threshold'] > recommended['FRAUD_THRESHOLD']
+
+
+def test_min_fraud_recall_constrains_the_fraud_cut_off(scores):
+    probabilities, labels = scores
+    histogram = ScoreHistogram(bins=100)
+    histogram.update(probabilities, labels)
+    free = recommend_thresholds(histogram)
+    constrained = recommend_thresholds(histogram, min_fraud_recall=0.98)
+    assert constrained['fraud']['recall'] >= 0.98
+    assert constrained['FRAUD_THRESHOLD'] <= free['FRAUD_THRESHOLD']
+
+
+def test_evaluate_matches_direct_scoring(model, transactions):
+    histogram, rows, _ = evaluate(model, [transactions.iloc[:700], transactions.iloc[700:]], bins=50)
+    assert rows == len(transactions)
+    direct = ScoreHistogram(bins=50)
+    direct.update(model.score_feature_matrix(model.build_feature_matrix(transactions)), transactions['isFraud'])
+    assert np.array_equal(histogram.positives, direct.positives)
+    assert np.array_equal(histogram.negatives, direct.negatives)
+
+
+def test_configured_thresholds_drive_classification():
+    model = FraudDetectionModel(model_path='unused/')
+    model.set_thresholds(0.8, 0.2)
+    assert model.classify_probability(0.85) == ('FRAUD', 'High')
+    assert model.classify_probability(0.5) == ('SUSPICIOUS', 'Medium')
+    assert model.classify_probability(0.1) == ('LEGITIMATE', 'Low')
+    with pytest.raises(ValueError):
+        model.set_thresholds(0.2, 0.8)
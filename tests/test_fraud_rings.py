@@ -0,0 +1,167 @@
+import random
+from collections import defaultdict
+
+import pytest
+
+from fraud_rings import FraudRingGraph
+
+
+def random_stream(n, accounts=300, seed=0, steps_per_row=0.05):
+    rng = random.Random(seed)
+    return [
+        {
+            'step': int(i * steps_per_row),
+            'type': rng.choice(['TRANSFER', 'CASH_OUT']),
+            'amount': round(rng.uniform(1, 1000), 2),
+            'nameOrig': f'C{rng.randrange(accounts)}',
+            'nameDest': f'C{rng.randrange(accounts)}',
+        }
+        for i in range(n)
+    ]
+
+
+def reference_components(edges):
+    """Connected components by DFS over (orig, dest) pairs"""
+    neighbours = defaultdict(set)
+    for orig, dest in edges:
+        neighbours[orig].add(dest)
+        neighbours[dest].add(orig)
+    seen, components = set(), []
+    for start in neighbours:
+        if start in seen:
+            continue
+        stack, component = [start], set()
+        while stack:
+            account = stack.pop()
+            if account not in seen:
+                seen.add(account)
+                component.add(account)
+                stack.extend(neighbours[account] - seen)
+        components.append(component)
+    return components
+
+
+def test_components_match_reference_without_expiry():
+    graph = FraudRingGraph(window_steps=10**6, max_degree=10**6)
+    stream = random_stream(600)
+    for transaction in stream:
+        graph.observe(transaction)
+    for component in reference_components([(t['nameOrig'], t['nameDest']) for t in stream]):
+        account = next(iter(component))
+        ring = graph.ring(account, member_limit=10**6)
+        assert set(ring['members']) == component
+        assert ring['accounts'] == len(component)
+
+
+def test_aggregates_match_live_edges_after_expiry_and_rebuild():
+    graph = FraudRingGraph(window_steps=5, max_degree=10**6)
+    stream = random_stream(3000, accounts=500, steps_per_row=0.02)
+    for transaction in stream:
+        graph.observe(transaction)
+    stats = graph.stats()
+    assert stats['rebuilds'] > 0 and stats['edges_expired'] > 0
+    assert stats['edges_added'] - stats['edges_expired'] == stats['live_edges']
+
+    horizon = graph.clock - graph.window_steps
+    live = [t for t in stream if t['step'] >= horizon]
+    assert stats['live_edges'] == len(live)
+    totals = defaultdict(lambda: [0, 0.0])
+    for component in graph._components.values():
+        totals['edges'][0] += component['edges']
+        totals['amount'][1] += component['amount']
+    assert totals['edges'][0] == len(live)
+    assert totals['amount'][1] == pytest.approx(sum(t['amount'] for t in live))
+
+
+def test_rebuild_drops_components_joined_only_by_expired_edges():
+    graph = FraudRingGraph(window_steps=2, max_degree=10**6)
+    graph.observe({'step': 0, 'type': 'TRANSFER', 'amount': 1, 'nameOrig': 'C1', 'nameDest': 'C2'})
+    graph.observe({'step': 0, 'type': 'TRANSFER', 'amount': 1, 'nameOrig': 'C2', 'nameDest': 'C3'})
+    assert graph.ring('C1')['accounts'] == 3
+    graph.observe({'step': 10, 'type': 'TRANSFER', 'amount': 1, 'nameOrig': 'C3', 'nameDest': 'C4'})
+    assert graph.ring('C1') is None
+    assert graph.ring('C3')['accounts'] == 2
+    assert graph.stats()['rebuilds'] == 1
+
+
+def test_chain_inbound_is_the_windowed_sum():
+    graph = FraudRingGraph(window_steps=3, max_degree=10**6)
+    received = []
+    rng = random.Random(1)
+    for step in range(40):
+        amount = float(rng.randint(1, 100))
+        graph.observe({'step': step, 'type': 'TRANSFER', 'amount': amount, 'nameOrig': f'C{step + 100}',
+                       'nameDest': 'C1'})
+        received.append((step, amount))
+        if step % 4 == 3:
+            features = graph.observe({'step': step, 'type': 'CASH_OUT', 'amount': 5, 'nameOrig': 'C1',
+                                      'nameDest': f'C{step + 200}'})
+            expected = sum(a for s, a in received if s >= step - graph.window_steps)
+            assert features['chain'] and features['chain_inbound_amount'] == pytest.approx(expected)
+
+
+def test_chain_needs_a_recent_transfer_in():
+    graph = FraudRingGraph(window_steps=2)
+    graph.observe({'step': 0, 'type': 'TRANSFER', 'amount': 500, 'nameOrig': 'C1', 'nameDest': 'C2'})
+    assert graph.observe({'step': 1, 'type': 'CASH_OUT', 'amount': 500, 'nameOrig': 'C2', 'nameDest': 'C3'})['chain']
+    late = graph.observe({'step': 9, 'type': 'CASH_OUT', 'amount': 500, 'nameOrig': 'C2', 'nameDest': 'C4'})
+    assert not late['chain'] and late['chain_inbound_amount'] == 0
+
+
+def test_ring_flag_needs_size_and_chain():
+    graph = FraudRingGraph(min_ring_size=3)
+    graph.observe({'step': 1, 'type': 'TRANSFER', 'amount': 900, 'nameOrig': 'C1', 'nameDest': 'C2'})
+    features = graph.observe({'step': 1, 'type': 'CASH_OUT', 'amount': 900, 'nameOrig': 'C2', 'nameDest': 'C3'})
+    assert features['ring_flag'] and features['accounts'] == 3 and features['chains'] == 1
+    assert graph.top_rings(5)[0]['ring_id'] == features['ring_id']
+
+
+def test_ring_id_survives_unions_and_rebuilds():
+    graph = FraudRingGraph(window_steps=5)
+    graph.observe({'step': 0, 'type': 'TRANSFER', 'amount': 1, 'nameOrig': 'CA', 'nameDest': 'CB'})
+    for orig, dest in ('CC', 'CD'), ('CD', 'CE'), ('CE', 'CF'):  # Larger, so its root wins the union
+        graph.observe({'step': 1, 'type': 'TRANSFER', 'amount': 1, 'nameOrig': orig, 'nameDest': dest})
+    merged = graph.observe({'step': 2, 'type': 'TRANSFER', 'amount': 1, 'nameOrig': 'CB', 'nameDest': 'CC'})
+    assert merged['accounts'] == 6 and merged['ring_id'] == 'CA'
+    assert graph.ring('CA')['ring_id'] == graph.ring('CF')['ring_id'] == 'CA'
+
+    # Once CA's only edge has expired, a rebuild leaves the rest under its smallest member
+    graph.observe({'step': 6, 'type': 'TRANSFER', 'amount': 1, 'nameOrig': 'CX', 'nameDest': 'CY'})
+    graph._rebuild()
+    assert graph.ring('CA') is None
+    assert graph.ring('CF')['ring_id'] == 'CB'
+
+
+def test_hubs_stop_merging_components():
+    graph = FraudRingGraph(max_degree=3)
+    for i in range(6):
+        graph.observe({'step': 1, 'type': 'CASH_OUT', 'amount': 1, 'nameOrig': f'C{i}', 'nameDest': 'CHUB'})
+    assert graph.ring('CHUB')['accounts'] == 4  # Hub plus the accounts linked before it became one
+    assert graph.ring('C5')['accounts'] == 1
+    assert graph.stats()['hubs'] == 1
+
+
+def test_max_edges_caps_the_live_window():
+    graph = FraudRingGraph(window_steps=10**6, max_edges=100)
+    for transaction in random_stream(500):
+        graph.observe(transaction)
+    assert graph.stats()['live_edges'] <= 100
+
+
+def test_ignored_rows_return_none():
+    graph = FraudRingGraph()
+    assert graph.observe({'type': 'PAYMENT', 'nameOrig': 'C1', 'nameDest': 'C2'}) is None
+    assert graph.observe({'type': 'TRANSFER', 'nameOrig': 'C1', 'nameDest': 'M2'}) is None
+    assert graph.observe({'type': 'TRANSFER', 'nameOrig': 'C1'}) is None
+
+
+def test_rings_endpoint_caps_limit(monkeypatch):
+    import app
+    from config import Config
+
+    graph = FraudRingGraph(min_ring_size=2)
+    for i in range(0, 2 * Config.RINGS_MAX_LIMIT + 20, 2):
+        graph.observe({'step': 1, 'type': 'TRANSFER', 'amount': 1, 'nameOrig': f'C{i}', 'nameDest': f'C{i + 1}'})
+    monkeypatch.setattr(app, 'ring_graph', graph)
+    payload, status = app.build_rings_payload({'limit': str(10 * Config.RINGS_MAX_LIMIT)})
+    assert status == 200 and payload['count'] == Config.RINGS_MAX_LIMIT
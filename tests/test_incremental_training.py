@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from models.dense_network import DenseNetwork
+from models.features import DEFAULT_FEATURE_NAMES, build_feature_matrix, scale_feature_matrix
+from models.incremental_training import (
+    ReplayBuffer, mix_training_rows, numerical_columns, rescale_first_layer, update_scaler
+)
+from tests.conftest import fit_scaler, make_network, make_transactions
+
+
+def test_validation_tail_mixes_new_and_replay_rows():
+    rng = np.random.default_rng(0)
+    new = np.zeros((900, 3), dtype=np.float32)
+    replay = np.ones((900, 3), dtype=np.float32)
+    features, labels = mix_training_rows(new, np.zeros(900), replay, np.ones(900), rng)
+    assert np.array_equal(features[:, 0], labels)
+    tail = labels[-len(labels) // 10:]  # What validation_split=0.1 holds out
+    assert 0.35 < tail.mean() < 0.65
+
+
+def test_replay_buffer_is_a_uniform_sample():
+    buffer = ReplayBuffer(capacity=1000, n_features=1, seed=0)
+    for start in range(0, 100_000, 7_000):
+        rows = np.arange(start, min(start + 7_000, 100_000), dtype=np.float32)
+        buffer.add(rows[:, None], np.zeros(len(rows)))
+    assert len(buffer) == 1000 and buffer.seen == 100_000
+    kept = buffer.features[:, 0]
+    # Each tenth of the stream should hold about a tenth of the sample
+    counts = np.histogram(kept, bins=10, range=(0, 100_000))[0]
+    assert counts.min() > 60 and counts.max() < 140
+    assert len(np.unique(kept)) == 1000
+
+
+def test_replay_buffer_round_trip(tmp_path):
+    buffer = ReplayBuffer(capacity=50, n_features=2, seed=1)
+    buffer.add(np.arange(200, dtype=np.float32).reshape(100, 2), np.arange(100) % 2)
+    buffer.save(str(tmp_path / 'replay.npz'))
+    loaded = ReplayBuffer.load(str(tmp_path / 'replay.npz'))
+    assert np.array_equal(loaded.features, buffer.features)
+    assert np.array_equal(loaded.labels, buffer.labels)
+    assert (loaded.seen, loaded.capacity) == (100, 50)
+
+
+def test_rescaled_first_layer_keeps_the_network_function():
+    old = make_transactions(2000, seed=0)
+    new = make_transactions(2000, seed=1)
+    old['amount'] *= 3
+    scaler = fit_scaler(old)
+    names = list(DEFAULT_FEATURE_NAMES)
+    new_raw = build_feature_matrix(new, names)
+    new_scaler, old_mean, old_scale = update_scaler(scaler, new_raw, names)
+    assert not np.allclose(new_scaler.mean_, old_mean)
+
+    network = make_network()
+    kernel, bias, activation = network.layers[0]
+    rescaled = DenseNetwork([rescale_first_layer(
+        kernel, bias, numerical_columns(names), old_mean, old_scale, new_scaler.mean_, new_scaler.scale_
+    ) + (activation,)] + network.layers[1:])
+
+    before = network.predict(scale_feature_matrix(new_raw, scaler, names))
+    after = rescaled.predict(scale_feature_matrix(new_raw, new_scaler, names))
+    assert after == pytest.approx(before, abs=1e-4)
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from models.dense_network import DenseNetwork
+
+
+def test_shared_memory_network_predicts_identically(model, transactions):
+    network = model.export_network()
+    shared = network.to_shared_memory()
+    try:
+        attached = DenseNetwork.from_shared_memory(shared.shared_spec)
+        features = np.random.default_rng(0).normal(size=(64, 14)).astype(np.float32)
+        assert np.array_equal(attached.predict(features), network.predict(features))
+        assert not attached.layers[0][0].flags.writeable
+        attached.release()
+    finally:
+        shared.release(unlink=True)
+
+
+def test_vectorised_features_match_single_row_preprocessing(model, transactions):
+    rows = transactions.head(20).to_dict('records')
+    matrix = model.score_feature_matrix(model.build_feature_matrix(rows))
+    single = [float(np.ravel(model._run_model(model.preprocess_transaction(row)))[0]) for row in rows]
+    assert np.ravel(matrix) == pytest.approx(single, abs=1e-5)
+
+
+def test_predict_many_matches_in_process_scoring(model, transactions):
+    features = model.build_feature_matrix(transactions)
+    expected = np.ravel(model.score_feature_matrix(features))
+    try:
+        sharded = model.predict_many(features, workers=2, min_parallel_rows=1)
+        assert sharded.shape == (len(transactions),)
+        assert sharded == pytest.approx(expected, abs=1e-6)
+        # The pool is reused across calls
+        scorer = model._sharded_scorer
+        model.predict_many(features[:500], workers=2, min_parallel_rows=1)
+        assert model._sharded_scorer is scorer
+    finally:
+        model.shutdown_pool()
+
+
+def test_small_inputs_stay_in_process(model, transactions):
+    features = model.build_feature_matrix(transactions.head(10))
+    model.predict_many(features, workers=4)
+    assert model._sharded_scorer is None
@@ -0,0 +1,71 @@
+import os
+
+import pytest
+
+from config import Config
+from prediction_store import PredictionStore, parse_database_url
+
+
+@pytest.fixture
+def store(tmp_path):
+    prediction_store = PredictionStore(str(tmp_path / 'predictions.db'), flush_interval=0.05)
+    yield prediction_store
+    prediction_store.close()
+
+
+def record_many(store, n):
+    for i in range(n):
+        classification = 'FRAUD' if i % 3 == 0 else 'LEGITIMATE'
+        store.record(f'tx-{i}', {'type': 'TRANSFER' if i % 2 else 'PAYMENT', 'amount': i, 'step': i},
+                     {'probability': i / n, 'classification': classification, 'model_used': 'Deep Neural Network'})
+    store.flush()
+
+
+def test_keyset_pages_cover_every_row_once_newest_first(store):
+    record_many(store, 23)
+    seen, cursor, pages = [], None, 0
+    while True:
+        rows, cursor = store.query(limit=5, before_id=cursor)
+        seen.extend(row['id'] for row in rows)
+        pages += 1
+        if cursor is None:
+            break
+    assert pages == 5
+    assert seen == sorted(seen, reverse=True)
+    assert len(seen) == len(set(seen)) == 23
+
+
+def test_cursor_is_stable_while_new_rows_arrive(store):
+    record_many(store, 10)
+    first, cursor = store.query(limit=4)
+    record_many(store, 3)
+    second, _ = store.query(limit=4, before_id=cursor)
+    assert [row['id'] for row in second] == [cursor - 1, cursor - 2, cursor - 3, cursor - 4]
+    assert min(row['id'] for row in first) == cursor
+
+
+def test_filters_apply_before_the_page_limit(store):
+    record_many(store, 30)
+    rows, cursor = store.query(limit=100, classification='FRAUD', transaction_type='PAYMENT')
+    assert cursor is None
+    assert rows and all(row['classification'] == 'FRAUD' and row['type'] == 'PAYMENT' for row in rows)
+    assert len(rows) == len([i for i in range(30) if i % 3 == 0 and i % 2 == 0])
+
+
+def test_exact_page_boundary_has_no_next_cursor(store):
+    record_many(store, 10)
+    rows, cursor = store.query(limit=10)
+    assert len(rows) == 10 and cursor is None
+
+
+def test_parse_database_url():
+    assert parse_database_url('sqlite:///relative.db') == ('relative.db', False)
+    assert parse_database_url('sqlite:////abs/path.db') == ('/abs/path.db', False)
+    assert parse_database_url('sqlite:///:memory:')[1] is True
+    with pytest.raises(ValueError):
+        parse_database_url('postgresql://localhost/db')
+
+
+@pytest.mark.skipif('PREDICTION_STORE_ENABLED' in os.environ, reason='store enabled by the environment')
+def test_store_is_off_unless_enabled():
+    assert PredictionStore.from_config(Config) is None
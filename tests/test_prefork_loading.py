@@ -0,0 +1,55 @@
+import sys
+import textwrap
+
+import numpy as np
+
+from models.fraud_model import FraudDetectionModel, STUDENT_MODEL_FILE
+
+# Stand-in for tensorflow.keras.models.load_model, installed only on the
+# child interpreter's path: it reads the weights from the .npz the test
+# writes next to the .h5
+FAKE_KERAS = textwrap.dedent('''
+    import numpy as np
+
+    class Layer:
+        def __init__(self, kernel, bias, activation):
+            self.weights, self.activation = [kernel, bias], activation
+
+        def get_weights(self):
+            return self.weights
+
+        def get_config(self):
+            return {'activation': self.activation}
+
+    class Model:
+        def __init__(self, layers):
+            self.layers = layers
+
+    def load_model(path, compile=True):
+        data = np.load(path.replace('.h5', '.weights.npz'))
+        return Model([Layer(data[f'kernel_{i}'], data[f'bias_{i}'], str(data[f'activation_{i}']))
+                      for i in range(int(data['n_layers']))])
+''')
+
+
+def test_isolated_load_never_imports_tensorflow(artifact_dir, transactions, tmp_path, monkeypatch):
+    fake_path = tmp_path / 'fake_tf'
+    (fake_path / 'tensorflow' / 'keras').mkdir(parents=True)
+    (fake_path / 'tensorflow' / '__init__.py').write_text('')
+    (fake_path / 'tensorflow' / 'keras' / '__init__.py').write_text('')
+    (fake_path / 'tensorflow' / 'keras' / 'models.py').write_text(FAKE_KERAS)
+    monkeypatch.setenv('PYTHONPATH', str(fake_path))
+
+    # Present the artifact's network as a Keras .h5
+    (artifact_dir / STUDENT_MODEL_FILE).rename(artifact_dir / 'fraud_detection_model.weights.npz')
+    (artifact_dir / 'fraud_detection_model.h5').write_bytes(b'')
+
+    model = FraudDetectionModel(model_path=str(artifact_dir))
+    model.load_model(isolate_keras=True)
+
+    assert model.is_loaded and model.backend == 'numpy'
+    assert 'tensorflow' not in sys.modules
+    with np.load(artifact_dir / 'fraud_detection_model.weights.npz') as data:
+        assert np.array_equal(model.export_network().layers[0][0], data['kernel_0'])
+    probabilities = model.predict_many(model.build_feature_matrix(transactions.head(10)), workers=1)
+    assert len(probabilities) == 10
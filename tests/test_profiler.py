@@ -0,0 +1,90 @@
+import threading
+
+import pytest
+
+from config import Config
+from profiler import SamplingProfiler
+
+
+def spin(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+@pytest.fixture
+def busy_thread():
+    stop = threading.Event()
+    thread = threading.Thread(target=spin, args=(stop,), daemon=True)
+    thread.start()
+    yield thread
+    stop.set()
+    thread.join()
+
+
+def run_session(profiler, seconds=0.3, **kwargs):
+    assert profiler.start(seconds, 1, **kwargs) is not None
+    profiler._thread.join(5)
+    assert not profiler.running
+
+
+def test_session_samples_busy_threads(busy_thread):
+    profiler = SamplingProfiler()
+    run_session(profiler)
+
+    stats = profiler.stats()
+    assert stats['session']['samples'] > 0 and stats['session']['finished_at'] is not None
+    top = {row['function']: row for row in profiler.top(100)}
+    assert top['test_profiler.spin']['total'] > 0
+    for line in profiler.collapsed().splitlines():
+        stack, count = line.rsplit(' ', 1)
+        assert int(count) > 0 and ';' in stack
+
+
+def test_idle_threads_are_left_out():
+    parked = threading.Event()
+    thread = threading.Thread(target=parked.wait, daemon=True)
+    thread.start()
+    profiler = SamplingProfiler()
+    run_session(profiler, seconds=0.2)
+    parked.set()
+    thread.join()
+
+    assert profiler.stats()['session']['idle_samples'] > 0
+    assert not any(stack.endswith('threading.wait') for stack in profiler._stacks)
+
+
+def test_one_session_at_a_time_and_bounded_limits(busy_thread):
+    profiler = SamplingProfiler(max_seconds=0.2, min_interval_ms=2, max_stacks=1)
+    session = profiler.start(30, 0.01)
+    assert session['seconds'] == 0.2 and session['interval_ms'] == 2
+    assert profiler.start(1, 1) is None
+    profiler._thread.join(5)
+    assert len(profiler._stacks) == 1
+
+
+@pytest.fixture
+def admin(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, 'profiler', SamplingProfiler(max_seconds=0.2))
+    return app_module
+
+
+def test_admin_endpoints_hidden_without_a_token(admin, client, monkeypatch):
+    monkeypatch.setattr(Config, 'ADMIN_TOKEN', None)
+    assert client.get('/api/admin/profile').status_code == 404
+    assert client.post('/api/admin/profile/start', json={}, headers={Config.ADMIN_TOKEN_HEADER: 'x'}).status_code == 404
+
+
+def test_admin_endpoints_require_the_token(admin, client, monkeypatch):
+    monkeypatch.setattr(Config, 'ADMIN_TOKEN', 'secret')
+    assert client.get('/api/admin/profile', headers={Config.ADMIN_TOKEN_HEADER: 'guess'}).status_code == 403
+    assert client.get('/api/admin/profile').status_code == 403
+
+    headers = {Config.ADMIN_TOKEN_HEADER: 'secret'}
+    assert client.post('/api/admin/profile/start', json={'seconds': -1}, headers=headers).status_code == 400
+    response = client.post('/api/admin/profile/start', json={'seconds': 0.1, 'interval_ms': 1}, headers=headers)
+    assert response.status_code == 202
+    admin.profiler._thread.join(5)
+
+    body = client.get('/api/admin/profile?format=collapsed', headers=headers).get_json()
+    assert body['success'] and not body['running'] and 'collapsed' in body
+    assert client.get('/api/admin/profile?format=svg', headers=headers).status_code == 400
@@ -0,0 +1,43 @@
+import pytest
+
+from tests.conftest import TRANSFER
+
+
+def test_parse_response_options(app_module):
+    options, error = app_module.parse_response_options({})
+    assert error is None and not options['compact']
+    options, _ = app_module.parse_response_options({'fields': 'probability, classification'})
+    assert options['compact'] and options['fields'] == ['probability', 'classification']
+    options, error = app_module.parse_response_options({'fields': 'probability,secret'})
+    assert options is None and 'secret' in error
+
+
+def test_full_response_keeps_metadata_per_prediction(client):
+    body = client.post('/api/predict', json=TRANSFER).get_json()
+    assert 'features_used' in body['prediction']
+
+
+def test_compact_single_prediction(client):
+    body = client.post('/api/predict?compact=1', json=TRANSFER).get_json()
+    assert 'features_used' not in body['prediction']
+    assert 'model_info' in body
+    assert set(body['prediction']) == {'probability', 'classification', 'risk_level', 'confidence', 'model_used'}
+
+
+def test_fields_select_batch_prediction_keys(client):
+    response = client.post('/api/batch-predict?fields=probability,classification',
+                           json={'transactions': [TRANSFER, dict(TRANSFER, type='PAYMENT')]})
+    body = response.get_json()
+    assert response.status_code == 200 and 'model_info' in body
+    assert [set(row['prediction']) for row in body['results']] == [{'probability', 'classification'}] * 2
+
+
+def test_options_may_come_from_the_batch_body(client):
+    body = client.post('/api/batch-predict', json={'transactions': [TRANSFER], 'fields': ['probability']}).get_json()
+    assert set(body['results'][0]['prediction']) == {'probability'}
+
+
+@pytest.mark.parametrize('url', ['/api/predict?fields=nope', '/api/batch-predict?fields=nope'])
+def test_unknown_fields_are_rejected(client, url):
+    payload = {'transactions': [TRANSFER]} if 'batch' in url else TRANSFER
+    assert client.post(url, json=payload).status_code == 400
@@ -0,0 +1,69 @@
+import base64
+import json
+
+import pytest
+
+from tests.conftest import TRANSFER
+
+
+@pytest.fixture
+def serverless(app_module, monkeypatch):
+    import serverless
+    monkeypatch.setattr(serverless, 'admission', app_module.admission)
+    monkeypatch.setattr(serverless, '_model_initialized', True)
+    return serverless
+
+
+def post_event(path, payload, encode=False, content_type='application/json', **extra):
+    body = json.dumps(payload)
+    event = {'httpMethod': 'POST', 'path': path, 'headers': {'Content-Type': content_type}, 'body': body}
+    if encode:
+        event.update(body=base64.b64encode(body.encode()).decode(), isBase64Encoded=True)
+    event.update(extra)
+    return event
+
+
+@pytest.mark.parametrize('raw, expected', [
+    ('/.netlify/functions/app/predict', '/api/predict'),
+    ('/.netlify/functions/app/api/predict/', '/api/predict'),
+    ('/.netlify/functions/serverless', '/'),
+    ('/api/health', '/api/health'),
+])
+def test_event_path_strips_function_prefix(serverless, raw, expected):
+    assert serverless.event_path({'path': raw}) == expected
+
+
+def test_get_with_api_gateway_v2_event(serverless):
+    response = serverless.dispatch_event({'rawPath': '/api/health/live', 'requestContext': {'http': {'method': 'GET'}}})
+    assert response['statusCode'] == 200 and json.loads(response['body']) == {'status': 'alive'}
+    assert response['headers']['Access-Control-Allow-Origin'] == '*'
+
+
+def test_prediction_matches_the_flask_app(serverless, client):
+    response = serverless.dispatch_event(post_event('/.netlify/functions/app/predict', TRANSFER, encode=True,
+                                                    queryStringParameters={'compact': '1'}))
+    expected = client.post('/api/predict?compact=1', json=TRANSFER).get_json()
+    assert response['statusCode'] == 200
+    body = json.loads(response['body'])
+    assert body['prediction'] == expected['prediction']
+
+
+def test_body_errors_and_unknown_routes(serverless):
+    assert serverless.dispatch_event(post_event('/api/predict', TRANSFER, content_type='text/plain'))['statusCode'] == 400
+    bad_json = dict(post_event('/api/predict', TRANSFER), body='{nope')
+    assert serverless.dispatch_event(bad_json)['statusCode'] == 400
+    assert serverless.dispatch_event({'httpMethod': 'GET', 'path': '/'}) is None
+    assert serverless.dispatch_event({'httpMethod': 'OPTIONS', 'path': '/api/predict'})['statusCode'] == 200
+
+
+def test_rate_limited_routes_go_through_admission(serverless, app_module, monkeypatch):
+    from admission import AdmissionController
+    controller = AdmissionController(rate_per_minute=60, burst=1)
+    monkeypatch.setattr(app_module, 'admission', controller)
+    monkeypatch.setattr(serverless, 'admission', controller)
+    event = post_event('/api/predict', TRANSFER, headers={'Content-Type': 'application/json', 'X-API-Key': 'k'})
+
+    assert serverless.dispatch_event(event)['statusCode'] == 200
+    rejected = serverless.dispatch_event(event)
+    assert rejected['statusCode'] == 429 and 'Retry-After' in rejected['headers']
+    assert controller.stats()['in_flight'] == 0
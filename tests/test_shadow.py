@@ -0,0 +1,61 @@
+import pytest
+
+from shadow import ShadowScorer
+from tests.conftest import make_network
+
+
+@pytest.fixture
+def scorer(model):
+    shadow_scorer = ShadowScorer(model, sample_rate=1.0, flush_interval=0.05)
+    yield shadow_scorer
+    shadow_scorer.close()
+
+
+def champion(probability, classification, model_used='Deep Neural Network', degraded=False):
+    return {'probability': probability, 'classification': classification,
+            'model_used': model_used, 'degraded': degraded}
+
+
+def test_only_champion_model_answers_are_compared(scorer, transactions):
+    rows = transactions.head(4).to_dict('records')
+    assert scorer.submit('a', rows[0], champion(0.9, 'FRAUD'))
+    assert not scorer.submit('b', rows[1], champion(0.1, 'LEGITIMATE', model_used='rule_based_fallback'))
+    assert not scorer.submit('c', rows[2], champion(0.0, 'LEGITIMATE', model_used='cascade_rules'))
+    assert not scorer.submit('d', rows[3], champion(0.9, 'FRAUD', degraded=True))
+    scorer.flush()
+
+    stats = scorer.stats()
+    assert stats['sampled'] == stats['scored'] == 1
+    assert stats['skipped_non_model'] == 3
+    assert stats['agreements'] + stats['disagreements'] == 1
+
+
+def test_identical_challenger_always_agrees(scorer, model, transactions):
+    rows = transactions.head(50).to_dict('records')
+    probabilities = model.score_feature_matrix(model.build_feature_matrix(rows))
+    for i, (row, probability) in enumerate(zip(rows, probabilities)):
+        classification, _ = model.classify_probability(float(probability))
+        scorer.submit(str(i), row, champion(float(probability), classification))
+    scorer.flush()
+
+    stats = scorer.stats()
+    assert stats['scored'] == 50 and stats['disagreements'] == 0
+    assert scorer._abs_diff_sum == pytest.approx(0.0, abs=1e-5)
+
+
+def test_different_challenger_records_disagreements(model, transactions):
+    from models.fraud_model import FraudDetectionModel
+
+    challenger = FraudDetectionModel(model_path='challenger/')
+    challenger.attach_network(make_network(seed=7), scaler=model.scaler, feature_names=model.feature_names)
+    scorer = ShadowScorer(challenger, sample_rate=1.0, flush_interval=0.05)
+    try:
+        for i, row in enumerate(transactions.head(200).to_dict('records')):
+            scorer.submit(str(i), row, champion(0.99, 'FRAUD'))
+        scorer.flush()
+        stats = scorer.stats()
+        assert stats['scored'] == 200
+        assert sum(scorer.confusion['FRAUD'].values()) == 200
+        assert len(scorer.recent_disagreements) == min(stats['disagreements'], 50)
+    finally:
+        scorer.close()
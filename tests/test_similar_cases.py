@@ -0,0 +1,115 @@
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from models.dense_network import DenseNetwork
+from models.fraud_model import FraudDetectionModel
+from models.similar_cases import INDEX_FILE, SimilarCaseIndex, transaction_vectors
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def fraud_cases(transactions):
+    return transactions[transactions['isFraud'] == 1]
+
+
+@pytest.mark.parametrize('space', ['scaled', 'embedding'])
+def test_query_matches_brute_force(model, fraud_cases, transactions, space):
+    index = SimilarCaseIndex.build(model, fraud_cases, space=space, case_ids=fraud_cases.index)
+    queries = model.build_feature_matrix(transactions.head(50))
+    results = index.query(model, queries, k=5)
+
+    cases = transaction_vectors(model, model.build_feature_matrix(fraud_cases), space)
+    vectors = transaction_vectors(model, queries, space)
+    distances = ((vectors[:, None, :] - cases[None, :, :]) ** 2).sum(axis=-1)
+    expected = fraud_cases.index.to_numpy()[np.argsort(distances, axis=1)[:, :5]]
+    assert [[case['case_id'] for case in row] for row in results] == expected.tolist()
+
+
+def test_save_load_round_trip(model, fraud_cases, transactions, tmp_path):
+    index = SimilarCaseIndex.build(model, fraud_cases, space='embedding')
+    path = str(tmp_path / INDEX_FILE)
+    index.save(path)
+    loaded = SimilarCaseIndex.load(path)
+    loaded.check_compatible(model)
+    queries = model.build_feature_matrix(transactions.head(20))
+    assert loaded.query(model, queries, k=3) == index.query(model, queries, k=3)
+    assert loaded.info() == index.info()
+
+
+def test_rejects_changed_weights(model, fraud_cases):
+    index = SimilarCaseIndex.build(model, fraud_cases, space='embedding')
+    network = model.export_network()
+    retrained = DenseNetwork([(kernel * 1.5, bias, activation) for kernel, bias, activation in network.layers])
+    model.attach_network(retrained)
+    with pytest.raises(ValueError, match='weights'):
+        index.check_compatible(model)
+
+
+def test_rejects_changed_or_missing_scaler(model, fraud_cases, transactions):
+    from tests.conftest import fit_scaler
+
+    index = SimilarCaseIndex.build(model, fraud_cases, space='scaled')
+    model.scaler = fit_scaler(transactions.head(100))
+    with pytest.raises(ValueError, match='scaler'):
+        index.check_compatible(model)
+    model.scaler = None
+    with pytest.raises(ValueError, match='scaler'):
+        index.check_compatible(model)
+
+
+def test_cli_built_index_loads_in_app(artifact_dir, transactions, tmp_path, monkeypatch):
+    data = tmp_path / 'labelled.csv'
+    transactions.to_csv(data, index=False)
+    subprocess.run(
+        [sys.executable, '-m', 'models.similar_cases', '--data', str(data),
+         '--model-path', str(artifact_dir), '--space', 'embedding'],
+        cwd=REPO_ROOT, check=True, capture_output=True
+    )
+
+    import app
+
+    # Nothing loaded yet, as under a WSGI server before the first readiness probe
+    monkeypatch.setattr(app, 'fraud_model', FraudDetectionModel(model_path=str(artifact_dir)))
+    monkeypatch.setattr(app, 'similar_cases', None)
+    monkeypatch.setattr(app, '_similar_cases_checked', False)
+
+    transaction = json.loads(transactions.head(1).to_json(orient='records'))[0]
+    payload, status = app.process_similar_cases({'transactions': [transaction], 'k': 3})
+    assert status == 200
+    assert len(payload['results'][0]['similar_cases']) == 3
+    assert app.similar_cases.info()['cases'] == int(transactions['isFraud'].sum())
+
+
+def test_prefork_parent_loads_the_index(artifact_dir, transactions, monkeypatch):
+    import app
+    import prefork_server
+    from config import Config
+
+    model = FraudDetectionModel(model_path=str(artifact_dir))
+    model.load_model()
+    SimilarCaseIndex.build(model, transactions[transactions['isFraud'] == 1], space='embedding').save(str(artifact_dir / INDEX_FILE))
+
+    teacher = FraudDetectionModel(model_path=str(artifact_dir))
+    monkeypatch.setattr(app, 'fraud_model', teacher)
+    monkeypatch.setattr(prefork_server, 'fraud_model', teacher)
+    monkeypatch.setattr(app, 'student_model', None)
+    monkeypatch.setattr(app, 'similar_cases', None)
+    monkeypatch.setattr(app, '_similar_cases_checked', False)
+    monkeypatch.setattr(Config, 'WARMUP_ON_STARTUP', False)
+    for key in ('model_loaded', 'ready'):
+        monkeypatch.setitem(app.app_stats, key, False)
+
+    server = prefork_server.PreforkServer.__new__(prefork_server.PreforkServer)
+    server.shared_network = None
+    try:
+        server.load_shared_model()
+        assert app.similar_cases is not None  # Checked against the shared weights
+    finally:
+        if server.shared_network is not None:
+            server.shared_network.release(unlink=True)
@@ -0,0 +1,67 @@
+import threading
+
+import numpy as np
+
+
+class RecordingFunction:
+    """Stands in for a bucket's concrete tf.function"""
+
+    def __init__(self, calls):
+        self.calls = calls
+
+    def __call__(self, chunk):
+        self.calls.append(chunk.shape)
+        return chunk[:, :1] * 2.0
+
+
+def test_batches_are_padded_to_buckets_and_stripped(model, monkeypatch):
+    calls = []
+    model.model = object()  # Anything but a DenseNetwork takes the Keras path
+    model.enable_bucketing([8, 1, 32, 8])
+    assert model.batch_buckets == [1, 8, 32]
+    monkeypatch.setattr(model, '_get_bucket_function', lambda bucket: RecordingFunction(calls))
+
+    scaled = np.arange(45 * 3, dtype=np.float32).reshape(45, 3)
+    probabilities = model._run_model(scaled)
+
+    assert calls == [(32, 3), (32, 3)]
+    np.testing.assert_array_equal(probabilities, scaled[:, 0] * 2.0)
+    calls.clear()
+    model._run_model(scaled[:5])
+    assert calls == [(8, 3)]
+
+
+def test_warmup_runs_every_bucket(model, monkeypatch):
+    sizes = []
+    score = model.score_feature_matrix
+    monkeypatch.setattr(model, 'score_feature_matrix', lambda features: sizes.append(len(features)) or score(features))
+    model.enable_bucketing([1, 8, 32])
+
+    seconds = model.warmup()
+
+    assert sizes == [1, 8, 32]
+    assert model.is_ready and seconds == model.warmup_seconds >= 0
+
+
+def test_readiness_probe_starts_initialisation(app_module, client, monkeypatch):
+    release = threading.Event()
+
+    def initialize_model():
+        release.wait(5)
+        app_module.app_stats['ready'] = True
+
+    monkeypatch.setitem(app_module.app_stats, 'ready', False)
+    monkeypatch.setattr(app_module, '_init_thread', None)
+    monkeypatch.setattr(app_module, 'initialize_model', initialize_model)
+
+    response = client.get('/api/health/ready')
+    assert response.status_code == 503 and response.get_json()['status'] == 'starting'
+    thread = app_module._init_thread
+    assert thread is not None and thread.is_alive()
+    client.get('/api/health/ready')
+    assert app_module._init_thread is thread  # A second probe does not start another load
+
+    release.set()
+    thread.join(5)
+    response = client.get('/api/health/ready')
+    assert response.status_code == 200 and response.get_json()['ready']